@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on the indexed (created_at, id) sort key: each page is
+    a `WHERE (created_at, id) < cursor ... LIMIT n` query, so its cost does
+    not depend on how deep the client has scrolled or how large the table is.
+
+    Responses look like `{"next": url, "previous": url, "results": [...]}`.
+    `?page_size=` overrides API_PAGE_SIZE up to API_MAX_PAGE_SIZE, and
+    `?paginate=false` returns the old unpaginated list for existing clients.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    opt_out_query_param = 'paginate'
+
+    def get_page_size(self, request):
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+        return super().get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.opt_out_query_param, '').lower() in ('false', '0', 'no'):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ChronologicalKeysetPagination(KeysetPagination):
+    """Oldest first, e.g. the messages of a conversation"""
+    ordering = ('created_at', 'id')
+
+
+class ActivityKeysetPagination(KeysetPagination):
+    """Most recent activity first, for rows bumped by later events (coalesced notifications)"""
+    ordering = ('-updated_at', '-id')
+
+
+class RosterKeysetPagination(KeysetPagination):
+    """
+    Students by name, the order rosters have always had. Cursors cannot
+    follow relations, so the view annotates student_first_name,
+    student_last_name and student_email.
+    """
+    ordering = ('student_first_name', 'student_last_name', 'student_email', 'id')
+
+
+class ScheduleKeysetPagination(KeysetPagination):
+    """Soonest first, on the (start_time, id) key of calendar events"""
+    ordering = ('start_time', 'id')
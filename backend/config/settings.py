@@ -59,6 +59,7 @@ INSTALLED_APPS = [
     'courses.apps.CoursesConfig',
     'notifications.apps.NotificationsConfig',
     'messaging.apps.MessagingConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
@@ -203,6 +204,10 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Keyset pagination of list endpoints (see config/pagination.py)
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '500'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -259,14 +264,89 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'DevTrack <no-reply@devtrac
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://127.0.0.1:8000')
 
-# Cache configuration for rate limiting
-# Using LocMemCache for development (in production, use Redis or Memcached)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'devtrack-ratelimit',
+# Cache configuration for rate limiting and unread notification counters
+# Using LocMemCache for development; set REDIS_URL in production so every
+# worker process shares the same cache
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'devtrack-ratelimit',
+        }
+    }
+
+# Background jobs (see `python manage.py run_workers`)
+JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', '2'))
+JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', '1.0'))  # seconds between polls of an empty queue
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '3'))
+JOBS_RETRY_BACKOFF = int(os.getenv('JOBS_RETRY_BACKOFF', '30'))  # seconds, doubled on every retry
+JOBS_LOCK_TIMEOUT = int(os.getenv('JOBS_LOCK_TIMEOUT', '600'))  # seconds before a RUNNING job is considered abandoned
+JOBS_HEARTBEAT_INTERVAL = float(os.getenv('JOBS_HEARTBEAT_INTERVAL', '60'))  # seconds between lock refreshes of a running job
+AI_GRADING_CONCURRENCY = int(os.getenv('AI_GRADING_CONCURRENCY', '2'))  # AI grading jobs running at once
+AI_BULK_GRADING_CONCURRENCY = int(os.getenv('AI_BULK_GRADING_CONCURRENCY', '8'))  # max model calls in flight per bulk grading job
+
+# AI provider: 'gemini' (needs GEMINI_API_KEY) or 'fake' for offline tests/benchmarks
+AI_PROVIDER = os.getenv('AI_PROVIDER', 'gemini')
+AI_FAKE_LATENCY = float(os.getenv('AI_FAKE_LATENCY', '0'))  # seconds per simulated call
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '20'))  # seconds per request
+GEMINI_MAX_CONNECTIONS = int(os.getenv('GEMINI_MAX_CONNECTIONS', '10'))  # pooled keep-alive connections per process
+GEMINI_KEEPALIVE_EXPIRY = float(os.getenv('GEMINI_KEEPALIVE_EXPIRY', '60'))  # seconds an idle connection is kept
+
+# Limits for extracting submission text sent to the AI
+AI_EXTRACT_MAX_CHARS = int(os.getenv('AI_EXTRACT_MAX_CHARS', '2000'))
+AI_EXTRACT_MAX_PAGES = int(os.getenv('AI_EXTRACT_MAX_PAGES', '20'))  # PDF pages
+AI_EXTRACT_MAX_PARAGRAPHS = int(os.getenv('AI_EXTRACT_MAX_PARAGRAPHS', '500'))  # DOCX paragraphs
+AI_EXTRACT_CPU_SECONDS = float(os.getenv('AI_EXTRACT_CPU_SECONDS', '2'))  # CPU time per document
+AI_EXTRACT_POOL_SIZE = int(os.getenv('AI_EXTRACT_POOL_SIZE', '2'))  # parser processes per worker; 0 parses inline
+AI_EXTRACT_TIMEOUT = float(os.getenv('AI_EXTRACT_TIMEOUT', '10'))  # hard wall-clock limit per document (seconds)
+AI_EXTRACT_MEMORY_MB = int(os.getenv('AI_EXTRACT_MEMORY_MB', '512'))  # address space limit of parser processes
+
+# Cache of AI grading/feedback responses (see courses/ai_cache.py)
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', '5000'))
+AI_CACHE_EVICT_EVERY = max(1, int(os.getenv('AI_CACHE_EVICT_EVERY', '100')))  # puts between evictions
+
+# Notification outbox: 'on_commit' expands events right after the writer's
+# transaction commits; 'worker' leaves them to the run_workers job queue
+NOTIFICATIONS_OUTBOX_DELIVERY = os.getenv('NOTIFICATIONS_OUTBOX_DELIVERY', 'on_commit')
+NOTIFICATIONS_OUTBOX_BATCH_SIZE = int(os.getenv('NOTIFICATIONS_OUTBOX_BATCH_SIZE', '200'))  # events per transaction
+NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = int(os.getenv('NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS', '5'))
+# Cached unread counters (see notifications/unread.py). They need a cache shared
+# by every process (REDIS_URL): with the per-process LocMemCache each worker
+# would keep its own count, so the counts are read from the database instead
+NOTIFICATIONS_UNREAD_CACHE = os.getenv('NOTIFICATIONS_UNREAD_CACHE', 'True' if os.getenv('REDIS_URL') else 'False') == 'True'
+# Entries expire and are recounted after this many seconds, which bounds any drift
+NOTIFICATIONS_UNREAD_CACHE_TTL = int(os.getenv('NOTIFICATIONS_UNREAD_CACHE_TTL', '300'))
+
+# Server-sent events stream (see notifications/stream.py)
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', '2.0'))  # seconds between polls of the event table
+STREAM_HEARTBEAT = int(os.getenv('STREAM_HEARTBEAT', '15'))  # seconds of silence before a keep-alive comment
+STREAM_MAX_DURATION = int(os.getenv('STREAM_MAX_DURATION', '300'))  # seconds a stream stays open under ASGI
+STREAM_WSGI_MAX_DURATION = int(os.getenv('STREAM_WSGI_MAX_DURATION', '20'))  # under sync workers (below the gunicorn timeout)
+STREAM_RETENTION = int(os.getenv('STREAM_RETENTION', str(24 * 3600)))  # seconds events are kept for replay
+STREAM_RETRY_MS = int(os.getenv('STREAM_RETRY_MS', '3000'))  # reconnect delay suggested to the browser
+STREAM_TICKET_TTL = int(os.getenv('STREAM_TICKET_TTL', '30'))  # seconds a stream ticket can be redeemed
+# Sync workers hold one worker per open stream: offer it there only if enabled
+STREAM_WSGI_ENABLED = os.getenv('STREAM_WSGI_ENABLED', 'False') == 'True'
+# Whether this deployment offers the stream at all (ASGI workers or the flag
+# above); when it does not, no events are stored for it
+STREAM_ENABLED = os.getenv(
+    'STREAM_ENABLED',
+    'True' if STREAM_WSGI_ENABLED or 'uvicorn' in os.getenv('GUNICORN_WORKER_CLASS', '').lower() else 'False',
+) == 'True'
+
+# Long-poll of new messages (?after_id=...&wait=N), kept below the gunicorn timeout
+MESSAGES_LONG_POLL_MAX_WAIT = int(os.getenv('MESSAGES_LONG_POLL_MAX_WAIT', '20'))  # seconds
+MESSAGES_LONG_POLL_INTERVAL = float(os.getenv('MESSAGES_LONG_POLL_INTERVAL', '1.0'))  # seconds between checks
+# Sync workers are held for the whole wait: honour `wait` there only if enabled
+MESSAGES_LONG_POLL_WSGI_ENABLED = os.getenv('MESSAGES_LONG_POLL_WSGI_ENABLED', 'False') == 'True'
 
 # Rate Limiting Configuration
 # django-ratelimit uses this cache backend
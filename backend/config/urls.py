@@ -24,6 +24,7 @@ def home_view(request):
                 "courses": "/api/v1/courses/",
                 "notifications": "/api/v1/notifs/",
                 "messaging": "/api/v1/messaging/",
+                "jobs": "/api/v1/jobs/",
                 "admin_panel": "/admin/",
                 "api_documentation": "/api/docs/",
                 "api_schema": "/api/schema/",
@@ -50,6 +51,7 @@ urlpatterns = [
     path("api/v1/courses/", include("courses.urls")),
     path("api/v1/notifs/", include("notifications.urls")),
     path("api/v1/messaging/", include("messaging.urls")),
+    path("api/v1/jobs/", include("jobs.urls")),
 
     # V1 aliases (backward compatibility)
     path("api/auth/", include("accounts.urls")),
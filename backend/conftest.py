@@ -1,10 +1,19 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache (rate limits, unread counters)"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """API client for testing"""
@@ -89,3 +98,18 @@ def admin_client(api_client, admin_user):
     """API client with authenticated admin"""
     api_client.force_authenticate(user=admin_user)
     return api_client
+
+
+@pytest.fixture
+def run_jobs(db, django_capture_on_commit_callbacks):
+    """Drain the background job queue; given a 202 response, return its job result"""
+    from jobs.models import Job
+    from jobs.services import run_pending_jobs
+
+    def drain(response=None):
+        # Workers commit every job, so run the on_commit callbacks too (e.g. notifications)
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pending_jobs()
+        if response is not None:
+            return Job.objects.get(pk=response.data['job_id']).result
+    return drain
@@ -1,5 +1,20 @@
 from django.contrib import admin
-from .models import Subject, Enrollment, Exercise, StudentExerciseResult, Notification
+from django.db import transaction
+from .models import (
+    Subject, Enrollment, EnrollmentStats, Exercise, StudentExerciseResult, Notification,
+    AIResponseCache, AICacheCounter, SubmissionText,
+)
+from .signals import bulk_changes
+
+
+class BulkChangesAdminMixin:
+    """Run changelist actions (e.g. bulk delete) with the model receivers deferred"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != "POST":
+            return super().changelist_view(request, extra_context)
+        with transaction.atomic(), bulk_changes():
+            return super().changelist_view(request, extra_context)
 
 
 @admin.register(Subject)
@@ -10,21 +25,29 @@ class SubjectAdmin(admin.ModelAdmin):
 
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(BulkChangesAdminMixin, admin.ModelAdmin):
     list_display = ("id", "subject", "student", "created_at")
     search_fields = ("subject__code", "student__email")
     list_filter = ("subject",)
 
 
+@admin.register(EnrollmentStats)
+class EnrollmentStatsAdmin(admin.ModelAdmin):
+    list_display = ("id", "enrollment", "total", "green", "yellow", "red", "submitted", "grade", "semaphore", "updated_at")
+    search_fields = ("enrollment__student__email", "enrollment__subject__code")
+    list_filter = ("semaphore",)
+    readonly_fields = ("updated_at",)
+
+
 @admin.register(Exercise)
-class ExerciseAdmin(admin.ModelAdmin):
+class ExerciseAdmin(BulkChangesAdminMixin, admin.ModelAdmin):
     list_display = ("id", "subject", "name", "order")
     search_fields = ("subject__code", "name")
     list_filter = ("subject",)
 
 
 @admin.register(StudentExerciseResult)
-class StudentExerciseResultAdmin(admin.ModelAdmin):
+class StudentExerciseResultAdmin(BulkChangesAdminMixin, admin.ModelAdmin):
     list_display = ("id", "enrollment", "exercise", "status", "created_at", "updated_at")
     search_fields = ("enrollment__student__email", "exercise__name")
     list_filter = ("status", "exercise__subject")
@@ -37,3 +60,23 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ("notification_type", "is_read", "created_at")
     readonly_fields = ("created_at",)
     list_per_page = 50
+
+
+@admin.register(AIResponseCache)
+class AIResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "key", "hits", "created_at", "last_used_at", "expires_at")
+    search_fields = ("key",)
+    list_filter = ("kind",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(AICacheCounter)
+class AICacheCounterAdmin(admin.ModelAdmin):
+    list_display = ("kind", "hits", "misses")
+
+
+@admin.register(SubmissionText)
+class SubmissionTextAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha256", "created_at")
+    search_fields = ("sha256",)
+    readonly_fields = ("created_at",)
@@ -0,0 +1,139 @@
+"""
+Persistent, content-addressed cache for AI grading and feedback responses.
+
+The key is a SHA-256 of the normalized prompt inputs (model, prompt version,
+exercise description, submission text/file content, status...), so the
+same request from a double click or from many students submitting the same
+template costs a single API call. Entries expire after AI_CACHE_TTL seconds
+and the least recently used ones are evicted beyond AI_CACHE_MAX_ENTRIES.
+Eviction scans the table, so it runs once every AI_CACHE_EVICT_EVERY puts of
+a process rather than on each one; the limit may be overshot by that much.
+"""
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AICacheCounter, AIResponseCache
+
+_MISSING = object()
+_puts = itertools.count(1)  # puts by this process, to space out evictions
+
+
+def normalize_text(value) -> str:
+    """Collapse whitespace differences that do not change the prompt meaning"""
+    if value is None:
+        return ""
+    text = str(value).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    return "\n".join(lines).strip()
+
+
+def file_digest(file_obj) -> str:
+    """SHA-256 of a file-like object's bytes; the read position is restored"""
+    if not file_obj:
+        return ""
+    position = file_obj.tell() if hasattr(file_obj, "tell") else 0
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(64 * 1024), b""):
+        digest.update(chunk)
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+def make_key(kind: str, **inputs) -> str:
+    """Stable hash of `kind` and the (already normalized) prompt inputs"""
+    payload = json.dumps({"kind": kind, **inputs}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _count(kind: str, field: str):
+    updated = AICacheCounter.objects.filter(kind=kind).update(**{field: F(field) + 1})
+    if not updated:
+        try:
+            with transaction.atomic():
+                AICacheCounter.objects.create(kind=kind, **{field: 1})
+        except IntegrityError:
+            AICacheCounter.objects.filter(kind=kind).update(**{field: F(field) + 1})
+
+
+def get(kind: str, key: str, default=None):
+    """Return the cached response for `key`, counting a hit or a miss"""
+    now = timezone.now()
+    entry = (
+        AIResponseCache.objects.filter(key=key, expires_at__gt=now)
+        .values_list("response", flat=True)
+        .first()
+    )
+    if entry is None:
+        _count(kind, "misses")
+        return default
+    AIResponseCache.objects.filter(key=key).update(hits=F("hits") + 1, last_used_at=now)
+    _count(kind, "hits")
+    return entry
+
+
+def put(kind: str, key: str, response):
+    """Store a response; every AI_CACHE_EVICT_EVERY puts, evict expired and least recently used entries"""
+    now = timezone.now()
+    AIResponseCache.objects.update_or_create(
+        key=key,
+        defaults={
+            "kind": kind,
+            "response": response,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=settings.AI_CACHE_TTL),
+        },
+    )
+    if next(_puts) % settings.AI_CACHE_EVICT_EVERY == 0:
+        evict()
+
+
+def evict() -> int:
+    """Delete expired entries and the oldest ones beyond AI_CACHE_MAX_ENTRIES"""
+    deleted, _ = AIResponseCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    overflow = list(
+        AIResponseCache.objects.order_by("-last_used_at", "-id")
+        .values_list("id", flat=True)[settings.AI_CACHE_MAX_ENTRIES:]
+    )
+    if overflow:
+        deleted += AIResponseCache.objects.filter(id__in=overflow).delete()[0]
+    return deleted
+
+
+def cached(kind: str, key: str, compute):
+    """
+    Return the cached response for `key`, or call `compute()`, which returns
+    `(response, cacheable)`. Fallbacks for API errors are returned but not
+    cached so the next call tries the model again.
+    """
+    response = get(kind, key, _MISSING)
+    if response is not _MISSING:
+        return response
+    response, cacheable = compute()
+    if cacheable:
+        put(kind, key, response)
+    return response
+
+
+def stats() -> dict:
+    """Hit/miss counters and live entries per kind"""
+    counters = {c.kind: c for c in AICacheCounter.objects.all()}
+    result = {}
+    for kind in AIResponseCache.Kind.values:
+        counter = counters.get(kind)
+        hits, misses = (counter.hits, counter.misses) if counter else (0, 0)
+        result[kind] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "entries": AIResponseCache.objects.filter(kind=kind, expires_at__gt=timezone.now()).count(),
+        }
+    return result
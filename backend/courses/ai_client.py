@@ -0,0 +1,113 @@
+"""
+Process-wide AI provider used by `courses.ai_service`.
+
+The Gemini client is built lazily once per process (and rebuilt after a
+fork, so pooled workers never share sockets) and keeps its HTTP connections
+alive between calls. Set AI_PROVIDER=fake to use `FakeProvider`, which
+answers locally with the same interface, for tests and benchmarks.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+
+class GeminiProvider:
+    """Thin wrapper around one reusable `genai.Client`"""
+
+    def __init__(self, api_key: str, timeout: float, max_connections: int, keepalive_expiry: float):
+        import httpx
+        from google import genai
+        from google.genai import types
+
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                timeout=int(timeout * 1000),  # milliseconds
+                client_args={
+                    "limits": httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                        keepalive_expiry=keepalive_expiry,
+                    )
+                },
+            ),
+        )
+
+    def generate(self, prompt: str, model: str, json_response: bool = False) -> str:
+        config = {"response_mime_type": "application/json"} if json_response else None
+        response = self.client.models.generate_content(model=model, contents=prompt, config=config)
+        return response.text
+
+
+class FakeProvider:
+    """
+    Offline provider with the same interface as `GeminiProvider`. Answers
+    are deterministic per prompt and `latency` simulates the model round
+    trip, so grading throughput can be measured without network access.
+    """
+
+    STATUSES = ("GREEN", "YELLOW", "RED")
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, model: str, json_response: bool = False) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        status = self.STATUSES[digest[0] % len(self.STATUSES)]
+        if json_response:
+            return json.dumps({"status": status, "feedback": f"Calificación simulada: {status}."})
+        return f"Retroalimentación simulada ({status})."
+
+
+_provider = None
+_provider_pid = None
+_lock = threading.Lock()
+
+
+def _build_provider():
+    name = settings.AI_PROVIDER
+    if name == "fake":
+        return FakeProvider(latency=settings.AI_FAKE_LATENCY)
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    return GeminiProvider(
+        api_key=api_key,
+        timeout=settings.GEMINI_TIMEOUT,
+        max_connections=settings.GEMINI_MAX_CONNECTIONS,
+        keepalive_expiry=settings.GEMINI_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_provider():
+    """
+    The shared provider for this process, or None when Gemini is selected
+    but GEMINI_API_KEY is not configured.
+    """
+    global _provider, _provider_pid
+    pid = os.getpid()
+    if _provider is None or _provider_pid != pid:
+        with _lock:
+            if _provider is None or _provider_pid != pid:
+                _provider = _build_provider()
+                _provider_pid = pid if _provider is not None else None
+    return _provider
+
+
+def set_provider(provider):
+    """Install a provider for this process (e.g. a FakeProvider); None resets"""
+    global _provider, _provider_pid
+    with _lock:
+        _provider = provider
+        _provider_pid = os.getpid() if provider is not None else None
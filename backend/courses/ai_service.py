@@ -1,37 +1,49 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import json
 import os
-from google import genai
 from django.conf import settings
-import pypdf
-import docx
 
-def extract_text_from_file(file_obj, file_name):
+from . import ai_cache, extraction_pool
+from .ai_client import get_provider
+from .models import AIResponseCache, SubmissionText
+from .text_extraction import extract_text
+
+GEMINI_MODEL = "gemini-2.0-flash"
+# Bump when a prompt changes so cached responses for the old prompt are not reused
+PROMPT_VERSION = 1
+
+SUPPORTED_EXTRACTION_TYPES = ('.pdf', '.docx', '.doc')
+
+
+def extract_text_from_file(file_obj, file_name, max_chars=None, max_pages=None, max_paragraphs=None, cpu_seconds=None):
     """
     Extracts text from PDF or DOCX files (file-like objects).
+
+    Parsing runs in the extraction process pool with a hard timeout and a
+    memory limit (see `courses.extraction_pool`); None is returned when the
+    document has no extractable text, and extraction_pool.ExtractionFailed is
+    raised when the parser timed out or crashed. Pages/paragraphs are read one at a time and
+    extraction stops once `max_chars` characters are collected, after
+    `max_pages` PDF pages or `max_paragraphs` DOCX paragraphs, or once
+    `cpu_seconds` of CPU time are spent. Limits default to the AI_EXTRACT_*
+    settings.
     """
     if not file_obj:
         return None
-    
-    ext = os.path.splitext(file_name)[1].lower()
-    text = ""
-    
-    try:
-        if ext == '.pdf':
-            reader = pypdf.PdfReader(file_obj)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        elif ext in ['.docx', '.doc']:
-            doc = docx.Document(file_obj)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        else:
-            return None # Unsupported format for text extraction
-            
-        return text.strip()[:2000] # Limit to first 2000 chars to avoid token limits
-    except Exception as e:
-        print(f"Error extracting text from {file_name}: {e}")
-        return None
+    if os.path.splitext(file_name)[1].lower() not in SUPPORTED_EXTRACTION_TYPES:
+        return None # Unsupported format for text extraction
+
+    return extraction_pool.run(
+        extract_text,
+        file_obj.read(),
+        file_name,
+        max_chars or settings.AI_EXTRACT_MAX_CHARS,
+        max_pages or settings.AI_EXTRACT_MAX_PAGES,
+        max_paragraphs or settings.AI_EXTRACT_MAX_PARAGRAPHS,
+        cpu_seconds or settings.AI_EXTRACT_CPU_SECONDS,
+    )
 
-def generate_grading_feedback(exercise_description, student_email, status, current_comment=None, submission_file=None, submission_file_name=None):
+def generate_grading_feedback(exercise_description, student_email, status, current_comment=None, submission_file=None, submission_file_name=None, submission_file_hash=None):
     """
     Generates feedback for a student submission using Google Gemini API.
     
@@ -42,15 +54,86 @@ def generate_grading_feedback(exercise_description, student_email, status, curre
         current_comment (str, optional): Existing comment if any.
         submission_file (file-like, optional): The student's submission file object.
         submission_file_name (str, optional): The name of the file (for extension detection).
+        submission_file_hash (str, optional): SHA-256 of the file stored at upload; avoids re-hashing.
         
     Returns:
         str: Generated feedback.
     """
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        return "Error: GEMINI_API_KEY not configured."
+    digest = _file_digest(submission_file, submission_file_name, submission_file_hash)
+    key = ai_cache.make_key(
+        AIResponseCache.Kind.FEEDBACK,
+        model=GEMINI_MODEL,
+        prompt_version=PROMPT_VERSION,
+        exercise_description=ai_cache.normalize_text(exercise_description),
+        status=status,
+        current_comment=ai_cache.normalize_text(current_comment),
+        submission_file=_submission_file_key(submission_file_name, digest),
+    )
+
+    def compute():
+        file_text, complete = _file_text(submission_file, submission_file_name, digest)
+        feedback, cacheable = _generate_feedback(exercise_description, status, current_comment, file_text)
+        return feedback, cacheable and complete
+
+    return ai_cache.cached(AIResponseCache.Kind.FEEDBACK, key, compute)
+
+
+def _file_digest(submission_file, submission_file_name, submission_file_hash=None):
+    if not (submission_file and submission_file_name):
+        return ""
+    return submission_file_hash or ai_cache.file_digest(submission_file)
+
+
+def _submission_file_key(submission_file_name, digest):
+    """Cache key part for an attached file: its extension and content hash"""
+    if not digest:
+        return ""
+    ext = os.path.splitext(submission_file_name)[1].lower()
+    return f"{ext}:{digest}"
+
+
+def submission_file_text(submission_file, submission_file_name, digest=None):
+    """
+    Text of a submission file, parsed at most once per distinct content and
+    stored in SubmissionText. Returns None when no text could be extracted;
+    a failed parse (ExtractionFailed) is raised and not stored, so the next
+    call tries again.
+    """
+    if not (submission_file and submission_file_name):
+        return None
+    digest = digest or ai_cache.file_digest(submission_file)
+    stored = SubmissionText.objects.filter(sha256=digest).only("text").first()
+    if stored is not None:
+        return stored.text
+    try:
+        text = extract_text_from_file(submission_file, submission_file_name)
+    finally:
+        submission_file.seek(0)
+    SubmissionText.objects.get_or_create(sha256=digest, defaults={"text": text})
+    return text
+
+
+def _file_text(submission_file, submission_file_name, digest):
+    """(text, complete); complete is False when the parse failed and the answer must not be cached"""
+    try:
+        return submission_file_text(submission_file, submission_file_name, digest), True
+    except extraction_pool.ExtractionFailed:
+        return None, False
 
-    client = genai.Client(api_key=api_key)
+
+def store_submission_file_text(submission_file, submission_file_name, digest=None):
+    """Extract and store the text of a submission file; returns its SHA-256"""
+    digest = digest or ai_cache.file_digest(submission_file)
+    # On a failed parse grading tries again later
+    _file_text(submission_file, submission_file_name, digest)
+    return digest
+
+
+def _generate_feedback(exercise_description, status, current_comment, file_text):
+    """Call the model with the already extracted file text; returns (feedback, cacheable)"""
+    provider = get_provider()
+    if provider is None:
+        return "Error: GEMINI_API_KEY not configured.", False
 
     # Map status to readable text
     status_map = {
@@ -60,12 +143,9 @@ def generate_grading_feedback(exercise_description, student_email, status, curre
     }
     readable_status = status_map.get(status, status)
 
-    # Extract text from submission if available
     submission_text = ""
-    if submission_file and submission_file_name:
-        extracted = extract_text_from_file(submission_file, submission_file_name)
-        if extracted:
-            submission_text = f"\n    - Contenido de la Entrega (Extracto): {extracted}"
+    if file_text:
+        submission_text = f"\n    - Contenido de la Entrega (Extracto): {file_text}"
 
     prompt = f"""
     Actúa como un profesor de apoyo pero estricto.
@@ -84,15 +164,12 @@ def generate_grading_feedback(exercise_description, student_email, status, curre
     """
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
-        )
-        return response.text.strip()
+        text = provider.generate(prompt, GEMINI_MODEL)
+        return text.strip(), True
     except Exception as e:
-        return f"Error generating feedback: {str(e)}"
+        return f"Error generating feedback: {str(e)}", False
 
-def grade_submission(exercise_description, submission_file=None, submission_file_name=None, submission_text=None):
+def grade_submission(exercise_description, submission_file=None, submission_file_name=None, submission_text=None, submission_file_hash=None):
     """
     Analyzes a student submission and assigns a grade (GREEN, YELLOW, RED) with feedback.
     
@@ -101,15 +178,91 @@ def grade_submission(exercise_description, submission_file=None, submission_file
         submission_file (file-like, optional): The student's submission file object.
         submission_file_name (str, optional): The name of the file.
         submission_text (str, optional): Text submission from the student.
+        submission_file_hash (str, optional): SHA-256 of the file stored at upload; avoids re-hashing.
         
     Returns:
         dict: {'status': 'GREEN'|'YELLOW'|'RED', 'feedback': str}
     """
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        return {'status': 'YELLOW', 'feedback': "Error: GEMINI_API_KEY not configured."}
+    digest = _file_digest(submission_file, submission_file_name, submission_file_hash)
+    key = _grading_key(exercise_description, submission_file_name, digest, submission_text)
+
+    def compute():
+        file_text, complete = _file_text(submission_file, submission_file_name, digest)
+        result, cacheable = _grade_submission(exercise_description, submission_text, file_text, bool(digest))
+        return result, cacheable and complete
+
+    return ai_cache.cached(AIResponseCache.Kind.GRADING, key, compute)
+
+
+def grade_submissions(submissions, concurrency):
+    """
+    Grades many submissions with at most `concurrency` model calls in flight.
+
+    Args:
+        submissions (iterable): (ref, kwargs) pairs, where kwargs are the
+            grade_submission() arguments. Consumed lazily, so at most
+            `concurrency` submission files are held in memory.
+        concurrency (int): Maximum parallel model calls.
+
+    Yields:
+        (ref, {'status': ..., 'feedback': ...}) in completion order. Cache
+        hits are yielded without a model call.
+
+    Cache and stored-text lookups stay in the calling thread; worker threads
+    only call the model.
+    """
+    missing = object()
+    submissions = iter(submissions)
+    pending = {}
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    ref, kwargs = next(submissions)
+                except StopIteration:
+                    exhausted = True
+                    break
+                description = kwargs.get("exercise_description")
+                submission_file = kwargs.get("submission_file")
+                file_name = kwargs.get("submission_file_name")
+                text = kwargs.get("submission_text")
+                digest = _file_digest(submission_file, file_name, kwargs.get("submission_file_hash"))
+                key = _grading_key(description, file_name, digest, text)
+                hit = ai_cache.get(AIResponseCache.Kind.GRADING, key, missing)
+                if hit is not missing:
+                    yield ref, hit
+                    continue
+                file_text, complete = _file_text(submission_file, file_name, digest)
+                future = pool.submit(_grade_submission, description, text, file_text, bool(digest))
+                pending[future] = (ref, key, complete)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ref, key, complete = pending.pop(future)
+                result, cacheable = future.result()
+                if cacheable and complete:
+                    ai_cache.put(AIResponseCache.Kind.GRADING, key, result)
+                yield ref, result
+
+
+def _grading_key(exercise_description, submission_file_name, digest, submission_text):
+    return ai_cache.make_key(
+        AIResponseCache.Kind.GRADING,
+        model=GEMINI_MODEL,
+        prompt_version=PROMPT_VERSION,
+        exercise_description=ai_cache.normalize_text(exercise_description),
+        submission_text=ai_cache.normalize_text(submission_text),
+        submission_file=_submission_file_key(submission_file_name, digest),
+    )
+
 
-    client = genai.Client(api_key=api_key)
+def _grade_submission(exercise_description, submission_text, file_text, has_file):
+    """Call the model with the already extracted file text; returns (result, cacheable)"""
+    provider = get_provider()
+    if provider is None:
+        return {'status': 'YELLOW', 'feedback': "Error: GEMINI_API_KEY not configured."}, False
 
     # Prepare content to grade
     content_to_grade = ""
@@ -117,10 +270,9 @@ def grade_submission(exercise_description, submission_file=None, submission_file
     if submission_text:
         content_to_grade += f"Contenido de Texto:\n{submission_text}\n\n"
 
-    if submission_file and submission_file_name:
-        extracted = extract_text_from_file(submission_file, submission_file_name)
-        if extracted:
-            content_to_grade += f"Contenido del Archivo (Extracto):\n{extracted}"
+    if has_file:
+        if file_text:
+            content_to_grade += f"Contenido del Archivo (Extracto):\n{file_text}"
         else:
             content_to_grade += " (No se pudo extraer texto del archivo adjunto)."
     
@@ -151,22 +303,15 @@ def grade_submission(exercise_description, submission_file=None, submission_file
     """
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config={
-                'response_mime_type': 'application/json'
-            }
-        )
-        import json
-        result = json.loads(response.text)
+        text = provider.generate(prompt, GEMINI_MODEL, json_response=True)
+        result = json.loads(text)
         
         # Validate status
         if result.get('status') not in ['GREEN', 'YELLOW', 'RED']:
             result['status'] = 'YELLOW' # Default fallback
             
-        return result
+        return result, True
     except Exception as e:
         print(f"AI Grading Error: {e}")
-        return {'status': 'YELLOW', 'feedback': "No se pudo calificar automáticamente. Por favor revisa manualmente."}
+        return {'status': 'YELLOW', 'feedback': "No se pudo calificar automáticamente. Por favor revisa manualmente."}, False
 
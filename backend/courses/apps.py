@@ -8,3 +8,5 @@ class CoursesConfig(AppConfig):
     def ready(self):
         # Import signals on app ready
         from . import signals  # noqa: F401
+        # Register background job handlers
+        from . import tasks  # noqa: F401
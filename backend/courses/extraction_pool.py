@@ -0,0 +1,130 @@
+"""
+Small process pool for CPU-bound document parsing, shared by every thread of
+a (gunicorn or job) worker process and warmed at startup.
+
+Each call gets a hard timeout: when it expires the pool's processes are
+killed and the pool is rebuilt on the next call. Child processes run with an
+address-space limit, so a pathological document raises MemoryError in the
+child instead of exhausting the host. Such failures raise ExtractionFailed,
+which callers tell apart from a document with no extractable text (None):
+the next attempt may well succeed, so the outcome must not be stored.
+"""
+from __future__ import annotations
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None
+_lock = threading.Lock()
+
+
+def _init_child(memory_limit_mb):
+    # Ctrl+C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:  # e.g. Windows
+        logger.warning("Could not set extraction memory limit: %s", e)
+
+
+def _context():
+    # forkserver children do not inherit the parent's threads, locks or DB
+    # connections; fall back to spawn where it is unavailable
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload(["courses.text_extraction"])
+    return context
+
+
+def get_pool() -> ProcessPoolExecutor | None:
+    """The pool of this process (created lazily), or None when disabled"""
+    global _pool, _pool_pid
+    if settings.AI_EXTRACT_POOL_SIZE < 1:
+        return None
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.AI_EXTRACT_POOL_SIZE,
+                    mp_context=_context(),
+                    initializer=_init_child,
+                    initargs=(settings.AI_EXTRACT_MEMORY_MB,),
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def _discard(pool):
+    """Kill the pool's processes (a timed-out task cannot be cancelled)"""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is pool:
+            _pool, _pool_pid = None, None
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown():
+    global _pool, _pool_pid
+    with _lock:
+        pool, _pool, _pool_pid = _pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def warm_up():
+    """Start the pool's processes now instead of on the first upload"""
+    pool = get_pool()
+    if pool is None:
+        return
+    futures = [pool.submit(os.getpid) for _ in range(settings.AI_EXTRACT_POOL_SIZE)]
+    for future in futures:
+        future.result(timeout=settings.AI_EXTRACT_TIMEOUT)
+
+
+class ExtractionFailed(Exception):
+    """The parser timed out, ran out of memory or crashed"""
+
+
+def run(func, *args, timeout=None):
+    """
+    Run `func(*args)` in the pool, raising ExtractionFailed if it times out,
+    exhausts its memory limit or crashes. Runs inline when the pool is
+    disabled (AI_EXTRACT_POOL_SIZE=0).
+    """
+    pool = get_pool()
+    if pool is None:
+        return func(*args)
+    timeout = settings.AI_EXTRACT_TIMEOUT if timeout is None else timeout
+    try:
+        return pool.submit(func, *args).result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning("Document extraction timed out after %ss", timeout)
+        _discard(pool)
+        raise ExtractionFailed("timeout")
+    except BrokenProcessPool:
+        logger.warning("Document extraction process died; restarting the pool")
+        _discard(pool)
+        raise ExtractionFailed("process died")
+    except MemoryError:
+        logger.warning("Document extraction exceeded %s MB", settings.AI_EXTRACT_MEMORY_MB)
+        raise ExtractionFailed("memory limit")
+    except Exception as e:
+        logger.warning("Document extraction failed: %s", e)
+        raise ExtractionFailed(str(e)) from e
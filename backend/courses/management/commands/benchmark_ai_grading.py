@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import ai_service
+from courses.ai_client import FakeProvider, get_provider, set_provider
+
+
+class Command(BaseCommand):
+    help = "Measure AI grading throughput (offline with the fake provider by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submissions", type=int, default=100, help="Submissions to grade")
+        parser.add_argument("--concurrency", type=int, default=settings.AI_GRADING_CONCURRENCY,
+                            help="Submissions graded at once")
+        parser.add_argument("--provider", choices=["fake", "gemini"], default="fake",
+                            help="fake answers locally; gemini calls the real API")
+        parser.add_argument("--latency", type=float, default=0.2,
+                            help="Simulated seconds per call for the fake provider")
+
+    def handle(self, *args, **options):
+        submissions = options["submissions"]
+        concurrency = options["concurrency"]
+        if submissions < 1 or concurrency < 1:
+            raise CommandError("--submissions y --concurrency deben ser mayores que 0")
+
+        if options["provider"] == "fake":
+            set_provider(FakeProvider(latency=options["latency"]))
+        elif get_provider() is None:
+            raise CommandError("GEMINI_API_KEY no está configurada")
+
+        def grade(i):
+            started = time.perf_counter()
+            # Uncached path: every submission is a distinct model call
+            result, _ = ai_service._grade_submission(
+                "Escribe una función que sume dos números.",
+                f"def suma(a, b):\n    return a + b  # entrega {i}",
+                None,
+                False,
+            )
+            return time.perf_counter() - started, result["status"]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("BENCHMARK DE CALIFICACIÓN IA"))
+        self.stdout.write(f"Proveedor: {options['provider']} | Entregas: {submissions} | Concurrencia: {concurrency}")
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                timings = list(pool.map(grade, range(submissions)))
+        finally:
+            if options["provider"] == "fake":
+                set_provider(None)
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(t for t, _ in timings)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(f"Tiempo total: {elapsed:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"Throughput: {submissions / elapsed:.1f} entregas/s"))
+        self.stdout.write(f"Latencia media: {statistics.mean(latencies) * 1000:.0f} ms | p95: {p95 * 1000:.0f} ms")
@@ -0,0 +1,96 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.ai_service import extract_text_from_file
+from courses.extraction_pool import ExtractionFailed
+
+LINE = "El estudiante explica paso a paso la solución del ejercicio de álgebra lineal. "
+
+
+def build_sample_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """A text PDF with `pages` pages, built with pypdf only"""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    # Helvetica's standard encoding has no accents; keep the sample ASCII
+    text = LINE.encode("ascii", "replace").decode().replace("?", "a")
+    for number in range(pages):
+        page = writer.add_blank_page(612, 792)
+        commands = ["BT /F1 9 Tf 40 760 Td 11 TL"]
+        commands += [f"({text}{number}) Tj T*" for _ in range(lines_per_page)]
+        commands.append("ET")
+        stream = DecodedStreamObject()
+        stream.set_data("\n".join(commands).encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def build_sample_docx(paragraphs: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for number in range(paragraphs):
+        document.add_paragraph(f"{LINE}{number}")
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Benchmark submission text extraction on large generated PDF/DOCX documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=200, help="Pages of the sample PDF")
+        parser.add_argument("--paragraphs", type=int, default=5000, help="Paragraphs of the sample DOCX")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+
+    def measure(self, content, name, repeat, **limits):
+        best, text = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            try:
+                text = extract_text_from_file(io.BytesIO(content), name, **limits)
+            except ExtractionFailed:
+                text = None
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, text
+
+    def handle(self, *args, **options):
+        if min(options["pages"], options["paragraphs"], options["repeat"]) < 1:
+            raise CommandError("--pages, --paragraphs y --repeat deben ser mayores que 0")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("BENCHMARK DE EXTRACCIÓN DE TEXTO"))
+        samples = [
+            ("entrega.pdf", build_sample_pdf(options["pages"]), f"{options['pages']} páginas",
+             {"max_pages": 10**9}),
+            ("entrega.docx", build_sample_docx(options["paragraphs"]), f"{options['paragraphs']} párrafos",
+             {"max_paragraphs": 10**9}),
+        ]
+        for name, content, size, unbounded in samples:
+            # "Completo" reproduces the old behaviour: parse the whole document
+            full, full_text = self.measure(
+                content, name, options["repeat"], max_chars=10**9, cpu_seconds=10**6, **unbounded
+            )
+            bounded, text = self.measure(content, name, options["repeat"])
+            self.stdout.write(f"{name} ({size}, {len(content) / 1024:.0f} KB)")
+            self.stdout.write(f"   Completo:  {full * 1000:8.1f} ms ({len(full_text)} caracteres)")
+            self.stdout.write(
+                self.style.SUCCESS(f"   Acotado:   {bounded * 1000:8.1f} ms ({len(text)} caracteres)")
+                + f"  x{full / bounded:.0f}"
+            )
+            if full_text.strip()[:len(text)] != text:
+                self.stdout.write(self.style.WARNING("   El texto acotado no coincide con el inicio del completo"))
@@ -1,9 +1,213 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from courses.models import Subject, Exercise, Enrollment, StudentExerciseResult
-from accounts.models import User
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import defaultdict
+from contextlib import nullcontext
+from itertools import islice
 import csv
 import os
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from courses.models import Subject, Exercise, Enrollment, EnrollmentStats, StudentExerciseResult
+from courses.signals import bulk_changes, record_result_saved
+from accounts.models import User
+
+REQUIRED_HEADERS = ["email", "subject_code", "exercise_name", "status"]
+VALID_STATUSES = ["GREEN", "YELLOW", "RED"]
+
+
+def validate_status(status):
+    """Validate status value"""
+    status_upper = (status or "").strip().upper()
+    if status_upper not in VALID_STATUSES:
+        raise ValueError(f"Status inválido: {status}. Debe ser GREEN, YELLOW o RED")
+    return status_upper
+
+
+def new_stats():
+    return {"total": 0, "created": 0, "updated": 0, "errors": 0, "skipped": 0, "exercises": 0}
+
+
+class ResultImporter:
+    """
+    Imports (line_num, row) pairs chunk by chunk. Subjects, users, enrollments
+    and exercises are resolved with one bulk query per chunk and cached for
+    the lifetime of the importer; results are written with bulk_create /
+    bulk_update, each chunk in its own transaction, and notifications are
+    coalesced per student and subject within each chunk.
+    """
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.subjects = {}     # code -> Subject | None
+        self.users = {}        # email -> User | None
+        self.enrollments = {}  # (user_id, subject_id) -> Enrollment | None
+        self.exercises = {}    # subject_id -> {name: Exercise}
+        self.stats = new_stats()
+        self.errors = []
+
+    def run(self, rows, chunk_size, progress=None):
+        """Import all rows, calling progress(rows_done) after each chunk."""
+        rows = iter(rows)
+        # Each chunk commits on its own, with its stats and notifications. A
+        # dry run keeps everything in one transaction that is rolled back,
+        # so objects cached by earlier chunks stay valid for later ones.
+        with transaction.atomic() if self.dry_run else nullcontext():
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                with transaction.atomic(), bulk_changes():
+                    self.import_chunk(chunk)
+                if progress:
+                    progress(self.stats["total"])
+            if self.dry_run:
+                transaction.set_rollback(True)
+        return self.stats, self.errors
+
+    def error(self, line_num, message, row):
+        self.stats["errors"] += 1
+        self.errors.append(f"Línea {line_num}: {message} | Datos: {row}")
+
+    def _prefetch(self, parsed):
+        codes = {code for _, _, _, code, _, _ in parsed} - set(self.subjects)
+        if codes:
+            found = {s.code: s for s in Subject.objects.filter(code__in=codes).select_related("teacher")}
+            for code in codes:
+                self.subjects[code] = found.get(code)
+            subject_ids = [s.pk for s in found.values()]
+            for subject_id in subject_ids:
+                self.exercises[subject_id] = {}
+            for exercise in Exercise.objects.filter(subject_id__in=subject_ids):
+                self.exercises[exercise.subject_id][exercise.name] = exercise
+
+        emails = {email for _, _, email, _, _, _ in parsed} - set(self.users)
+        if emails:
+            found = {u.email.lower(): u for u in User.objects.filter(email__in=emails)}
+            for email in emails:
+                self.users[email] = found.get(email)
+
+        pairs = set()
+        for _, _, email, code, _, _ in parsed:
+            user, subject = self.users.get(email), self.subjects.get(code)
+            if user and subject and (user.pk, subject.pk) not in self.enrollments:
+                pairs.add((user.pk, subject.pk))
+        if pairs:
+            found = {
+                (e.student_id, e.subject_id): e
+                for e in Enrollment.objects.filter(
+                    student_id__in={u for u, _ in pairs},
+                    subject_id__in={s for _, s in pairs},
+                )
+            }
+            for pair in pairs:
+                self.enrollments[pair] = found.get(pair)
+
+    def import_chunk(self, chunk):
+        parsed = []
+        for line_num, row in chunk:
+            self.stats["total"] += 1
+            try:
+                parsed.append((
+                    line_num,
+                    row,
+                    row["email"].strip().lower(),
+                    row["subject_code"].strip().upper(),
+                    row["exercise_name"].strip(),
+                    validate_status(row["status"]),
+                ))
+            except Exception as e:
+                self.error(line_num, str(e), row)
+
+        self._prefetch(parsed)
+
+        matched = []
+        for line_num, row, email, code, exercise_name, status in parsed:
+            user = self.users.get(email)
+            subject = self.subjects.get(code)
+            if user is None:
+                self.error(line_num, f"Usuario no encontrado: {email}", row)
+                continue
+            if subject is None:
+                self.error(line_num, f"Materia no encontrada: {code}", row)
+                continue
+            enrollment = self.enrollments.get((user.pk, subject.pk))
+            if enrollment is None:
+                self.error(line_num, f"El estudiante {email} no está inscrito en {code}", row)
+                continue
+            enrollment.student = user
+            enrollment.subject = subject
+
+            subject_exercises = self.exercises[subject.pk]
+            exercise = subject_exercises.get(exercise_name)
+            if exercise is None:
+                exercise = Exercise.objects.create(
+                    subject=subject, name=exercise_name, order=len(subject_exercises) + 1
+                )
+                subject_exercises[exercise_name] = exercise
+                self.stats["exercises"] += 1
+            matched.append((enrollment, exercise, status))
+
+        if not matched:
+            return
+
+        stored = {
+            (r.enrollment_id, r.exercise_id): r
+            for r in StudentExerciseResult.objects.filter(
+                enrollment_id__in={e.pk for e, _, _ in matched},
+                exercise_id__in={x.pk for _, x, _ in matched},
+            ).only("id", "enrollment_id", "exercise_id", "status")
+        }
+
+        to_create, to_update = {}, {}
+        now = timezone.now()
+        for enrollment, exercise, status in matched:
+            key = (enrollment.pk, exercise.pk)
+            if key in to_create:
+                to_create[key].status = status
+                self.stats["updated"] += 1
+                continue
+            result = stored.get(key)
+            if result is None:
+                to_create[key] = StudentExerciseResult(
+                    enrollment=enrollment, exercise=exercise, status=status
+                )
+                self.stats["created"] += 1
+            elif result.status == status and key not in to_update:
+                self.stats["skipped"] += 1
+            else:
+                result.enrollment = enrollment
+                result.exercise = exercise
+                result.status = status
+                result.updated_at = now
+                to_update[key] = result
+                self.stats["updated"] += 1
+
+        StudentExerciseResult.objects.bulk_create(to_create.values())
+        StudentExerciseResult.objects.bulk_update(to_update.values(), ["status", "updated_at"])
+        EnrollmentStats.rebuild(enrollment_ids={k[0] for k in list(to_create) + list(to_update)})
+
+        for result in to_create.values():
+            record_result_saved(result, created=True)
+        for result in to_update.values():
+            record_result_saved(result, created=False)
+
+
+def _init_worker():
+    django.setup()
+    # Never reuse a connection inherited from the parent process
+    connections.close_all()
+
+
+def _import_partition(rows, chunk_size, dry_run):
+    importer = ResultImporter(dry_run=dry_run)
+    try:
+        return importer.run(rows, chunk_size)
+    finally:
+        connections.close_all()
 
 
 class Command(BaseCommand):
@@ -11,17 +215,42 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("csv_file", type=str, help="Path to the CSV file")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Partition the file by subject_code and import partitions in N processes",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and import everything, then roll back",
+        )
 
     def validate_status(self, status):
         """Validate status value"""
-        valid_statuses = ["GREEN", "YELLOW", "RED"]
-        status_upper = status.strip().upper()
-        if status_upper not in valid_statuses:
-            raise ValueError(f"Status inválido: {status}. Debe ser GREEN, YELLOW o RED")
-        return status_upper
+        return validate_status(status)
 
     def handle(self, *args, **options):
         csv_file_path = options["csv_file"]
+        chunk_size = options["chunk_size"]
+        workers = options["workers"]
+        dry_run = options["dry_run"]
+
+        if chunk_size < 1 or workers < 1:
+            raise CommandError("--chunk-size y --workers deben ser mayores que 0")
+
+        if workers > 1 and connections["default"].vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING("SQLite no admite escrituras concurrentes; se usará un solo proceso\n")
+            )
+            workers = 1
 
         if not os.path.exists(csv_file_path):
             self.stdout.write(
@@ -33,120 +262,82 @@ class Command(BaseCommand):
             self.style.MIGRATE_HEADING("IMPORTACIÓN DE RESULTADOS DE ESTUDIANTES")
         )
         self.stdout.write(f"Archivo: {csv_file_path}\n")
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Modo simulación: no se guardará ningún cambio\n"))
 
-        stats = {"total": 0, "created": 0, "updated": 0, "errors": 0, "skipped": 0}
-
-        errors_detail = []
-
+        self.started = time.monotonic()
         try:
             with open(csv_file_path, "r", encoding="utf-8-sig") as file:
                 reader = csv.DictReader(file)
 
                 # Validate headers
-                required_headers = ["email", "subject_code", "exercise_name", "status"]
-                if not all(header in reader.fieldnames for header in required_headers):
+                if not all(header in (reader.fieldnames or []) for header in REQUIRED_HEADERS):
                     self.stdout.write(
                         self.style.ERROR(
-                            f"Error: El archivo debe tener las columnas: {', '.join(required_headers)}"
+                            f"Error: El archivo debe tener las columnas: {', '.join(REQUIRED_HEADERS)}"
                         )
                     )
                     self.stdout.write(
-                        f"Columnas encontradas: {', '.join(reader.fieldnames)}"
+                        f"Columnas encontradas: {', '.join(reader.fieldnames or [])}"
                     )
                     return
 
                 self.stdout.write("Procesando resultados...\n")
-
-                for line_num, row in enumerate(reader, start=2):
-                    stats["total"] += 1
-
-                    try:
-                        email = row["email"].strip().lower()
-                        subject_code = row["subject_code"].strip().upper()
-                        exercise_name = row["exercise_name"].strip()
-                        status = self.validate_status(row["status"])
-
-                        with transaction.atomic():
-                            try:
-                                user = User.objects.get(email=email)
-                            except User.DoesNotExist:
-                                raise ValueError(f"Usuario no encontrado: {email}")
-
-                            try:
-                                subject = Subject.objects.get(code=subject_code)
-                            except Subject.DoesNotExist:
-                                raise ValueError(
-                                    f"Materia no encontrada: {subject_code}"
-                                )
-
-                            try:
-                                enrollment = Enrollment.objects.get(
-                                    student=user, subject=subject
-                                )
-                            except Enrollment.DoesNotExist:
-                                raise ValueError(
-                                    f"El estudiante {email} no está inscrito en {subject_code}"
-                                )
-
-                            exercise, ex_created = Exercise.objects.get_or_create(
-                                subject=subject,
-                                name=exercise_name,
-                                defaults={
-                                    "order": Exercise.objects.filter(
-                                        subject=subject
-                                    ).count()
-                                    + 1
-                                },
-                            )
-
-                            if ex_created:
-                                self.stdout.write(
-                                    f"   ➕ Ejercicio creado: {exercise_name}"
-                                )
-
-                            result, created = (
-                                StudentExerciseResult.objects.update_or_create(
-                                    enrollment=enrollment,
-                                    exercise=exercise,
-                                    defaults={"status": status},
-                                )
-                            )
-
-                            status_emoji = {
-                                "GREEN": "🟢",
-                                "YELLOW": "🟡",
-                                "RED": "🔴",
-                            }.get(status, "⚪")
-                            if created:
-                                stats["created"] += 1
-                                self.stdout.write(
-                                    self.style.SUCCESS(
-                                        f"   ✅ Línea {line_num}: {email} | {subject_code} | {exercise_name} {status_emoji}"
-                                    )
-                                )
-                            else:
-                                stats["updated"] += 1
-                                self.stdout.write(
-                                    f"   🔄 Línea {line_num}: {email} | {subject_code} | {exercise_name} {status_emoji} (actualizado)"
-                                )
-
-                    except Exception as e:
-                        stats["errors"] += 1
-                        error_msg = f"Línea {line_num}: {str(e)} | Datos: {row}"
-                        errors_detail.append(error_msg)
-                        self.stdout.write(self.style.ERROR(f"   ❌ {error_msg}"))
+                rows = enumerate(reader, start=2)
+                if workers > 1:
+                    stats, errors_detail = self.import_parallel(rows, chunk_size, workers, dry_run)
+                else:
+                    importer = ResultImporter(dry_run=dry_run)
+                    stats, errors_detail = importer.run(rows, chunk_size, progress=self.report_progress)
 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error al leer el archivo: {e}"))
             return
 
+        elapsed = time.monotonic() - self.started
         self.stdout.write(self.style.MIGRATE_HEADING("RESUMEN DE IMPORTACIÓN"))
         self.stdout.write(f"Total de filas procesadas: {stats['total']}")
         self.stdout.write(self.style.SUCCESS(f"Resultados creados: {stats['created']}"))
         self.stdout.write(f"Resultados actualizados: {stats['updated']}")
+        self.stdout.write(f"Resultados sin cambios: {stats['skipped']}")
+        self.stdout.write(f"Ejercicios creados: {stats['exercises']}")
         self.stdout.write(self.style.ERROR(f"Errores: {stats['errors']}"))
+        self.stdout.write(f"Tiempo: {elapsed:.1f}s ({self.rate(stats['total']):.0f} filas/s)")
 
         if stats["errors"] > 0:
             self.stdout.write("\nDetalles de errores:")
             for error in errors_detail:
                 self.stdout.write(f"   - {error}")
+
+    def rate(self, rows_done):
+        elapsed = time.monotonic() - self.started
+        return rows_done / elapsed if elapsed > 0 else 0.0
+
+    def report_progress(self, rows_done):
+        self.stdout.write(f"   {rows_done} filas procesadas ({self.rate(rows_done):.0f} filas/s)")
+
+    def import_parallel(self, rows, chunk_size, workers, dry_run):
+        """Partition rows by subject_code and import each partition in a process pool"""
+        partitions = defaultdict(list)
+        for line_num, row in rows:
+            code = (row.get("subject_code") or "").strip().upper()
+            partitions[code].append((line_num, row))
+
+        stats, errors = new_stats(), []
+        # Forked workers must not share the parent's DB connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(_import_partition, partition, chunk_size, dry_run): code
+                for code, partition in partitions.items()
+            }
+            for future in as_completed(futures):
+                part_stats, part_errors = future.result()
+                for key, value in part_stats.items():
+                    stats[key] += value
+                errors.extend(part_errors)
+                self.stdout.write(
+                    f"   {futures[future] or '(sin materia)'}: {part_stats['total']} filas"
+                )
+                self.report_progress(stats["total"])
+        return stats, errors
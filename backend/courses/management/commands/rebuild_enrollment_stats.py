@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from courses.models import Subject, Enrollment, EnrollmentStats
+
+
+class Command(BaseCommand):
+    help = "Recompute materialized enrollment stats from student results"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subject",
+            type=str,
+            help="Only rebuild enrollments of this subject code",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per upsert batch (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        subject_code = options.get("subject")
+        batch_size = options["batch_size"]
+
+        enrollment_ids = None
+        if subject_code:
+            subject = Subject.objects.filter(code=subject_code.strip().upper()).first()
+            if not subject:
+                self.stdout.write(
+                    self.style.ERROR(f"Error: Materia no encontrada: {subject_code}")
+                )
+                return
+            enrollment_ids = Enrollment.objects.filter(subject=subject).values_list(
+                "pk", flat=True
+            )
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING("RECONSTRUCCIÓN DE ESTADÍSTICAS DE INSCRIPCIONES")
+        )
+
+        with transaction.atomic():
+            written = EnrollmentStats.rebuild(
+                enrollment_ids=enrollment_ids, batch_size=batch_size
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Estadísticas recalculadas: {written}")
+        )
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def compute_grade(total, green, yellow):
+    """Frozen copy of courses.models.compute_grade as of this migration"""
+    grade = 0.0
+    semaphore = 'RED'
+    if total > 0:
+        if green == total:
+            grade = 5.0
+        elif yellow / total >= 0.6:
+            grade = 3.0
+        else:
+            grade = round(5.0 * (green / total), 2)
+
+        if green == total or grade >= 4.5:
+            semaphore = 'GREEN'
+        elif yellow / total >= 0.6 or grade >= 3.0:
+            semaphore = 'YELLOW'
+        else:
+            semaphore = 'RED'
+    return grade, semaphore
+
+
+def populate_enrollment_stats(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    EnrollmentStats = apps.get_model('courses', 'EnrollmentStats')
+    rows = Enrollment.objects.order_by().annotate(
+        n_total=Count('results'),
+        n_green=Count('results', filter=Q(results__status='GREEN')),
+        n_yellow=Count('results', filter=Q(results__status='YELLOW')),
+        n_red=Count('results', filter=Q(results__status='RED')),
+        n_submitted=Count('results', filter=Q(results__status='SUBMITTED')),
+    ).values_list('pk', 'n_total', 'n_green', 'n_yellow', 'n_red', 'n_submitted')
+
+    batch = []
+    for pk, total, green, yellow, red, submitted in rows.iterator(chunk_size=1000):
+        grade, semaphore = compute_grade(total, green, yellow)
+        batch.append(EnrollmentStats(
+            enrollment_id=pk, total=total, green=green, yellow=yellow, red=red,
+            submitted=submitted, grade=grade, semaphore=semaphore,
+        ))
+        if len(batch) >= 1000:
+            EnrollmentStats.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        EnrollmentStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_calendarevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('green', models.PositiveIntegerField(default=0)),
+                ('yellow', models.PositiveIntegerField(default=0)),
+                ('red', models.PositiveIntegerField(default=0)),
+                ('submitted', models.PositiveIntegerField(default=0)),
+                ('grade', models.FloatField(default=0.0)),
+                ('semaphore', models.CharField(default='RED', max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='grade_stats', to='courses.enrollment')),
+            ],
+        ),
+        migrations.RunPython(populate_enrollment_stats, migrations.RunPython.noop),
+    ]
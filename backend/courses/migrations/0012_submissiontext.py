@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_airesponsecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField(blank=True, help_text='Vacío si no se pudo extraer texto', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentexerciseresult',
+            name='submission_sha256',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 del archivo entregado (clave de SubmissionText)', max_length=64),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 04:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_submissiontext'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['subject', '-created_at', '-id'], name='courses_cal_subject_bfcc0c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['subject', '-created_at', '-id'], name='courses_enr_subject_51da9b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentexerciseresult',
+            index=models.Index(fields=['-created_at', '-id'], name='courses_stu_created_35481c_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='calendarevent',
+            name='courses_cal_subject_bfcc0c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='enrollment',
+            name='courses_enr_subject_51da9b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['subject', 'start_time', 'id'], name='courses_cal_subject_4ebcc5_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from django.db import models
+from django.db import connection, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
@@ -45,36 +45,186 @@ class Enrollment(models.Model):
         green = qs.filter(status=StudentExerciseResult.Status.GREEN).count()
         yellow = qs.filter(status=StudentExerciseResult.Status.YELLOW).count()
         red = qs.filter(status=StudentExerciseResult.Status.RED).count()
-        grade = 0.0
-        semaphore = 'RED'
-        if total > 0:
-            if green == total:
-                grade = 5.0
-            elif yellow / total >= 0.6:
-                grade = 3.0
-            else:
-                grade = round(5.0 * (green / total), 2)
-
-            if green == total or grade >= 4.5:
-                semaphore = 'GREEN'
-            elif yellow / total >= 0.6 or grade >= 3.0:
-                semaphore = 'YELLOW'
-            else:
-                semaphore = 'RED'
-
-        return {
-            'total_exercises': total,
-            'green_count': green,
-            'yellow_count': yellow,
-            'red_count': red,
-            'grade': grade,
-            'semaphore': semaphore,
-            # Keep old keys for backwards compatibility
-            'total': total,
-            'green': green,
-            'yellow': yellow,
-            'red': red,
-        }
+        return stats_from_counts(total, green, yellow, red)
+
+    def stored_stats(self) -> dict:
+        """
+        Return the materialized stats row for this enrollment.
+        Falls back to rebuilding the row if it does not exist yet.
+        """
+        try:
+            row = self.grade_stats
+        except EnrollmentStats.DoesNotExist:
+            EnrollmentStats.rebuild(enrollment_ids=[self.pk])
+            row = EnrollmentStats.objects.get(enrollment_id=self.pk)
+            self.grade_stats = row
+        return row.as_dict()
+
+
+def compute_grade(total: int, green: int, yellow: int) -> tuple[float, str]:
+    """Apply the grading rules to raw status counts and return (grade, semaphore)."""
+    grade = 0.0
+    semaphore = 'RED'
+    if total > 0:
+        if green == total:
+            grade = 5.0
+        elif yellow / total >= 0.6:
+            grade = 3.0
+        else:
+            grade = round(5.0 * (green / total), 2)
+
+        if green == total or grade >= 4.5:
+            semaphore = 'GREEN'
+        elif yellow / total >= 0.6 or grade >= 3.0:
+            semaphore = 'YELLOW'
+        else:
+            semaphore = 'RED'
+    return grade, semaphore
+
+
+def build_stats_dict(total: int, green: int, yellow: int, red: int, grade: float, semaphore: str) -> dict:
+    return {
+        'total_exercises': total,
+        'green_count': green,
+        'yellow_count': yellow,
+        'red_count': red,
+        'grade': grade,
+        'semaphore': semaphore,
+        # Keep old keys for backwards compatibility
+        'total': total,
+        'green': green,
+        'yellow': yellow,
+        'red': red,
+    }
+
+
+def with_result_counts(enrollments):
+    """
+    Annotate an Enrollment queryset with per-status result counts
+    (n_total, n_green, n_yellow, n_red, n_submitted) in a single grouped query.
+    """
+    Status = StudentExerciseResult.Status
+    return enrollments.annotate(
+        n_total=models.Count('results'),
+        n_green=models.Count('results', filter=models.Q(results__status=Status.GREEN)),
+        n_yellow=models.Count('results', filter=models.Q(results__status=Status.YELLOW)),
+        n_red=models.Count('results', filter=models.Q(results__status=Status.RED)),
+        n_submitted=models.Count('results', filter=models.Q(results__status=Status.SUBMITTED)),
+    )
+
+
+def stats_from_counts(total: int, green: int, yellow: int, red: int) -> dict:
+    """Build the stats dict for raw counts, e.g. from `with_result_counts`."""
+    grade, semaphore = compute_grade(total, green, yellow)
+    return build_stats_dict(total, green, yellow, red, grade, semaphore)
+
+
+class EnrollmentStats(models.Model):
+    """
+    Materialized grade statistics for an enrollment.
+    Kept up to date incrementally by the StudentExerciseResult signals and
+    rebuilt in bulk with the `rebuild_enrollment_stats` management command.
+    """
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='grade_stats')
+    total = models.PositiveIntegerField(default=0)
+    green = models.PositiveIntegerField(default=0)
+    yellow = models.PositiveIntegerField(default=0)
+    red = models.PositiveIntegerField(default=0)
+    submitted = models.PositiveIntegerField(default=0)
+    grade = models.FloatField(default=0.0)
+    semaphore = models.CharField(max_length=10, default='RED')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STATUS_FIELDS = {
+        'GREEN': 'green',
+        'YELLOW': 'yellow',
+        'RED': 'red',
+        'SUBMITTED': 'submitted',
+    }
+
+    def __str__(self) -> str:
+        return f"Stats for enrollment {self.enrollment_id}: {self.grade} ({self.semaphore})"
+
+    def as_dict(self) -> dict:
+        data = build_stats_dict(self.total, self.green, self.yellow, self.red, self.grade, self.semaphore)
+        data['submitted_count'] = self.submitted
+        return data
+
+    def refresh_grade(self):
+        self.grade, self.semaphore = compute_grade(self.total, self.green, self.yellow)
+
+    def _bump(self, status, amount: int):
+        if not status:
+            return
+        self.total = max(self.total + amount, 0)
+        field = self.STATUS_FIELDS.get(status)
+        if field:
+            setattr(self, field, max(getattr(self, field) + amount, 0))
+
+    @classmethod
+    def apply_delta(cls, enrollment_id: int, old_status: str | None, new_status: str | None):
+        """
+        Move one result from `old_status` to `new_status` (None meaning absent).
+        Missing rows are left alone; `Enrollment.stored_stats()` rebuilds them on read.
+        """
+        if old_status == new_status:
+            return
+        with transaction.atomic():
+            row = cls.objects.select_for_update().filter(enrollment_id=enrollment_id).first()
+            if row is None:
+                return
+            row._bump(old_status, -1)
+            row._bump(new_status, 1)
+            row.refresh_grade()
+            row.save()
+
+    @classmethod
+    def rebuild(cls, enrollment_ids=None, batch_size: int = 1000) -> int:
+        """
+        Recompute stats rows from StudentExerciseResult with one grouped query
+        and upsert them in batches. Returns the number of rows written.
+        """
+        enrollments = Enrollment.objects.order_by()
+        if enrollment_ids is not None:
+            enrollments = enrollments.filter(pk__in=list(enrollment_ids))
+        rows = with_result_counts(enrollments).values_list(
+            'pk', 'n_total', 'n_green', 'n_yellow', 'n_red', 'n_submitted'
+        )
+
+        written = 0
+        batch = []
+        for pk, total, green, yellow, red, submitted in rows.iterator(chunk_size=batch_size):
+            row = cls(
+                enrollment_id=pk,
+                total=total,
+                green=green,
+                yellow=yellow,
+                red=red,
+                submitted=submitted,
+                updated_at=timezone.now(),
+            )
+            row.refresh_grade()
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written += cls._upsert(batch)
+                batch = []
+        if batch:
+            written += cls._upsert(batch)
+        return written
+
+    @classmethod
+    def _upsert(cls, batch) -> int:
+        # MySQL upserts on any unique key and rejects an explicit conflict target
+        unique_fields = ['enrollment'] if connection.features.supports_update_conflicts_with_target else None
+        cls.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['total', 'green', 'yellow', 'red', 'submitted', 'grade', 'semaphore', 'updated_at'],
+        )
+        return len(batch)
+
+
 class Exercise(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='exercises')
     name = models.CharField(max_length=200)
@@ -145,6 +295,12 @@ class StudentExerciseResult(models.Model):
         null=True, 
         help_text="Solución en texto (máx 5000 caracteres)"
     )
+    submission_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="SHA-256 del archivo entregado (clave de SubmissionText)"
+    )
     comment = models.TextField(blank=True, null=True, help_text="Comentarios o retroalimentación del profesor")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -153,11 +309,33 @@ class StudentExerciseResult(models.Model):
         unique_together = ('enrollment', 'exercise')
         indexes = [
             models.Index(fields=['enrollment', 'exercise']),
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self) -> str:
         return f"{self.enrollment.student.email} - {self.exercise.name}: {self.status}"
 
+    def _lock_stored_status(self) -> str | None:
+        """Status currently in the database, with the row locked until the transaction ends"""
+        return type(self).objects.select_for_update().filter(pk=self.pk).values_list('status', flat=True).first()
+
+    def save(self, *args, **kwargs):
+        # The stats signals apply a delta from the status being replaced. Read
+        # it under a row lock rather than trusting the one loaded into this
+        # instance, so two concurrent saves cannot both start from it.
+        with transaction.atomic():
+            if self.pk is not None:
+                self._stats_status = self._lock_stored_status()
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._stats_status = self._lock_stored_status()
+            if self._stats_status is None:
+                # Already deleted elsewhere; its stats were updated then
+                return 0, {}
+            return super().delete(*args, **kwargs)
+
 
 class CalendarEvent(models.Model):
     class EventType(models.TextChoices):
@@ -175,6 +353,9 @@ class CalendarEvent(models.Model):
 
     class Meta:
         ordering = ['start_time']
+        indexes = [
+            models.Index(fields=['subject', 'start_time', 'id']),
+        ]
 
     def __str__(self) -> str:
         return f"{self.subject.code} - {self.title}"
@@ -210,3 +391,48 @@ class Notification(models.Model):
 
     def __str__(self) -> str:
         return f"{self.user.email} - {self.title} ({'Leída' if self.is_read else 'No leída'})"
+
+
+class AIResponseCache(models.Model):
+    """
+    Model responses keyed by a SHA-256 of the normalized prompt inputs, so an
+    identical grading or feedback request is answered without an API call.
+    See `courses.ai_cache`.
+    """
+    class Kind(models.TextChoices):
+        FEEDBACK = 'FEEDBACK', 'Retroalimentación'
+        GRADING = 'GRADING', 'Calificación'
+
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    response = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.key[:12]} ({self.hits} hits)"
+
+
+class AICacheCounter(models.Model):
+    """Hit/miss counters of the AI response cache, one row per kind"""
+    kind = models.CharField(max_length=10, choices=AIResponseCache.Kind.choices, unique=True)
+    hits = models.PositiveBigIntegerField(default=0)
+    misses = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {self.hits} hits / {self.misses} misses"
+
+
+class SubmissionText(models.Model):
+    """
+    Text extracted from a submission file, stored once per distinct file
+    content (SHA-256) so AI grading and feedback never re-parse a document.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    text = models.TextField(null=True, blank=True, help_text="Vacío si no se pudo extraer texto")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]} ({len(self.text or '')} caracteres)"
@@ -3,78 +3,160 @@ import csv
 import io
 from typing import Dict, List, Any, Tuple
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import QuerySet
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
-from .models import Subject, Enrollment, Exercise, StudentExerciseResult
+from notifications import outbox
+from .models import Subject, Enrollment, EnrollmentStats, Exercise, StudentExerciseResult
+from .signals import (
+    bulk_changes,
+    get_or_create_demo_subject,
+    record_result_saved,
+)
 
 User = get_user_model()
 
+# Rows per INSERT/UPDATE statement for bulk writes
+BULK_BATCH_SIZE = 1000
+
+ENROLLMENTS_CSV_COLUMNS = {"email"}
+ENROLLMENTS_CSV_ERROR = "CSV inválido. Debe tener columnas: email, (opcional) first_name, last_name."
+RESULTS_CSV_COLUMNS = {"student_email", "exercise_name", "status"}
+RESULTS_CSV_ERROR = "CSV inválido. Debe tener columnas: student_email, exercise_name, status."
+
+
+def read_csv(file_obj, required: set, error: str) -> csv.DictReader:
+    """Decode an uploaded CSV and check that it has the required columns"""
+    decoded = file_obj.read().decode("utf-8", errors="ignore")
+    reader = csv.DictReader(io.StringIO(decoded))
+
+    fieldnames = [c.strip().lower() for c in (reader.fieldnames or [])]
+    if not required.issubset(set(fieldnames)):
+        raise ValidationError({"detail": error})
+    return reader
+
 
 def process_enrollments_csv(subject: Subject, file_obj) -> Dict[str, Any]:
     """
     Process CSV file to enroll students in a subject.
     CSV format: email, [first_name], [last_name]
-    """
-    decoded = file_obj.read().decode("utf-8", errors="ignore")
-    reader = csv.DictReader(io.StringIO(decoded))
 
-    required_cols = {"email"}
-    fieldnames = [c.strip().lower() for c in (reader.fieldnames or [])]
-    if not required_cols.issubset(set(fieldnames)):
-        raise ValidationError(
-            {
-                "detail": "CSV inválido. Debe tener columnas: email, (opcional) first_name, last_name."
-            }
-        )
+    The import is set-based: all emails are resolved with one lookup, missing
+    users and enrollments are bulk created, changed names are bulk updated and
+    the notifications are coalesced per recipient, all inside a single
+    transaction. Per-row model signals are not fired.
+    """
+    reader = read_csv(file_obj, ENROLLMENTS_CSV_COLUMNS, ENROLLMENTS_CSV_ERROR)
 
     created, existed, errors = 0, 0, []
 
+    # 1. Parse: keep row order, later non-empty names win for repeated emails
+    emails: List[str] = []
+    names: Dict[str, Dict[str, str]] = {}
     for i, row in enumerate(reader, start=2):
         email = (row.get("email") or "").strip().lower()
         if not email:
             errors.append({"row": i, "error": "Email vacío"})
             continue
 
-        first_name = (row.get("first_name") or "").strip()
-        last_name = (row.get("last_name") or "").strip()
-
-        # Create or verify user exists
-        student, _ = User.objects.get_or_create(
-            email=email,
-            defaults={
-                "username": email,
-                "first_name": first_name,
-                "last_name": last_name,
-                "role": "STUDENT",
-                "is_active": True,
-            },
-        )
+        emails.append(email)
+        entry = names.setdefault(email, {"first_name": "", "last_name": ""})
+        for field in ("first_name", "last_name"):
+            value = (row.get(field) or "").strip()
+            if value:
+                entry[field] = value
 
-        # update names if provided and different
-        update_fields = []
-        if first_name and student.first_name != first_name:
-            student.first_name = first_name
-            update_fields.append("first_name")
-        if last_name and student.last_name != last_name:
-            student.last_name = last_name
-            update_fields.append("last_name")
-
-        if update_fields:
-            student.save(update_fields=update_fields)
-
-        # Create enrollment
-        _, was_created = Enrollment.objects.get_or_create(
-            subject=subject, student=student
-        )
-        if was_created:
-            created += 1
-        else:
-            existed += 1
+    if not emails:
+        return {"created": created, "existed": existed, "errors": errors}
+
+    unique_emails = list(dict.fromkeys(emails))
+
+    with transaction.atomic(), outbox.batch():
+        # 2. Resolve users, bulk create the missing ones
+        users = User.objects.in_bulk(unique_emails, field_name="email")
+        new_emails = [email for email in unique_emails if email not in users]
+        if new_emails:
+            User.objects.bulk_create(
+                [
+                    User(
+                        email=email,
+                        username=email,
+                        first_name=names[email]["first_name"],
+                        last_name=names[email]["last_name"],
+                        role="STUDENT",
+                        is_active=True,
+                    )
+                    for email in new_emails
+                ]
+            )
+            users.update(User.objects.in_bulk(new_emails, field_name="email"))
+
+        # 3. Update names if provided and different
+        changed = []
+        created_emails = set(new_emails)
+        for email, user in users.items():
+            if email in created_emails:
+                continue
+            dirty = False
+            for field in ("first_name", "last_name"):
+                value = names[email][field]
+                if value and getattr(user, field) != value:
+                    setattr(user, field, value)
+                    dirty = True
+            if dirty:
+                changed.append(user)
+        if changed:
+            User.objects.bulk_update(changed, ["first_name", "last_name"])
+
+        # 4. Enroll everyone not yet enrolled
+        students = [users[email] for email in unique_emails]
+        new_students = bulk_enroll(subject, students)
+        created = len(new_students)
+        existed = len(emails) - created
+
+        # New accounts also join the demo subject, as the User signal would do
+        if new_emails:
+            demo_subject = get_or_create_demo_subject()
+            if demo_subject and demo_subject.pk != subject.pk:
+                bulk_enroll(demo_subject, [users[email] for email in new_emails])
 
     return {"created": created, "existed": existed, "errors": errors}
 
 
+def bulk_enroll(subject: Subject, students: List) -> List:
+    """
+    Enroll the given students in `subject` with bulk inserts, skipping those
+    already enrolled. Creates the stats rows and records the notification
+    events that the Enrollment signals would. Returns the newly enrolled students.
+    """
+    enrolled_ids = set(
+        Enrollment.objects.filter(
+            subject=subject, student_id__in=[s.pk for s in students]
+        ).values_list("student_id", flat=True)
+    )
+    new_students = [s for s in students if s.pk not in enrolled_ids]
+    if not new_students:
+        return []
+
+    Enrollment.objects.bulk_create(
+        [Enrollment(subject=subject, student=s) for s in new_students]
+    )
+    new_enrollment_ids = Enrollment.objects.filter(
+        subject=subject, student_id__in=[s.pk for s in new_students]
+    ).values_list("pk", flat=True)
+    EnrollmentStats.objects.bulk_create(
+        [EnrollmentStats(enrollment_id=pk) for pk in new_enrollment_ids],
+        ignore_conflicts=True,
+    )
+
+    with outbox.batch():
+        for pk in new_enrollment_ids:
+            outbox.record('enrollment.created', enrollment_id=pk)
+    return new_students
+
+
 def normalize_result_status(val: str) -> str | None:
     """Normalize status string to Enum value"""
     v = (val or "").strip().lower()
@@ -91,26 +173,18 @@ def process_results_csv(subject: Subject, file_obj) -> Dict[str, Any]:
     """
     Process CSV file to upload student results.
     CSV format: student_email, exercise_name, status
-    """
-    decoded = file_obj.read().decode("utf-8", errors="ignore")
-    reader = csv.DictReader(io.StringIO(decoded))
 
-    required = {"student_email", "exercise_name", "status"}
-    fieldnames = [c.strip().lower() for c in (reader.fieldnames or [])]
-    if not required.issubset(set(fieldnames)):
-        raise ValidationError(
-            {
-                "detail": "CSV inválido. Debe tener columnas: student_email, exercise_name, status."
-            }
-        )
+    Runs as a set-based pipeline: parse the whole file, prefetch enrollments
+    and stored results in a few queries, diff the file against them, then
+    write with bulk_create/bulk_update and coalesce the notifications per
+    student inside a single transaction. Rows whose status is unchanged are counted as skipped.
+    """
+    reader = read_csv(file_obj, RESULTS_CSV_COLUMNS, RESULTS_CSV_ERROR)
 
     created, updated, skipped, errors = 0, 0, 0, []
 
-    # Pre-fetch exercises to minimize DB hits
-    exercise_cache: Dict[str, Exercise] = {
-        ex.name.lower(): ex for ex in subject.exercises.all()
-    }
-
+    # 1. Parse everything
+    parsed: List[Tuple[int, str, str, str]] = []
     for i, row in enumerate(reader, start=2):
         email = (row.get("student_email") or "").strip().lower()
         ex_name = (row.get("exercise_name") or "").strip()
@@ -119,38 +193,97 @@ def process_results_csv(subject: Subject, file_obj) -> Dict[str, Any]:
         if not email or not ex_name or status_val is None:
             errors.append({"row": i, "error": "Datos inválidos en columnas requeridas"})
             continue
+        parsed.append((i, email, ex_name, status_val))
 
-        try:
-            student = User.objects.get(email=email)
-        except User.DoesNotExist:
-            errors.append({"row": i, "error": f"Estudiante no encontrado: {email}"})
-            continue
+    emails = {email for _, email, _, _ in parsed}
 
-        try:
-            enrollment = Enrollment.objects.get(subject=subject, student=student)
-        except Enrollment.DoesNotExist:
-            errors.append(
-                {"row": i, "error": f"Estudiante no inscrito en la materia: {email}"}
-            )
-            continue
+    with transaction.atomic(), bulk_changes():
+        # 2. Prefetch enrollments, exercises and stored results
+        enrollments: Dict[str, Enrollment] = {}
+        for enrollment in Enrollment.objects.filter(
+            subject=subject, student__email__in=emails
+        ).select_related("student"):
+            enrollment.subject = subject
+            enrollments[enrollment.student.email.lower()] = enrollment
 
-        # Get or create exercise
-        exercise = exercise_cache.get(ex_name.lower())
-        if not exercise:
-            exercise = Exercise.objects.create(
-                subject=subject, name=ex_name, order=subject.exercises.count()
-            )
-            exercise_cache[ex_name.lower()] = exercise
+        missing = emails - set(enrollments)
+        known_users = set(
+            e.lower()
+            for e in User.objects.filter(email__in=missing).values_list("email", flat=True)
+        ) if missing else set()
+
+        exercise_cache: Dict[str, Exercise] = {
+            ex.name.lower(): ex for ex in subject.exercises.all()
+        }
+
+        stored: Dict[Tuple[int, int], StudentExerciseResult] = {
+            (r.enrollment_id, r.exercise_id): r
+            for r in StudentExerciseResult.objects.filter(
+                enrollment__subject=subject
+            ).only("id", "enrollment_id", "exercise_id", "status")
+        }
 
-        # Update or create result
-        _, was_created = StudentExerciseResult.objects.update_or_create(
-            enrollment=enrollment, exercise=exercise, defaults={"status": status_val}
+        # 3. Diff the file against the stored results
+        to_create: Dict[Tuple[int, int], StudentExerciseResult] = {}
+        to_update: Dict[Tuple[int, int], StudentExerciseResult] = {}
+        now = timezone.now()
+        for i, email, ex_name, status_val in parsed:
+            enrollment = enrollments.get(email)
+            if enrollment is None:
+                if email in known_users:
+                    errors.append(
+                        {"row": i, "error": f"Estudiante no inscrito en la materia: {email}"}
+                    )
+                else:
+                    errors.append({"row": i, "error": f"Estudiante no encontrado: {email}"})
+                continue
+
+            # Get or create exercise
+            exercise = exercise_cache.get(ex_name.lower())
+            if not exercise:
+                exercise = Exercise.objects.create(
+                    subject=subject, name=ex_name, order=len(exercise_cache)
+                )
+                exercise_cache[ex_name.lower()] = exercise
+
+            key = (enrollment.pk, exercise.pk)
+            if key in to_create:
+                to_create[key].status = status_val
+                updated += 1
+                continue
+
+            result = stored.get(key)
+            if result is None:
+                to_create[key] = StudentExerciseResult(
+                    enrollment=enrollment, exercise=exercise, status=status_val
+                )
+                created += 1
+            elif result.status == status_val and key not in to_update:
+                skipped += 1
+            else:
+                result.enrollment = enrollment
+                result.exercise = exercise
+                result.status = status_val
+                result.updated_at = now
+                to_update[key] = result
+                updated += 1
+
+        # 4. Write the changes
+        StudentExerciseResult.objects.bulk_create(
+            to_create.values(), batch_size=BULK_BATCH_SIZE
+        )
+        StudentExerciseResult.objects.bulk_update(
+            to_update.values(), ["status", "updated_at"], batch_size=BULK_BATCH_SIZE
+        )
+        EnrollmentStats.rebuild(
+            enrollment_ids={key[0] for key in list(to_create) + list(to_update)}
         )
 
-        if was_created:
-            created += 1
-        else:
-            updated += 1
+        # 5. Coalesce the notifications
+        for result in to_create.values():
+            record_result_saved(result, created=True)
+        for result in to_update.values():
+            record_result_saved(result, created=False)
 
     return {
         "created": created,
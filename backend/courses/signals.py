@@ -1,43 +1,119 @@
-from django.db.models.signals import post_save
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete, post_init
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
-from .models import Enrollment, StudentExerciseResult, Exercise, Subject
+from .models import Enrollment, EnrollmentStats, StudentExerciseResult, Exercise, Subject
+from .models import Notification as CourseNotification
+from notifications import outbox, stream
 from notifications.models import Notification
 
 User = get_user_model()
 
 
+DEMO_SUBJECT_CODE = 'DEMO-101'
+
+_deferred = threading.local()
+
+
+@contextmanager
+def bulk_changes():
+    """
+    Defer the per-instance receivers of this module while many objects are
+    saved or deleted: stats rows are rebuilt once per touched enrollment,
+    new students join the demo subject in one bulk insert, and the
+    notifications are coalesced per recipient (see `notifications.outbox.batch`).
+    Use it inside the bulk operation's transaction; nested blocks join the
+    outermost one.
+    """
+    if getattr(_deferred, 'changes', None) is not None:
+        yield
+        return
+    changes = _deferred.changes = {'enrollment_ids': set(), 'demo_students': []}
+    try:
+        with outbox.batch():
+            try:
+                yield
+            finally:
+                _deferred.changes = None
+            if changes['demo_students']:
+                from .services import bulk_enroll
+                demo_subject = get_or_create_demo_subject()
+                if demo_subject:
+                    bulk_enroll(demo_subject, changes['demo_students'])
+            if changes['enrollment_ids']:
+                EnrollmentStats.rebuild(enrollment_ids=changes['enrollment_ids'])
+    finally:
+        _deferred.changes = None
+
+
+def _deferred_changes():
+    return getattr(_deferred, 'changes', None)
+
+
+def get_or_create_demo_subject():
+    """Return the demo subject, creating it (with sample exercises) if needed"""
+    demo_subject = Subject.objects.filter(code=DEMO_SUBJECT_CODE).first()
+
+    if not demo_subject:
+        # Try to find a teacher or admin to own the subject
+        teacher = User.objects.filter(role__in=['TEACHER', 'ADMIN']).first()
+        if teacher:
+            demo_subject = Subject.objects.create(
+                name='Materia de Demostración',
+                code=DEMO_SUBJECT_CODE,
+                teacher=teacher
+            )
+            # Create some demo exercises
+            Exercise.objects.create(
+                subject=demo_subject,
+                name='Ejercicio 1: Bienvenida',
+                order=1,
+                description='¡Bienvenido a DevTrack! Este es un ejercicio de ejemplo para que conozcas la plataforma.'
+            )
+            Exercise.objects.create(
+                subject=demo_subject,
+                name='Ejercicio 2: Tu primer entregable',
+                order=2,
+                description='Este es otro ejercicio de ejemplo. En una materia real, aquí verías los detalles de la tarea.'
+            )
+    return demo_subject
+
+
+def build_enrollment_notifications(subject: Subject, student) -> list:
+    """Build (unsaved) notifications for the student and teacher of a new enrollment"""
+    return [
+        # Notify student
+        Notification(
+            recipient=student,
+            type=Notification.Type.ENROLLMENT_CREATED,
+            title=f'📚 Inscrito en {subject.code}',
+            message=f'Has sido inscrito en {subject.name}. Profesor: {subject.teacher.email}',
+            link_url=f'/subjects/{subject.id}',
+        ),
+        # Notify teacher
+        Notification(
+            recipient=subject.teacher,
+            type=Notification.Type.ENROLLMENT_CREATED,
+            title=f'👥 Nuevo estudiante en {subject.code}',
+            message=f'{student.email} fue inscrito en tu materia.',
+            link_url=f'/subjects/{subject.id}',
+        ),
+    ]
+
+
 @receiver(post_save, sender=User)
 def enroll_new_student_in_demo(sender, instance, created, **kwargs):
     """Enroll new students in a demo subject automatically"""
     if created and instance.role == 'STUDENT':
-        # Find or create Demo subject
-        demo_subject = Subject.objects.filter(code='DEMO-101').first()
-        
-        if not demo_subject:
-            # Try to find a teacher or admin to own the subject
-            teacher = User.objects.filter(role__in=['TEACHER', 'ADMIN']).first()
-            if teacher:
-                demo_subject = Subject.objects.create(
-                    name='Materia de Demostración',
-                    code='DEMO-101',
-                    teacher=teacher
-                )
-                # Create some demo exercises
-                Exercise.objects.create(
-                    subject=demo_subject,
-                    name='Ejercicio 1: Bienvenida',
-                    order=1,
-                    description='¡Bienvenido a DevTrack! Este es un ejercicio de ejemplo para que conozcas la plataforma.'
-                )
-                Exercise.objects.create(
-                    subject=demo_subject,
-                    name='Ejercicio 2: Tu primer entregable',
-                    order=2,
-                    description='Este es otro ejercicio de ejemplo. En una materia real, aquí verías los detalles de la tarea.'
-                )
-        
+        deferred = _deferred_changes()
+        if deferred is not None:
+            deferred['demo_students'].append(instance)
+            return
+        demo_subject = get_or_create_demo_subject()
         if demo_subject:
             Enrollment.objects.get_or_create(
                 student=instance,
@@ -45,104 +121,323 @@ def enroll_new_student_in_demo(sender, instance, created, **kwargs):
             )
 
 
+@outbox.expander('enrollment.created')
+def expand_enrollment_created(payload) -> list:
+    enrollment = Enrollment.objects.select_related('subject__teacher', 'student').filter(pk=payload['enrollment_id']).first()
+    if enrollment is None:
+        return []
+    return build_enrollment_notifications(enrollment.subject, enrollment.student)
+
+
+@outbox.summarizer('enrollment.created')
+def summarize_enrollments_created(payloads) -> list:
+    """One notification per student and one per teacher and subject"""
+    enrollments = (
+        Enrollment.objects.select_related('subject__teacher', 'student')
+        .filter(pk__in=[p['enrollment_id'] for p in payloads])
+        .order_by('subject_id', 'id')
+    )
+    by_student, by_subject = defaultdict(list), defaultdict(list)
+    for enrollment in enrollments:
+        by_student[enrollment.student_id].append(enrollment)
+        by_subject[enrollment.subject_id].append(enrollment)
+
+    notifications = []
+    for student_enrollments in by_student.values():
+        enrollment = student_enrollments[0]
+        if len(student_enrollments) == 1:
+            notifications.append(build_enrollment_notifications(enrollment.subject, enrollment.student)[0])
+            continue
+        codes = ', '.join(e.subject.code for e in student_enrollments)
+        notifications.append(Notification(
+            recipient=enrollment.student,
+            type=Notification.Type.ENROLLMENT_CREATED,
+            title=f'📚 Inscrito en {len(student_enrollments)} materias',
+            message=f'Has sido inscrito en {codes}.',
+            link_url='/subjects',
+        ))
+    for subject_enrollments in by_subject.values():
+        enrollment = subject_enrollments[0]
+        subject = enrollment.subject
+        if len(subject_enrollments) == 1:
+            notifications.append(build_enrollment_notifications(subject, enrollment.student)[1])
+            continue
+        notifications.append(Notification(
+            recipient=subject.teacher,
+            type=Notification.Type.ENROLLMENT_CREATED,
+            title=f'👥 {len(subject_enrollments)} nuevos estudiantes en {subject.code}',
+            message=f'Se inscribieron {len(subject_enrollments)} estudiantes en tu materia.',
+            link_url=f'/subjects/{subject.id}',
+        ))
+    return notifications
+
+
 @receiver(post_save, sender=Enrollment)
 def notify_enrollment_created(sender, instance: Enrollment, created: bool, **kwargs):
     """Notify student and teacher when a new enrollment is created"""
-    if not created:
-        return
-    try:
-        subject = instance.subject
-        # Notify student
-        Notification.objects.create(
-            recipient=instance.student,
-            type=Notification.Type.ENROLLMENT_CREATED,
-            title=f'📚 Inscrito en {subject.code}',
-            message=f'Has sido inscrito en {subject.name}. Profesor: {subject.teacher.email}',
+    if created:
+        outbox.record('enrollment.created', enrollment_id=instance.id)
+
+
+STATUS_EMOJI = {
+    'GREEN': '🟢',
+    'YELLOW': '🟡',
+    'RED': '🔴',
+    'SUBMITTED': '🔵'
+}
+
+
+def build_result_notifications(result: StudentExerciseResult, created: bool) -> list:
+    """Build (unsaved) notifications for a created or updated result"""
+    enrollment = result.enrollment
+    subject = enrollment.subject
+
+    status_emoji = STATUS_EMOJI.get(result.status, '📊')
+
+    notifications = []
+    if result.status == 'SUBMITTED':
+        # Notify Teacher about submission
+        notifications.append(Notification(
+            recipient=subject.teacher,
+            type=Notification.Type.GENERAL, # Fallback as SUBMISSION_CREATED is not in current Type enum for notifications app?
+            title=f'📄 Nueva entrega en {subject.code}',
+            message=f"El estudiante {enrollment.student.email} ha entregado el ejercicio '{result.exercise.name}'.",
             link_url=f'/subjects/{subject.id}',
+        ))
+
+    if created:
+        # Notify student about new result
+        notifications.append(Notification(
+            recipient=enrollment.student,
+            type=Notification.Type.GENERAL, # Fallback
+            title=f'{status_emoji} Nuevo resultado en {subject.code}',
+            message=f"Ejercicio '{result.exercise.name}' calificado como {result.status}.",
+            link_url=f'/subjects/{subject.id}',
+        ))
+    else:
+        # Notify student about result update
+        notifications.append(Notification(
+            recipient=enrollment.student,
+            type=Notification.Type.RESULTS_UPDATED,
+            title=f'{status_emoji} Resultado actualizado en {subject.code}',
+            message=f"El ejercicio '{result.exercise.name}' fue actualizado a {result.status}.",
+            link_url=f'/subjects/{subject.id}',
+        ))
+    return notifications
+
+
+def record_result_saved(result: StudentExerciseResult, created: bool):
+    """Record the notification event of a created or updated result"""
+    outbox.record(
+        'result.saved',
+        enrollment_id=result.enrollment_id,
+        exercise_id=result.exercise_id,
+        created=created,
+        status=result.status,
+    )
+
+
+def publish_results(enrollment: Enrollment, payloads: list):
+    """Push saved results to the student's event stream (see `notifications.stream`)"""
+    stream.publish_many(
+        (enrollment.student_id, 'result', {
+            'enrollment_id': enrollment.id,
+            'subject_id': enrollment.subject_id,
+            'exercise_id': payload['exercise_id'],
+            'status': payload['status'],
+            'created': payload['created'],
+        })
+        for payload in payloads
+    )
+
+
+@outbox.expander('result.saved')
+def expand_result_saved(payload) -> list:
+    enrollment = Enrollment.objects.select_related('student', 'subject__teacher').filter(pk=payload['enrollment_id']).first()
+    exercise = Exercise.objects.filter(pk=payload['exercise_id']).first()
+    if enrollment is None or exercise is None:
+        return []
+    publish_results(enrollment, [payload])
+    # Describe the status at the time of the event, not a later one
+    result = StudentExerciseResult(enrollment=enrollment, exercise=exercise, status=payload['status'])
+    return build_result_notifications(result, payload['created'])
+
+
+@outbox.summarizer('result.saved')
+def summarize_results_saved(payloads) -> list:
+    """One notification per student and subject, plus one per teacher for new submissions"""
+    by_enrollment = defaultdict(list)
+    for payload in payloads:
+        by_enrollment[payload['enrollment_id']].append(payload)
+    enrollments = Enrollment.objects.select_related('student', 'subject__teacher').in_bulk(list(by_enrollment))
+    exercises = Exercise.objects.in_bulk({p['exercise_id'] for p in payloads})
+
+    notifications = []
+    submissions = defaultdict(list)
+    for enrollment_id, items in by_enrollment.items():
+        enrollment = enrollments.get(enrollment_id)
+        items = [p for p in items if p['exercise_id'] in exercises]
+        if enrollment is None or not items:
+            continue
+        publish_results(enrollment, items)
+        subject = enrollment.subject
+        submissions[subject.id].extend(
+            (enrollment, p) for p in items if p['status'] == StudentExerciseResult.Status.SUBMITTED
         )
-        # Notify teacher
-        Notification.objects.create(
+        if len(items) == 1:
+            payload = items[0]
+            result = StudentExerciseResult(
+                enrollment=enrollment, exercise=exercises[payload['exercise_id']], status=payload['status']
+            )
+            # The teacher's submission notice is summarized below
+            notifications.append(build_result_notifications(result, payload['created'])[-1])
+            continue
+        counts = Counter(p['status'] for p in items)
+        summary = ', '.join(f"{counts[status]} {STATUS_EMOJI[status]}" for status in STATUS_EMOJI if counts[status])
+        notifications.append(Notification(
+            recipient=enrollment.student,
+            type=Notification.Type.RESULTS_UPDATED,
+            title=f'📊 {len(items)} resultados actualizados en {subject.code}',
+            message=f'Se registraron {len(items)} resultados: {summary}.',
+            link_url=f'/subjects/{subject.id}',
+        ))
+
+    for items in submissions.values():
+        enrollment, payload = items[0]
+        subject = enrollment.subject
+        if len(items) == 1:
+            result = StudentExerciseResult(
+                enrollment=enrollment, exercise=exercises[payload['exercise_id']], status=payload['status']
+            )
+            notifications.append(build_result_notifications(result, payload['created'])[0])
+            continue
+        notifications.append(Notification(
             recipient=subject.teacher,
-            type=Notification.Type.ENROLLMENT_CREATED,
-            title=f'👥 Nuevo estudiante en {subject.code}',
-            message=f'{instance.student.email} fue inscrito en tu materia.',
+            type=Notification.Type.GENERAL,
+            title=f'📄 {len(items)} nuevas entregas en {subject.code}',
+            message=f'{len(items)} entregas esperan revisión.',
             link_url=f'/subjects/{subject.id}',
-        )
-    except Exception as e:
-        # Avoid breaking main flow on notification errors
-        print(f"Error creating enrollment notification: {e}")
+        ))
+    return notifications
+
+
+@receiver(post_save, sender=CourseNotification)
+def publish_course_notification(sender, instance: CourseNotification, created: bool, raw=False, **kwargs):
+    """Push new notifications of the notification bell to the user's event stream"""
+    if created and not raw:
+        stream.publish([instance.user_id], 'course_notification', {
+            'id': instance.id,
+            'notification_type': instance.notification_type,
+            'title': instance.title,
+            'message': instance.message,
+            'link': instance.link,
+            'created_at': instance.created_at,
+        })
 
 
 @receiver(post_save, sender=StudentExerciseResult)
 def notify_result_updated(sender, instance: StudentExerciseResult, created: bool, **kwargs):
     """Notify student and teacher when a result is created or updated"""
-    try:
-        enrollment = instance.enrollment
-        subject = enrollment.subject
-        
-        status_emoji = {
-            'GREEN': '🟢',
-            'YELLOW': '🟡',
-            'RED': '🔴',
-            'SUBMITTED': '🔵'
-        }.get(instance.status, '📊')
-        
-        if instance.status == 'SUBMITTED':
-            # Notify Teacher about submission
-            Notification.objects.create(
-                recipient=subject.teacher,
-                type=Notification.Type.GENERAL, # Fallback as SUBMISSION_CREATED is not in current Type enum for notifications app?
-                title=f'📄 Nueva entrega en {subject.code}',
-                message=f"El estudiante {enrollment.student.email} ha entregado el ejercicio '{instance.exercise.name}'.",
-                link_url=f'/subjects/{subject.id}',
-            )
+    record_result_saved(instance, created)
 
-        if created:
-            # Notify student about new result
-            Notification.objects.create(
-                recipient=enrollment.student,
-                type=Notification.Type.GENERAL, # Fallback
-                title=f'{status_emoji} Nuevo resultado en {subject.code}',
-                message=f"Ejercicio '{instance.exercise.name}' calificado como {instance.status}.",
-                link_url=f'/subjects/{subject.id}',
-            )
-        else:
-            # Notify student about result update
-            Notification.objects.create(
-                recipient=enrollment.student,
-                type=Notification.Type.RESULTS_UPDATED,
-                title=f'{status_emoji} Resultado actualizado en {subject.code}',
-                message=f"El ejercicio '{instance.exercise.name}' fue actualizado a {instance.status}.",
+
+def build_exercise_notifications(exercise: Exercise) -> list:
+    """Build (unsaved) notifications for the students enrolled in the subject of a new exercise"""
+    subject = exercise.subject
+    return [
+        Notification(
+            recipient_id=student_id,
+            type=Notification.Type.GENERAL, # Fallback
+            title=f'Nuevo ejercicio en {subject.code}',
+            message=f"Se creó el ejercicio '{exercise.name}' en {subject.name}.",
+            link_url=f'/subjects/{subject.id}',
+        )
+        for student_id in subject.enrollments.values_list('student_id', flat=True)
+    ]
+
+
+@outbox.expander('exercise.created')
+def expand_exercise_created(payload) -> list:
+    exercise = Exercise.objects.select_related('subject').filter(pk=payload['exercise_id']).first()
+    if exercise is None:
+        return []
+    return build_exercise_notifications(exercise)
+
+
+@outbox.summarizer('exercise.created')
+def summarize_exercises_created(payloads) -> list:
+    """One notification per enrolled student and subject"""
+    by_subject = defaultdict(list)
+    for exercise in Exercise.objects.select_related('subject').filter(pk__in=[p['exercise_id'] for p in payloads]):
+        by_subject[exercise.subject_id].append(exercise)
+
+    notifications = []
+    for exercises in by_subject.values():
+        if len(exercises) == 1:
+            notifications.extend(build_exercise_notifications(exercises[0]))
+            continue
+        subject = exercises[0].subject
+        names = ', '.join(f"'{e.name}'" for e in exercises)
+        notifications.extend(
+            Notification(
+                recipient_id=student_id,
+                type=Notification.Type.GENERAL,
+                title=f'{len(exercises)} nuevos ejercicios en {subject.code}',
+                message=f"Se crearon los ejercicios {names} en {subject.name}.",
                 link_url=f'/subjects/{subject.id}',
             )
-    except Exception as e:
-        print(f"Error creating result notification: {e}")
+            for student_id in subject.enrollments.values_list('student_id', flat=True)
+        )
+    return notifications
 
 
 @receiver(post_save, sender=Exercise)
 def notify_exercise_created(sender, instance: Exercise, created: bool, **kwargs):
     """Notify enrolled students when a new exercise is created"""
-    if not created:
+    if created:
+        outbox.record('exercise.created', exercise_id=instance.id)
+
+
+@receiver(post_save, sender=Enrollment)
+def create_enrollment_stats(sender, instance: Enrollment, created: bool, **kwargs):
+    """Create the empty materialized stats row for a new enrollment"""
+    if created:
+        deferred = _deferred_changes()
+        if deferred is not None:
+            deferred['enrollment_ids'].add(instance.pk)
+            return
+        EnrollmentStats.objects.get_or_create(enrollment=instance)
+
+
+@receiver(post_init, sender=StudentExerciseResult)
+def remember_result_status(sender, instance: StudentExerciseResult, **kwargs):
+    """Remember the loaded status; save() and delete() replace it with the locked stored one"""
+    # Read from __dict__ so deferred fields are not fetched
+    instance._stats_status = instance.__dict__.get('status') if instance.pk else None
+
+
+@receiver(post_save, sender=StudentExerciseResult)
+def update_enrollment_stats_on_save(sender, instance: StudentExerciseResult, created: bool, **kwargs):
+    """Apply the status change of a result to its enrollment stats row"""
+    old_status = getattr(instance, '_stats_status', None)
+    deferred = _deferred_changes()
+    if deferred is not None:
+        deferred['enrollment_ids'].add(instance.enrollment_id)
+    elif created:
+        EnrollmentStats.apply_delta(instance.enrollment_id, None, instance.status)
+    elif old_status is None:
+        # Previous status unknown (e.g. deferred field); recount this enrollment
+        EnrollmentStats.rebuild(enrollment_ids=[instance.enrollment_id])
+    else:
+        EnrollmentStats.apply_delta(instance.enrollment_id, old_status, instance.status)
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=StudentExerciseResult)
+def update_enrollment_stats_on_delete(sender, instance: StudentExerciseResult, **kwargs):
+    """Remove a deleted result from its enrollment stats row"""
+    deferred = _deferred_changes()
+    if deferred is not None:
+        deferred['enrollment_ids'].add(instance.enrollment_id)
         return
-    try:
-        subject = instance.subject
-        enrollments = subject.enrollments.select_related('student').all()
-        
-        # Notify all enrolled students
-        notifications = []
-        for enrollment in enrollments:
-            notifications.append(
-                Notification(
-                    recipient=enrollment.student,
-                    type=Notification.Type.GENERAL, # Fallback
-                    title=f'Nuevo ejercicio en {subject.code}',
-                    message=f"Se creó el ejercicio '{instance.name}' en {subject.name}.",
-                    link_url=f'/subjects/{subject.id}',
-                )
-            )
-        
-        # Bulk create for better performance
-        if notifications:
-            Notification.objects.bulk_create(notifications)
-    except Exception as e:
-        print(f"Error creating exercise notification: {e}")
+    EnrollmentStats.apply_delta(instance.enrollment_id, getattr(instance, '_stats_status', None) or instance.status, None)
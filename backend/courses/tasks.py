@@ -0,0 +1,230 @@
+"""
+Background job handlers for the courses app (see `jobs.services`).
+"""
+import io
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from jobs.services import PermanentJobError, enqueue, register
+from .ai_service import grade_submission, grade_submissions, store_submission_file_text
+from .models import EnrollmentStats, Exercise, Notification, StudentExerciseResult, Subject
+from .signals import bulk_changes, record_result_saved
+from .services import (
+    ENROLLMENTS_CSV_COLUMNS,
+    ENROLLMENTS_CSV_ERROR,
+    RESULTS_CSV_COLUMNS,
+    RESULTS_CSV_ERROR,
+    process_enrollments_csv,
+    process_results_csv,
+    read_csv,
+)
+
+IMPORT_ENROLLMENTS_CSV = 'courses.import_enrollments_csv'
+IMPORT_RESULTS_CSV = 'courses.import_results_csv'
+GRADE_SUBMISSION = 'courses.grade_submission'
+GRADE_EXERCISE = 'courses.grade_exercise'
+
+
+def _enqueue_csv_import(kind, subject, file_obj, user, required, error):
+    content = file_obj.read()
+    # Reject files with missing columns right away instead of in the worker
+    read_csv(io.BytesIO(content), required, error)
+    return enqueue(
+        kind,
+        {"subject_id": subject.id, "csv": content.decode("utf-8", errors="ignore")},
+        user=user,
+    )
+
+
+def enqueue_enrollments_import(subject: Subject, file_obj, user):
+    return _enqueue_csv_import(
+        IMPORT_ENROLLMENTS_CSV, subject, file_obj, user, ENROLLMENTS_CSV_COLUMNS, ENROLLMENTS_CSV_ERROR
+    )
+
+
+def enqueue_results_import(subject: Subject, file_obj, user):
+    return _enqueue_csv_import(
+        IMPORT_RESULTS_CSV, subject, file_obj, user, RESULTS_CSV_COLUMNS, RESULTS_CSV_ERROR
+    )
+
+
+def _run_csv_import(job, process):
+    try:
+        subject = Subject.objects.get(pk=job.payload["subject_id"])
+    except Subject.DoesNotExist:
+        raise PermanentJobError("Materia no encontrada.")
+    try:
+        return process(subject, io.BytesIO(job.payload["csv"].encode("utf-8")))
+    except ValidationError as e:
+        detail = e.detail.get("detail", e.detail) if isinstance(e.detail, dict) else e.detail
+        raise PermanentJobError(str(detail))
+
+
+@register(IMPORT_ENROLLMENTS_CSV)
+def import_enrollments_csv(job):
+    return _run_csv_import(job, process_enrollments_csv)
+
+
+@register(IMPORT_RESULTS_CSV)
+def import_results_csv(job):
+    return _run_csv_import(job, process_results_csv)
+
+
+def enqueue_grading(result: StudentExerciseResult, user=None):
+    return enqueue(GRADE_SUBMISSION, {"result_id": result.id}, user=user)
+
+
+@register(GRADE_SUBMISSION, max_concurrency=settings.AI_GRADING_CONCURRENCY)
+def grade_submission_job(job):
+    """AI auto-grading of a SUBMITTED result, then notify the teacher"""
+    result = (
+        StudentExerciseResult.objects.select_related(
+            "exercise__subject__teacher", "enrollment__student"
+        )
+        .filter(pk=job.payload["result_id"])
+        .first()
+    )
+    if result is None:
+        raise PermanentJobError("Resultado no encontrado.")
+    if result.status != StudentExerciseResult.Status.SUBMITTED:
+        # Already graded, by the teacher or by an earlier job for a resubmission
+        return {"result_id": result.id, "status": result.status, "comment": result.comment, "graded": False}
+
+    exercise = result.exercise
+    file_handle = None
+    file_name = None
+    digest = result.submission_sha256 or None
+    if result.submission_file:
+        file_handle = result.submission_file.open("rb")
+        file_name = result.submission_file.name
+    try:
+        if file_handle:
+            # Parse the document here, off the request, so grading and later
+            # feedback reuse the stored text
+            digest = store_submission_file_text(file_handle, file_name, digest)
+        grading_result = grade_submission(
+            exercise_description=exercise.description,
+            submission_file=file_handle,
+            submission_file_name=file_name,
+            submission_text=result.submission_text,
+            submission_file_hash=digest,
+        )
+    finally:
+        if file_handle:
+            file_handle.close()
+
+    with transaction.atomic():
+        # The teacher may have graded it while the model was answering
+        current = (
+            StudentExerciseResult.objects.select_for_update()
+            .filter(pk=result.pk, status=StudentExerciseResult.Status.SUBMITTED)
+            .first()
+        )
+        if current is None:
+            result.refresh_from_db(fields=["status", "comment"])
+            return {"result_id": result.id, "status": result.status, "comment": result.comment, "graded": False}
+
+        result.status = grading_result["status"]
+        result.comment = grading_result["feedback"]
+        result.save()
+
+        # Notify Teacher about AI grading
+        Notification.objects.create(
+            user=exercise.subject.teacher,
+            notification_type=Notification.NotificationType.GENERAL,
+            title=f"🤖 IA Calificó: {exercise.name}",
+            message=f"La IA asignó {result.get_status_display()} a {result.enrollment.student.email}. Revisa si es correcto.",
+            link=f"/subjects/{exercise.subject.id}",
+        )
+    return {"result_id": result.id, "status": result.status, "comment": result.comment, "graded": True}
+
+
+def enqueue_exercise_grading(exercise: Exercise, user, concurrency: int):
+    return enqueue(GRADE_EXERCISE, {"exercise_id": exercise.id, "concurrency": concurrency}, user=user)
+
+
+def _submission_inputs(exercise, results):
+    """(result, grade_submission kwargs) pairs; files are read only when consumed"""
+    for result in results:
+        file_obj, file_name = None, None
+        if result.submission_file:
+            try:
+                with result.submission_file.open("rb") as handle:
+                    file_obj = io.BytesIO(handle.read())
+                file_name = result.submission_file.name
+            except (OSError, ValueError):
+                file_obj = None  # Missing file: grade the text only
+        yield result, {
+            "exercise_description": exercise.description,
+            "submission_file": file_obj,
+            "submission_file_name": file_name,
+            "submission_text": result.submission_text,
+            "submission_file_hash": result.submission_sha256 or None,
+        }
+
+
+@register(GRADE_EXERCISE, max_concurrency=settings.AI_GRADING_CONCURRENCY)
+def grade_exercise_job(job):
+    """
+    AI grading of every SUBMITTED result of an exercise. Model calls run
+    concurrently; each graded result is published in the job's partial
+    result, and all grades are written with one bulk_update at the end.
+    """
+    exercise = Exercise.objects.select_related("subject__teacher").filter(pk=job.payload["exercise_id"]).first()
+    if exercise is None:
+        raise PermanentJobError("Ejercicio no encontrado.")
+    results = list(
+        StudentExerciseResult.objects.filter(
+            exercise=exercise, status=StudentExerciseResult.Status.SUBMITTED
+        ).select_related("enrollment__student")
+    )
+    total = len(results)
+    concurrency = max(1, min(job.payload.get("concurrency") or 1, settings.AI_BULK_GRADING_CONCURRENCY))
+
+    graded, items = [], []
+    for done, (result, outcome) in enumerate(
+        grade_submissions(_submission_inputs(exercise, results), concurrency), start=1
+    ):
+        result.status = outcome["status"]
+        result.comment = outcome["feedback"]
+        graded.append(result)
+        items.append({
+            "result_id": result.id,
+            "student_email": result.enrollment.student.email,
+            "status": result.status,
+            "comment": result.comment,
+        })
+        # 100% is reserved for the final write
+        job.set_progress(done * 99 // total, result={"total": total, "done": done, "results": items})
+
+    with transaction.atomic(), bulk_changes():
+        # Results graded by the teacher in the meantime keep that grade
+        still_submitted = set(
+            StudentExerciseResult.objects.select_for_update()
+            .filter(pk__in=[r.pk for r in graded], status=StudentExerciseResult.Status.SUBMITTED)
+            .values_list("pk", flat=True)
+        )
+        graded = [r for r in graded if r.pk in still_submitted]
+        now = timezone.now()
+        for result in graded:
+            result.updated_at = now
+        StudentExerciseResult.objects.bulk_update(graded, ["status", "comment", "updated_at"])
+        EnrollmentStats.rebuild(enrollment_ids={r.enrollment_id for r in graded})
+
+        for result in graded:
+            record_result_saved(result, created=False)
+        if graded:
+            Notification.objects.create(
+                user=exercise.subject.teacher,
+                notification_type=Notification.NotificationType.GENERAL,
+                title=f"🤖 IA Calificó: {exercise.name}",
+                message=f"La IA calificó {len(graded)} entregas. Revisa si las notas son correctas.",
+                link=f"/subjects/{exercise.subject.id}",
+            )
+
+    for item in items:
+        item["saved"] = item["result_id"] in still_submitted
+    return {"total": total, "done": total, "graded": len(graded), "results": items}
@@ -0,0 +1,130 @@
+import io
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+
+from courses import ai_cache, ai_service
+from courses.ai_client import set_provider
+from courses.models import AIResponseCache
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Replace the model calls with counters"""
+    calls = {'grading': 0, 'feedback': 0}
+
+    def grade(*args):
+        calls['grading'] += 1
+        return {'status': 'GREEN', 'feedback': 'Correcto'}, True
+
+    def feedback(*args):
+        calls['feedback'] += 1
+        return 'Buen trabajo', True
+
+    monkeypatch.setattr(ai_service, '_grade_submission', grade)
+    monkeypatch.setattr(ai_service, '_generate_feedback', feedback)
+    return calls
+
+
+@pytest.mark.django_db
+class TestAIResponseCache:
+    """Tests for the content-addressed AI response cache"""
+
+    def test_identical_grading_hits_cache(self, fake_model):
+        """Test that the same submission is graded by the model only once"""
+        first = ai_service.grade_submission('Sumar dos números', submission_text='def suma(a, b):\n    return a + b')
+        second = ai_service.grade_submission('Sumar  dos números ', submission_text='def suma(a, b):\r\n    return a + b\r\n')
+
+        assert first == second == {'status': 'GREEN', 'feedback': 'Correcto'}
+        assert fake_model['grading'] == 1
+        assert ai_cache.stats()['GRADING'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1}
+
+    def test_different_inputs_miss(self, fake_model):
+        """Test that changing the content, status or file yields a new key"""
+        ai_service.grade_submission('Ejercicio', submission_text='a')
+        ai_service.grade_submission('Ejercicio', submission_text='b')
+        ai_service.generate_grading_feedback('Ejercicio', 'a@test.com', 'GREEN')
+        ai_service.generate_grading_feedback('Ejercicio', 'a@test.com', 'RED')
+        ai_service.generate_grading_feedback('Ejercicio', 'b@test.com', 'RED')
+
+        assert fake_model == {'grading': 2, 'feedback': 2}
+
+    def test_failed_extraction_is_retried(self, fake_model, monkeypatch):
+        """Test that a timed-out parse stores no text and caches no grade"""
+        from courses import extraction_pool
+        from courses.models import SubmissionText
+        outcomes = [extraction_pool.ExtractionFailed('timeout'), 'Texto del archivo']
+
+        def extract(*args):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        monkeypatch.setattr(ai_service, 'extract_text_from_file', extract)
+
+        for _ in range(2):
+            ai_service.grade_submission('Ejercicio', submission_file=io.BytesIO(b'%PDF-1.4'), submission_file_name='a.pdf')
+
+        assert fake_model['grading'] == 2
+        assert SubmissionText.objects.get().text == 'Texto del archivo'
+        assert ai_cache.stats()['GRADING']['entries'] == 1
+
+    def test_file_content_is_part_of_key(self, fake_model):
+        """Test that files are keyed by content, not by name, and left readable"""
+        upload = io.BytesIO(b'%PDF-1.4 contenido')
+        ai_service.grade_submission('Ejercicio', submission_file=upload, submission_file_name='a.pdf')
+        assert upload.tell() == 0
+        ai_service.grade_submission('Ejercicio', submission_file=io.BytesIO(b'%PDF-1.4 contenido'), submission_file_name='b.pdf')
+        ai_service.grade_submission('Ejercicio', submission_file=io.BytesIO(b'%PDF-1.4 otro'), submission_file_name='a.pdf')
+
+        assert fake_model['grading'] == 2
+
+    def test_errors_are_not_cached(self, monkeypatch, settings):
+        """Test that fallback responses for API errors are retried next time"""
+        settings.AI_PROVIDER = 'gemini'
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+        set_provider(None)
+
+        feedback = ai_service.generate_grading_feedback('Ejercicio', 'a@test.com', 'GREEN')
+
+        assert feedback.startswith('Error')
+        assert not AIResponseCache.objects.exists()
+
+    def test_expired_entries_are_ignored(self, fake_model):
+        """Test that entries past their TTL are recomputed"""
+        ai_service.grade_submission('Ejercicio', submission_text='a')
+        AIResponseCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        ai_service.grade_submission('Ejercicio', submission_text='a')
+
+        assert fake_model['grading'] == 2
+        assert AIResponseCache.objects.count() == 1
+
+    def test_least_recently_used_entries_are_evicted(self, fake_model, settings):
+        """Test that the cache keeps at most AI_CACHE_MAX_ENTRIES entries"""
+        settings.AI_CACHE_MAX_ENTRIES = 2
+        settings.AI_CACHE_EVICT_EVERY = 1
+        ai_service.grade_submission('Ejercicio', submission_text='a')
+        ai_service.grade_submission('Ejercicio', submission_text='b')
+        AIResponseCache.objects.update(last_used_at=timezone.now() - timedelta(minutes=5))
+        ai_service.grade_submission('Ejercicio', submission_text='a')  # hit refreshes 'a'
+
+        ai_service.grade_submission('Ejercicio', submission_text='c')
+
+        assert AIResponseCache.objects.count() == 2
+        ai_service.grade_submission('Ejercicio', submission_text='a')
+        assert fake_model['grading'] == 3
+
+    def test_eviction_runs_every_n_puts(self, fake_model, settings, monkeypatch):
+        """Test that the table is not scanned for eviction on every insert"""
+        import itertools
+        settings.AI_CACHE_MAX_ENTRIES = 1
+        settings.AI_CACHE_EVICT_EVERY = 3
+        monkeypatch.setattr(ai_cache, '_puts', itertools.count(1))
+
+        for text in 'ab':
+            ai_service.grade_submission('Ejercicio', submission_text=text)
+        assert AIResponseCache.objects.count() == 2
+
+        ai_service.grade_submission('Ejercicio', submission_text='c')
+        assert AIResponseCache.objects.count() == 1
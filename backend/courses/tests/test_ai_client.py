@@ -0,0 +1,63 @@
+import io
+import pytest
+from django.core.management import call_command
+
+from courses import ai_client, ai_service
+from courses.ai_client import FakeProvider, get_provider, set_provider
+
+
+@pytest.fixture
+def reset_provider():
+    set_provider(None)
+    yield
+    set_provider(None)
+
+
+@pytest.mark.django_db
+class TestAIProvider:
+    """Tests for the shared AI provider"""
+
+    def test_provider_is_created_once_per_process(self, settings, reset_provider):
+        """Test that the provider is built lazily and reused"""
+        settings.AI_PROVIDER = 'fake'
+
+        provider = get_provider()
+
+        assert isinstance(provider, FakeProvider)
+        assert get_provider() is provider
+
+    def test_provider_is_rebuilt_after_fork(self, settings, reset_provider, monkeypatch):
+        """Test that a forked worker does not reuse the parent's client"""
+        settings.AI_PROVIDER = 'fake'
+        provider = get_provider()
+        monkeypatch.setattr(ai_client, '_provider_pid', -1)
+
+        assert get_provider() is not provider
+
+    def test_gemini_without_key_is_not_configured(self, settings, reset_provider, monkeypatch):
+        """Test that a missing GEMINI_API_KEY keeps the existing error message"""
+        settings.AI_PROVIDER = 'gemini'
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+
+        assert get_provider() is None
+        assert ai_service.generate_grading_feedback('Ejercicio', 'a@test.com', 'RED').startswith('Error')
+
+    def test_grading_with_fake_provider(self, reset_provider):
+        """Test that grading runs end to end against the fake provider"""
+        fake = FakeProvider()
+        set_provider(fake)
+
+        first = ai_service.grade_submission('Sumar', submission_text='return a + b')
+        second = ai_service.grade_submission('Sumar', submission_text='return a + b')
+
+        assert first == second
+        assert first['status'] in ('GREEN', 'YELLOW', 'RED')
+        assert fake.calls == 1  # second call served from the cache
+
+    def test_benchmark_command(self, reset_provider):
+        """Test that the offline benchmark reports throughput"""
+        out = io.StringIO()
+
+        call_command('benchmark_ai_grading', '--submissions', '5', '--concurrency', '2', '--latency', '0', stdout=out)
+
+        assert 'entregas/s' in out.getvalue()
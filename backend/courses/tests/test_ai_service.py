@@ -0,0 +1,95 @@
+import io
+import os
+import time
+import pytest
+from django.core.management import call_command
+
+from courses import extraction_pool
+from courses.ai_service import extract_text_from_file
+from courses.management.commands.benchmark_text_extraction import build_sample_docx, build_sample_pdf
+
+
+@pytest.fixture(scope='module')
+def sample_pdf():
+    return build_sample_pdf(30, lines_per_page=5)
+
+
+class TestExtractTextFromFile:
+    """Tests for bounded submission text extraction"""
+
+    def test_stops_at_character_budget(self, sample_pdf):
+        """Test that extraction keeps the same prefix as a full parse"""
+        full = extract_text_from_file(io.BytesIO(sample_pdf), 'a.pdf', max_chars=10**9, max_pages=10**9)
+        bounded = extract_text_from_file(io.BytesIO(sample_pdf), 'a.pdf', max_chars=500)
+
+        assert len(bounded) == 500
+        assert full.startswith(bounded)
+
+    def test_page_cap(self, sample_pdf):
+        """Test that only the first pages of a PDF are read"""
+        text = extract_text_from_file(io.BytesIO(sample_pdf), 'a.pdf', max_chars=10**9, max_pages=2)
+
+        assert 'lineal. 1' in text
+        assert 'lineal. 2' not in text
+
+    def test_cpu_time_limit(self, sample_pdf):
+        """Test that extraction stops once the CPU time budget is spent"""
+        text = extract_text_from_file(io.BytesIO(sample_pdf), 'a.pdf', max_chars=10**9, max_pages=10**9, cpu_seconds=1e-9)
+
+        assert 'lineal. 0' in text
+        assert 'lineal. 1' not in text
+
+    def test_docx_paragraph_cap(self):
+        """Test that only the first paragraphs of a DOCX are read"""
+        content = build_sample_docx(50)
+
+        text = extract_text_from_file(io.BytesIO(content), 'a.docx', max_chars=10**9, max_paragraphs=3)
+
+        assert text.count('\n') == 2
+        assert text.endswith('lineal. 2')
+
+    def test_unsupported_or_broken_files(self):
+        """Test that unsupported and unreadable files yield no text"""
+        assert extract_text_from_file(io.BytesIO(b'print(1)'), 'a.py') is None
+        assert extract_text_from_file(io.BytesIO(b'not a pdf'), 'a.pdf') is None
+
+    def test_benchmark_command(self):
+        """Test that the extraction benchmark compares full and bounded parsing"""
+        out = io.StringIO()
+
+        call_command('benchmark_text_extraction', '--pages', '5', '--paragraphs', '50', '--repeat', '1', stdout=out)
+
+        assert 'Acotado' in out.getvalue()
+        assert 'no coincide' not in out.getvalue()
+
+
+class TestExtractionPool:
+    """Tests for the document parsing process pool"""
+
+    def test_runs_in_a_child_process(self, sample_pdf):
+        """Test that parsing happens outside the calling process"""
+        assert extraction_pool.run(os.getpid) != os.getpid()
+        assert 'lineal. 0' in extract_text_from_file(io.BytesIO(sample_pdf), 'a.pdf')
+
+    def test_timeout_fails_and_pool_recovers(self, settings):
+        """Test that a hung parser is killed and the next call still works"""
+        settings.AI_EXTRACT_TIMEOUT = 0.5
+
+        started = time.monotonic()
+        with pytest.raises(extraction_pool.ExtractionFailed):
+            extraction_pool.run(time.sleep, 30)
+        assert time.monotonic() - started < 10
+
+        assert extraction_pool.run(len, b'abc') == 3
+
+    def test_memory_limit(self):
+        """Test that an allocation above AI_EXTRACT_MEMORY_MB fails without killing the pool"""
+        with pytest.raises(extraction_pool.ExtractionFailed):
+            extraction_pool.run(bytearray, 4 * 1024 ** 3)
+        assert extraction_pool.run(len, b'abc') == 3
+
+    def test_inline_when_disabled(self, settings):
+        """Test that AI_EXTRACT_POOL_SIZE=0 parses in the calling process"""
+        settings.AI_EXTRACT_POOL_SIZE = 0
+
+        assert extraction_pool.run(os.getpid) == os.getpid()
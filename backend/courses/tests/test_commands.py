@@ -0,0 +1,97 @@
+import io
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from courses.models import Subject, Enrollment, EnrollmentStats, Exercise, StudentExerciseResult
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestImportStudentResultsCommand:
+    """Tests for the import_student_results management command"""
+
+    def _setup(self, tmp_path, teacher_user, create_user, rows):
+        subject = Subject.objects.create(name='Math', code='MATH101', teacher=teacher_user)
+        Exercise.objects.create(subject=subject, name='Exercise 1', order=1)
+        student = create_user(email='student@test.com', username='student@test.com', role=User.Roles.STUDENT)
+        enrollment = Enrollment.objects.create(subject=subject, student=student)
+        csv_path = tmp_path / 'results.csv'
+        csv_path.write_text('email,subject_code,exercise_name,status\n' + '\n'.join(rows) + '\n')
+        return subject, enrollment, str(csv_path)
+
+    def test_import_in_chunks(self, tmp_path, teacher_user, create_user):
+        """Test that rows are imported across chunks with errors reported per line"""
+        subject, enrollment, path = self._setup(tmp_path, teacher_user, create_user, [
+            'student@test.com,math101,Exercise 1,green',
+            'student@test.com,MATH101,Exercise 2,red',
+            'missing@test.com,MATH101,Exercise 1,green',
+            'student@test.com,MATH101,Exercise 3,purple',
+        ])
+        out = io.StringIO()
+
+        call_command('import_student_results', path, '--chunk-size', '1', stdout=out)
+
+        assert StudentExerciseResult.objects.filter(enrollment=enrollment).count() == 2
+        assert Exercise.objects.filter(subject=subject, name='Exercise 2').exists()
+        stats = EnrollmentStats.objects.get(enrollment=enrollment)
+        assert (stats.total, stats.green, stats.red) == (2, 1, 1)
+        output = out.getvalue()
+        assert 'Resultados creados: 2' in output
+        assert 'Errores: 2' in output
+        assert 'Usuario no encontrado: missing@test.com' in output
+        assert 'filas/s' in output
+
+    def test_reimport_skips_unchanged_rows(self, tmp_path, teacher_user, create_user):
+        """Test that importing the same file twice leaves results unchanged"""
+        _, enrollment, path = self._setup(tmp_path, teacher_user, create_user, [
+            'student@test.com,MATH101,Exercise 1,yellow',
+        ])
+        call_command('import_student_results', path, stdout=io.StringIO())
+        out = io.StringIO()
+
+        call_command('import_student_results', path, stdout=out)
+
+        assert StudentExerciseResult.objects.filter(enrollment=enrollment).count() == 1
+        assert 'Resultados sin cambios: 1' in out.getvalue()
+
+    def test_dry_run_rolls_back(self, tmp_path, teacher_user, create_user):
+        """Test that --dry-run reports the import without saving it"""
+        subject, enrollment, path = self._setup(tmp_path, teacher_user, create_user, [
+            'student@test.com,MATH101,Exercise 1,green',
+            'student@test.com,MATH101,New Exercise,red',
+        ])
+        out = io.StringIO()
+
+        call_command('import_student_results', path, '--dry-run', '--chunk-size', '1', stdout=out)
+
+        assert 'Resultados creados: 2' in out.getvalue()
+        assert not StudentExerciseResult.objects.filter(enrollment=enrollment).exists()
+        assert not Exercise.objects.filter(subject=subject, name='New Exercise').exists()
+
+    def test_failed_chunk_keeps_committed_chunks(self, tmp_path, teacher_user, create_user, monkeypatch):
+        """Test that each chunk commits on its own, so a later failure does not undo earlier ones"""
+        from courses.management.commands.import_student_results import ResultImporter
+
+        _, enrollment, path = self._setup(tmp_path, teacher_user, create_user, [
+            'student@test.com,MATH101,Exercise 1,green',
+            'student@test.com,MATH101,Exercise 2,red',
+        ])
+        import_chunk = ResultImporter.import_chunk
+        calls = []
+
+        def failing_second_chunk(self, chunk):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('boom')
+            return import_chunk(self, chunk)
+        monkeypatch.setattr(ResultImporter, 'import_chunk', failing_second_chunk)
+
+        out = io.StringIO()
+        call_command('import_student_results', path, '--chunk-size', '1', stdout=out)
+
+        assert 'boom' in out.getvalue()
+        result = StudentExerciseResult.objects.get(enrollment=enrollment)
+        assert result.exercise.name == 'Exercise 1'
+        assert EnrollmentStats.objects.get(enrollment=enrollment).green == 1
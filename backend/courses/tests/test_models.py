@@ -1,6 +1,8 @@
+import io
 import pytest
 from django.contrib.auth import get_user_model
-from courses.models import Subject, Enrollment, Exercise, StudentExerciseResult
+from django.core.management import call_command
+from courses.models import Subject, Enrollment, EnrollmentStats, Exercise, StudentExerciseResult
 
 User = get_user_model()
 
@@ -337,3 +339,106 @@ class TestStudentExerciseResultModel:
         assert 'Compose a Song' in str(result)
         assert student_user.email in str(result)
         assert 'GREEN' in str(result)
+
+
+
+@pytest.mark.django_db
+class TestEnrollmentStatsModel:
+    """Tests for the materialized EnrollmentStats row"""
+
+    def _setup(self, student_user, teacher_user, n_exercises=3):
+        subject = Subject.objects.create(name='Math', code='MATH101', teacher=teacher_user)
+        enrollment = Enrollment.objects.create(student=student_user, subject=subject)
+        exercises = [
+            Exercise.objects.create(subject=subject, name=f'Exercise {i}', order=i)
+            for i in range(n_exercises)
+        ]
+        return enrollment, exercises
+
+    def test_row_created_with_enrollment(self, student_user, teacher_user):
+        """Test that a new enrollment gets an empty stats row"""
+        enrollment, _ = self._setup(student_user, teacher_user)
+        row = EnrollmentStats.objects.get(enrollment=enrollment)
+        assert row.total == 0
+        assert row.grade == 0.0
+        assert row.semaphore == 'RED'
+
+    def test_row_tracks_create_update_delete(self, student_user, teacher_user):
+        """Test that result saves and deletes apply deltas to the stats row"""
+        enrollment, exercises = self._setup(student_user, teacher_user)
+        results = [
+            StudentExerciseResult.objects.create(
+                enrollment=enrollment, exercise=ex, status=StudentExerciseResult.Status.GREEN
+            )
+            for ex in exercises
+        ]
+        row = EnrollmentStats.objects.get(enrollment=enrollment)
+        assert (row.total, row.green, row.grade, row.semaphore) == (3, 3, 5.0, 'GREEN')
+
+        results[0].status = StudentExerciseResult.Status.RED
+        results[0].save()
+        fetched = StudentExerciseResult.objects.get(pk=results[1].pk)
+        fetched.status = StudentExerciseResult.Status.SUBMITTED
+        fetched.save()
+        row.refresh_from_db()
+        assert (row.total, row.green, row.red, row.submitted) == (3, 1, 1, 1)
+
+        results[2].delete()
+        row.refresh_from_db()
+        assert (row.total, row.green, row.red, row.submitted) == (2, 0, 1, 1)
+        assert row.as_dict() == {**enrollment.stats(), 'submitted_count': 1}
+
+    def test_stale_instances_do_not_drift_stats(self, student_user, teacher_user):
+        """Test that saves and deletes of outdated copies apply deltas from the stored status"""
+        enrollment, exercises = self._setup(student_user, teacher_user)
+        for ex in exercises[:2]:
+            StudentExerciseResult.objects.create(
+                enrollment=enrollment, exercise=ex, status=StudentExerciseResult.Status.GREEN
+            )
+        first, second = (StudentExerciseResult.objects.get(exercise=exercises[0]) for _ in range(2))
+        other, other_copy = (StudentExerciseResult.objects.get(exercise=exercises[1]) for _ in range(2))
+
+        # Both copies were loaded as GREEN, like two concurrent requests
+        first.status = StudentExerciseResult.Status.RED
+        first.save()
+        second.status = StudentExerciseResult.Status.YELLOW
+        second.save()
+        other.status = StudentExerciseResult.Status.RED
+        other.save()
+        other_copy.delete()
+        assert other_copy.delete() == (0, {})
+
+        row = EnrollmentStats.objects.get(enrollment=enrollment)
+        assert (row.total, row.green, row.yellow, row.red) == (1, 0, 1, 0)
+        assert row.as_dict() == {**enrollment.stats(), 'submitted_count': 0}
+
+    def test_stored_stats_rebuilds_missing_row(self, student_user, teacher_user):
+        """Test that stored_stats recomputes a missing row"""
+        enrollment, exercises = self._setup(student_user, teacher_user)
+        StudentExerciseResult.objects.create(
+            enrollment=enrollment, exercise=exercises[0], status=StudentExerciseResult.Status.GREEN
+        )
+        EnrollmentStats.objects.all().delete()
+
+        enrollment = Enrollment.objects.get(pk=enrollment.pk)
+        stats = enrollment.stored_stats()
+        assert stats['total'] == 1
+        assert stats['grade'] == 5.0
+        assert EnrollmentStats.objects.filter(enrollment=enrollment).exists()
+
+    def test_rebuild_command_fixes_drift(self, student_user, teacher_user):
+        """Test that rebuild_enrollment_stats recomputes rows from results"""
+        enrollment, exercises = self._setup(student_user, teacher_user)
+        for ex in exercises:
+            StudentExerciseResult.objects.create(
+                enrollment=enrollment, exercise=ex, status=StudentExerciseResult.Status.YELLOW
+            )
+        # Queryset updates bypass signals and leave the row stale
+        StudentExerciseResult.objects.filter(enrollment=enrollment).update(
+            status=StudentExerciseResult.Status.GREEN
+        )
+
+        call_command('rebuild_enrollment_stats', stdout=io.StringIO())
+
+        row = EnrollmentStats.objects.get(enrollment=enrollment)
+        assert (row.total, row.green, row.yellow, row.grade) == (3, 3, 0, 5.0)
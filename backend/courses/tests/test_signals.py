@@ -2,6 +2,7 @@ import pytest
 from django.contrib.auth import get_user_model
 
 from courses.models import Subject, Enrollment, Exercise, StudentExerciseResult
+from courses.signals import bulk_changes
 from notifications.models import Notification
 
 User = get_user_model()
@@ -11,7 +12,7 @@ User = get_user_model()
 class TestEnrollmentSignals:
     """Tests for enrollment-related signals"""
     
-    def test_enrollment_creates_notifications(self, student_user, teacher_user):
+    def test_enrollment_creates_notifications(self, student_user, teacher_user, django_capture_on_commit_callbacks):
         """Test that creating enrollment creates notifications for both student and teacher"""
         subject = Subject.objects.create(
             name='Math',
@@ -22,10 +23,11 @@ class TestEnrollmentSignals:
         # Clear any existing notifications
         Notification.objects.all().delete()
         
-        enrollment = Enrollment.objects.create(
-            student=student_user,
-            subject=subject
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            enrollment = Enrollment.objects.create(
+                student=student_user,
+                subject=subject
+            )
         
         # Should create 2 notifications: one for student, one for teacher
         notifications = Notification.objects.all()
@@ -43,7 +45,7 @@ class TestEnrollmentSignals:
 class TestResultSignals:
     """Tests for student result-related signals"""
     
-    def test_result_create_notification(self, student_user, teacher_user):
+    def test_result_create_notification(self, student_user, teacher_user, django_capture_on_commit_callbacks):
         """Test that creating a result creates notification"""
         subject = Subject.objects.create(
             name='Math',
@@ -63,17 +65,18 @@ class TestResultSignals:
         # Clear notifications
         Notification.objects.all().delete()
         
-        result = StudentExerciseResult.objects.create(
-            enrollment=enrollment,
-            exercise=exercise,
-            status=StudentExerciseResult.Status.GREEN
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            result = StudentExerciseResult.objects.create(
+                enrollment=enrollment,
+                exercise=exercise,
+                status=StudentExerciseResult.Status.GREEN
+            )
         
         # Should create notification
         notifications = Notification.objects.filter(recipient=student_user)
         assert notifications.count() > 0
     
-    def test_result_update_notification(self, student_user, teacher_user):
+    def test_result_update_notification(self, student_user, teacher_user, django_capture_on_commit_callbacks):
         """Test that updating a result creates notification"""
         subject = Subject.objects.create(
             name='Math',
@@ -100,8 +103,9 @@ class TestResultSignals:
         Notification.objects.all().delete()
         
         # Update result
-        result.status = StudentExerciseResult.Status.GREEN
-        result.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            result.status = StudentExerciseResult.Status.GREEN
+            result.save()
         
         # Should create notification
         notifications = Notification.objects.filter(recipient=student_user)
@@ -143,3 +147,78 @@ class TestSubjectSignals:
         # Enrollment and result should be deleted
         assert not Enrollment.objects.filter(id=enrollment_id).exists()
         assert not StudentExerciseResult.objects.filter(id=result_id).exists()
+
+
+@pytest.mark.django_db
+class TestBulkChanges:
+    """Tests for deferring the receivers during bulk operations"""
+
+    @pytest.fixture
+    def course(self, teacher_user, student_user):
+        subject = Subject.objects.create(name='Math', code='CS-101', teacher=teacher_user)
+        enrollment = Enrollment.objects.create(student=student_user, subject=subject)
+        exercises = [Exercise.objects.create(subject=subject, name=f'Ejercicio {i}', order=i) for i in range(12)]
+        return subject, enrollment, exercises
+
+    def test_results_are_coalesced_per_recipient(self, course, student_user, teacher_user, django_capture_on_commit_callbacks):
+        """Test that 12 saved results yield one notification per recipient"""
+        from notifications.models import NotificationEvent
+        subject, enrollment, exercises = course
+        NotificationEvent.objects.all().delete()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with bulk_changes():
+                for exercise in exercises[:9]:
+                    StudentExerciseResult.objects.create(enrollment=enrollment, exercise=exercise, status='GREEN')
+                for exercise in exercises[9:]:
+                    StudentExerciseResult.objects.create(enrollment=enrollment, exercise=exercise, status='SUBMITTED')
+
+        student_notification = Notification.objects.get(recipient=student_user)
+        assert student_notification.title == '📊 12 resultados actualizados en CS-101'
+        assert '9 🟢' in student_notification.message and '3 🔵' in student_notification.message
+        teacher_notification = Notification.objects.get(recipient=teacher_user)
+        assert teacher_notification.title == '📄 3 nuevas entregas en CS-101'
+
+    def test_stats_are_rebuilt_once(self, course):
+        """Test that stats are correct after the block without per-save updates"""
+        from courses.models import EnrollmentStats
+        _, enrollment, exercises = course
+
+        with bulk_changes():
+            for exercise in exercises:
+                StudentExerciseResult.objects.create(enrollment=enrollment, exercise=exercise, status='GREEN')
+            assert EnrollmentStats.objects.get(enrollment=enrollment).total == 0
+            StudentExerciseResult.objects.filter(exercise=exercises[0]).delete()
+
+        stats = EnrollmentStats.objects.get(enrollment=enrollment)
+        assert (stats.total, stats.green) == (11, 11)
+
+    def test_new_students_join_demo_subject_in_bulk(self, teacher_user, create_user, django_capture_on_commit_callbacks):
+        """Test that students created in the block are enrolled in the demo subject on exit"""
+        from courses.signals import DEMO_SUBJECT_CODE
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with bulk_changes():
+                students = [
+                    create_user(email=f'd{i}@example.com', username=f'd{i}@example.com', role='STUDENT')
+                    for i in range(3)
+                ]
+                assert not Enrollment.objects.filter(subject__code=DEMO_SUBJECT_CODE).exists()
+
+        assert Enrollment.objects.filter(subject__code=DEMO_SUBJECT_CODE).count() == 3
+        teacher_notification = Notification.objects.get(recipient=teacher_user)
+        assert teacher_notification.title == f'👥 3 nuevos estudiantes en {DEMO_SUBJECT_CODE}'
+        assert Notification.objects.filter(recipient__in=students, type=Notification.Type.ENROLLMENT_CREATED).count() == 3
+
+    def test_nothing_is_recorded_when_the_block_fails(self, course, django_capture_on_commit_callbacks):
+        """Test that buffered events are dropped when the bulk operation raises"""
+        from notifications.models import NotificationEvent
+        _, enrollment, exercises = course
+        NotificationEvent.objects.all().delete()
+
+        with pytest.raises(RuntimeError):
+            with bulk_changes():
+                StudentExerciseResult.objects.create(enrollment=enrollment, exercise=exercises[0], status='GREEN')
+                raise RuntimeError
+
+        assert not NotificationEvent.objects.exists()
@@ -0,0 +1,68 @@
+"""
+Submission text extraction (PDF/DOCX). Deliberately free of Django imports
+so it can run in the extraction process pool (see `courses.extraction_pool`).
+"""
+import io
+import os
+import time
+
+import docx
+import pypdf
+
+
+class _ExtractionBudget:
+    """Stops extraction once enough text is collected or a limit is reached"""
+
+    def __init__(self, max_chars, max_items, cpu_seconds):
+        self.max_chars = max_chars
+        self.max_items = max_items
+        # CPU time of the calling thread, so time spent waiting on other threads does not count
+        self.deadline = time.thread_time() + cpu_seconds
+        self.parts = []
+        self.size = 0
+
+    def add(self, text) -> bool:
+        """Append a page/paragraph; returns False when extraction should stop"""
+        if text:
+            if not self.size:
+                text = text.lstrip()
+            self.parts.append(text)
+            self.size += len(text)
+        return (
+            self.size < self.max_chars
+            and len(self.parts) < self.max_items
+            and time.thread_time() < self.deadline
+        )
+
+    def text(self) -> str:
+        return "".join(self.parts).strip()[:self.max_chars]
+
+
+def extract_text(content: bytes, file_name: str, max_chars: int, max_pages: int,
+                 max_paragraphs: int, cpu_seconds: float):
+    """
+    Text of a PDF/DOCX document, read one page/paragraph at a time until
+    `max_chars`, the page/paragraph cap or the CPU time budget is reached
+    (checked between pages). Returns None for unsupported or broken files.
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+    try:
+        if ext == '.pdf':
+            budget = _ExtractionBudget(max_chars, max_pages, cpu_seconds)
+            reader = pypdf.PdfReader(io.BytesIO(content))
+            for page in reader.pages:
+                if not budget.add((page.extract_text() or "") + "\n"):
+                    break
+        elif ext in ['.docx', '.doc']:
+            budget = _ExtractionBudget(max_chars, max_paragraphs, cpu_seconds)
+            doc = docx.Document(io.BytesIO(content))
+            for para in doc.paragraphs:
+                if not budget.add(para.text + "\n"):
+                    break
+        else:
+            return None # Unsupported format for text extraction
+
+        return budget.text()
+    except Exception as e:
+        print(f"Error extracting text from {file_name}: {e}")
+        return None
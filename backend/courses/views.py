@@ -3,15 +3,21 @@ import csv
 import io
 from typing import List, Dict
 
-from django.db.models import Count, Q
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from rest_framework import viewsets, permissions, status, decorators, parsers, views
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 
 from accounts.ratelimit import ratelimit_upload
+from config.pagination import KeysetPagination, RosterKeysetPagination, ScheduleKeysetPagination
+from notifications.unread import course_notification_counter
 from django.utils.decorators import method_decorator
 from drf_spectacular.utils import extend_schema, OpenApiTypes, OpenApiParameter, inline_serializer
 from rest_framework import serializers
@@ -23,6 +29,8 @@ from .models import (
     StudentExerciseResult,
     Notification,
     CalendarEvent,
+    stats_from_counts,
+    with_result_counts,
 )
 from .serializers import (
     SubjectSerializer,
@@ -35,13 +43,51 @@ from .serializers import (
 )
 from .permissions import (
     IsOwnerTeacherOrAdmin,
+    IsTeacherOrAdmin,
+)
+from .ai_cache import file_digest
+from .ai_service import generate_grading_feedback
+from .tasks import (
+    enqueue_enrollments_import,
+    enqueue_exercise_grading,
+    enqueue_grading,
+    enqueue_results_import,
 )
-from .ai_service import generate_grading_feedback, grade_submission
-from .services import process_enrollments_csv, process_results_csv
 from .validators import validate_file_content
 
 User = get_user_model()
 
+# Rows fetched per round trip when streaming CSV exports
+EXPORT_CHUNK_SIZE = 2000
+
+JOB_ACCEPTED_RESPONSE = inline_serializer(
+    name="JobAcceptedResponse",
+    fields={
+        "job_id": serializers.IntegerField(),
+        "status": serializers.CharField(),
+        "status_url": serializers.CharField(),
+    },
+)
+
+
+def job_accepted(job):
+    """202 response pointing the client at the background job status endpoint"""
+    return Response(
+        {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": reverse("job-detail", kwargs={"pk": job.id}),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+class _EchoBuffer:
+    """File-like object that hands each CSV line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
 
 class SubjectViewSet(viewsets.ModelViewSet):
     serializer_class = SubjectSerializer
@@ -88,7 +134,13 @@ class SubjectViewSet(viewsets.ModelViewSet):
     def enrollments(self, request, pk=None):
         subject = self.get_object()
         if request.method == "GET":
-            enrollments = subject.enrollments.select_related("student")
+            enrollments = subject.enrollments.select_related("student").annotate(
+                student_first_name=F("student__first_name"),
+                student_last_name=F("student__last_name"),
+                student_email=F("student__email"),
+            )
+            paginator = RosterKeysetPagination()
+            page = paginator.paginate_queryset(enrollments, request, view=self)
             data = [
                 {
                     "id": e.id,
@@ -100,9 +152,11 @@ class SubjectViewSet(viewsets.ModelViewSet):
                     },
                     "created_at": e.created_at,
                 }
-                for e in enrollments
+                for e in (enrollments if page is None else page)
             ]
-            return Response(data)
+            if page is None:
+                return Response(data)
+            return paginator.get_paginated_response(data)
         else:
             serializer = EnrollmentSerializer(
                 data=request.data, context={"request": request, "subject": subject}
@@ -115,20 +169,12 @@ class SubjectViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Upload enrollments via CSV",
-        description="Upload a CSV file to bulk enroll students. Required columns: email. Optional: first_name, last_name.",
+        description=(
+            "Upload a CSV file to bulk enroll students. Required columns: email. Optional: first_name, last_name. "
+            "The import runs in the background; poll the returned job for the created/existed/errors report."
+        ),
         request=CSVUploadSerializer,
-        responses={
-            200: inline_serializer(
-                name="EnrollmentCSVResponse",
-                fields={
-                    "created": serializers.IntegerField(),
-                    "existed": serializers.IntegerField(),
-                    "errors": serializers.ListField(
-                        child=serializers.DictField()
-                    ),
-                },
-            )
-        },
+        responses={202: JOB_ACCEPTED_RESPONSE},
     )
     @decorators.action(
         detail=True,
@@ -143,16 +189,15 @@ class SubjectViewSet(viewsets.ModelViewSet):
         file_serializer.is_valid(raise_exception=True)
 
         try:
-            result = process_enrollments_csv(
-                subject, file_serializer.validated_data["file"]
+            job = enqueue_enrollments_import(
+                subject, file_serializer.validated_data["file"], request.user
             )
-            return Response(result)
         except Exception as e:
             # If it's a specific validation error from the service
             if hasattr(e, "detail"):
                 return Response(e.detail, status=400)
-            # Generic error fallback (though validation errors are preferred)
             return Response({"detail": str(e)}, status=400)
+        return job_accepted(job)
 
     @extend_schema(
         summary="Get subject dashboard",
@@ -177,13 +222,16 @@ class SubjectViewSet(viewsets.ModelViewSet):
     def dashboard(self, request, pk=None):
         subject = self.get_object()
         exercises_count = subject.exercises.count()
-        enrollments = subject.enrollments.select_related("student").all()
+        # One grouped query for every enrollment; grade rules are applied in Python
+        enrollments = with_result_counts(
+            Enrollment.objects.filter(subject=subject).select_related("student")
+        )
 
         items = []
         grades = []
         greens = yellows = reds = totals = 0
         for e in enrollments:
-            s = e.stats()
+            s = stats_from_counts(e.n_total, e.n_green, e.n_yellow, e.n_red)
             items.append(
                 {
                     "enrollment_id": e.id,
@@ -227,45 +275,38 @@ class SubjectViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=True, methods=["get"], url_path="export-csv")
     def export_csv(self, request, pk=None):
         subject = self.get_object()
-        # Prepare CSV with header: student_email, total, green, yellow, red, grade
-        response = HttpResponse(content_type="text/csv")
+        # Rows are streamed from a chunked server-side cursor so memory stays
+        # flat regardless of roster size; stats come from one grouped query,
+        # which drops Meta.ordering, so the student order is spelled out.
+        rows = (
+            with_result_counts(Enrollment.objects.filter(subject=subject))
+            .order_by("student__first_name", "student__last_name", "student__email")
+            .values_list("student__email", "n_total", "n_green", "n_yellow", "n_red")
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        writer = csv.writer(_EchoBuffer())
+
+        def stream():
+            # Header goes out before the result set is read
+            yield writer.writerow(["student_email", "total", "green", "yellow", "red", "grade"])
+            for email, total, green, yellow, red in rows:
+                s = stats_from_counts(total, green, yellow, red)
+                yield writer.writerow([email, total, green, yellow, red, s["grade"]])
+
+        response = StreamingHttpResponse(stream(), content_type="text/csv")
         response["Content-Disposition"] = (
             f'attachment; filename="{subject.code}_consolidado.csv"'
         )
-
-        writer = csv.writer(response)
-        writer.writerow(["student_email", "total", "green", "yellow", "red", "grade"])
-        for e in subject.enrollments.select_related("student").all():
-            s = e.stats()
-            writer.writerow(
-                [
-                    e.student.email,
-                    s["total"],
-                    s["green"],
-                    s["yellow"],
-                    s["red"],
-                    s["grade"],
-                ]
-            )
         return response
 
     @extend_schema(
         summary="Upload results via CSV",
-        description="Upload a CSV file to bulk upload results. Required columns: student_email, exercise_name, status.",
+        description=(
+            "Upload a CSV file to bulk upload results. Required columns: student_email, exercise_name, status. "
+            "The import runs in the background; poll the returned job for the created/updated/skipped/errors report."
+        ),
         request=CSVUploadSerializer,
-        responses={
-            200: inline_serializer(
-                name="ResultsCSVResponse",
-                fields={
-                    "created": serializers.IntegerField(),
-                    "updated": serializers.IntegerField(),
-                    "skipped": serializers.IntegerField(),
-                    "errors": serializers.ListField(
-                        child=serializers.DictField()
-                    ),
-                },
-            )
-        },
+        responses={202: JOB_ACCEPTED_RESPONSE},
     )
     @decorators.action(
         detail=True,
@@ -278,17 +319,16 @@ class SubjectViewSet(viewsets.ModelViewSet):
         subject = self.get_object()
         file_serializer = CSVUploadSerializer(data=request.data)
         file_serializer.is_valid(raise_exception=True)
-        f = file_serializer.validated_data["file"]
 
         try:
-            result = process_results_csv(
-                subject, file_serializer.validated_data["file"]
+            job = enqueue_results_import(
+                subject, file_serializer.validated_data["file"], request.user
             )
-            return Response(result)
         except Exception as e:
             if hasattr(e, "detail"):
                 return Response(e.detail, status=400)
             return Response({"detail": str(e)}, status=400)
+        return job_accepted(job)
 
 
 class ExerciseViewSet(viewsets.ModelViewSet):
@@ -309,9 +349,17 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         # Students see exercises for enrolled subjects
         return qs.filter(subject__enrollments__student=user).distinct()
 
+    def get_permissions(self):
+        if self.action == "grade_submissions":
+            return [permissions.IsAuthenticated(), IsTeacherOrAdmin(), IsOwnerTeacherOrAdmin()]
+        return super().get_permissions()
+
     @extend_schema(
         summary="Submit exercise solution",
-        description="Submit a solution file or text.",
+        description=(
+            "Submit a solution file or text. The result is saved as SUBMITTED and AI grading "
+            "runs in the background; poll `status_url` or the result for the grade."
+        ),
         request=inline_serializer(
             name="SubmissionRequest",
             fields={
@@ -319,7 +367,7 @@ class ExerciseViewSet(viewsets.ModelViewSet):
                 "submission_text": serializers.CharField(required=False),
             },
         ),
-        responses={200: StudentExerciseResultSerializer},
+        responses={202: StudentExerciseResultSerializer},
     )
     @decorators.action(
         detail=True,
@@ -373,6 +421,9 @@ class ExerciseViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             result.submission_file = submission_file
+            # Only hash the upload here; the grading job parses it and stores
+            # the text that AI grading and feedback reuse
+            result.submission_sha256 = file_digest(submission_file)
 
         if submission_text:
             if len(submission_text) > 5000:
@@ -385,43 +436,47 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         result.status = "SUBMITTED"
         result.save()
 
-        # AI Auto-Grading
-        try:
-            file_handle = None
-            file_name = None
-
-            if result.submission_file:
-                file_handle = result.submission_file.open("rb")
-                file_name = result.submission_file.name
-
-            grading_result = grade_submission(
-                exercise_description=exercise.description,
-                submission_file=file_handle,
-                submission_file_name=file_name,
-                submission_text=result.submission_text,
-            )
-
-            if file_handle:
-                file_handle.close()
-
-            result.status = grading_result["status"]
-            result.comment = grading_result["feedback"]
-            result.save()
-
-            # Notify Teacher about AI grading
-            Notification.objects.create(
-                user=exercise.subject.teacher,
-                notification_type=Notification.NotificationType.GENERAL,
-                title=f"🤖 IA Calificó: {exercise.name}",
-                message=f"La IA asignó {result.get_status_display()} a {enrollment.student.email}. Revisa si es correcto.",
-                link=f"/subjects/{exercise.subject.id}",
-            )
+        # AI auto-grading runs in a background worker; poll the job (or the
+        # result) to see the grade once it is ready
+        job = enqueue_grading(result, user)
+        data = StudentExerciseResultSerializer(result).data
+        data["job_id"] = job.id
+        data["status_url"] = reverse("job-detail", kwargs={"pk": job.id})
+        return Response(data, status=status.HTTP_202_ACCEPTED)
 
-        except Exception as e:
-            print(f"Auto-grading failed: {e}")
-            # Keep as SUBMITTED if AI fails
+    @extend_schema(
+        summary="AI-grade all pending submissions",
+        description=(
+            "Grade every SUBMITTED result of the exercise with AI in a background job. "
+            "Model calls run concurrently (optional `concurrency`, capped by the server); "
+            "the job's partial result lists each graded submission as it completes and "
+            "all grades are saved together at the end."
+        ),
+        request=inline_serializer(
+            name="BulkGradingRequest",
+            fields={"concurrency": serializers.IntegerField(required=False, min_value=1)},
+        ),
+        responses={202: JOB_ACCEPTED_RESPONSE},
+    )
+    @decorators.action(detail=True, methods=["post"], url_path="grade-submissions")
+    def grade_submissions(self, request, pk=None):
+        exercise = self.get_object()
+        pending = StudentExerciseResult.objects.filter(
+            exercise=exercise, status=StudentExerciseResult.Status.SUBMITTED
+        ).count()
+        if not pending:
+            return Response({"detail": "No hay entregas pendientes de calificar.", "total": 0})
 
-        return Response(StudentExerciseResultSerializer(result).data)
+        try:
+            concurrency = int(request.data.get("concurrency") or settings.AI_BULK_GRADING_CONCURRENCY)
+        except (TypeError, ValueError):
+            return Response({"detail": "concurrency debe ser un número entero."}, status=400)
+        concurrency = max(1, min(concurrency, settings.AI_BULK_GRADING_CONCURRENCY))
+
+        job = enqueue_exercise_grading(exercise, request.user, concurrency)
+        response = job_accepted(job)
+        response.data["total"] = pending
+        return response
 
 
 class EnrollmentResultsView(viewsets.ViewSet):
@@ -477,7 +532,7 @@ class EnrollmentResultsView(viewsets.ViewSet):
                 "enrollment_id": enrollment.id,
                 "student_email": enrollment.student.email,
                 "results": data,
-                "stats": enrollment.stats(),
+                "stats": enrollment.stored_stats(),
             }
         )
 
@@ -490,6 +545,7 @@ class StudentExerciseResultViewSet(viewsets.ModelViewSet):
 
     serializer_class = StudentExerciseResultSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -675,6 +731,7 @@ class StudentExerciseResultViewSet(viewsets.ModelViewSet):
         # Try to find the student result to get the submission file
         submission_file = None
         submission_file_name = None
+        submission_file_hash = None
         try:
             # Find the student user first
             student_user = User.objects.get(email=student_email)
@@ -689,6 +746,7 @@ class StudentExerciseResultViewSet(viewsets.ModelViewSet):
             if result.submission_file:
                 submission_file = result.submission_file.open("rb")
                 submission_file_name = result.submission_file.name
+                submission_file_hash = result.submission_sha256 or None
         except (
             User.DoesNotExist,
             Enrollment.DoesNotExist,
@@ -704,6 +762,7 @@ class StudentExerciseResultViewSet(viewsets.ModelViewSet):
                 current_comment=current_comment,
                 submission_file=submission_file,
                 submission_file_name=submission_file_name,
+                submission_file_hash=submission_file_hash,
             )
             return Response({"feedback": feedback})
         except Exception as e:
@@ -726,7 +785,9 @@ class MyEnrollmentsView(views.APIView):
         user = request.user
         if getattr(user, "role", None) != "STUDENT":
             return Response({"detail": "No autorizado."}, status=403)
-        enrollments = Enrollment.objects.filter(student=user).select_related("subject")
+        enrollments = Enrollment.objects.filter(student=user).select_related(
+            "subject", "grade_stats"
+        )
         items = []
         for e in enrollments:
             items.append(
@@ -735,7 +796,7 @@ class MyEnrollmentsView(views.APIView):
                     "subject_id": e.subject.id,
                     "subject_code": e.subject.code,
                     "subject_name": e.subject.name,
-                    "stats": e.stats(),
+                    "stats": e.stored_stats(),
                 }
             )
         return Response({"enrollments": items})
@@ -749,6 +810,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Return notifications for the current user"""
@@ -760,12 +822,18 @@ class NotificationViewSet(viewsets.ModelViewSet):
         # Users can only list and update their own notifications
         return super().get_permissions()
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.is_read:
+            course_notification_counter.adjust({instance.user_id: -1})
+
     @decorators.action(detail=False, methods=["post"], url_path="mark-all-read")
     def mark_all_read(self, request):
         """Mark all notifications as read for current user"""
         updated = Notification.objects.filter(user=request.user, is_read=False).update(
             is_read=True
         )
+        course_notification_counter.adjust({request.user.id: -updated})
         return Response(
             {
                 "message": f"{updated} notificaciones marcadas como le\u00eddas",
@@ -777,8 +845,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_read(self, request, pk=None):
         """Mark a single notification as read"""
         notification = self.get_object()
+        updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(
+            is_read=True
+        )
+        course_notification_counter.adjust({request.user.id: -updated})
         notification.is_read = True
-        notification.save(update_fields=["is_read"])
         return Response(
             {
                 "message": "Notificación marcada como leída",
@@ -786,17 +857,25 @@ class NotificationViewSet(viewsets.ModelViewSet):
             }
         )
 
-    @decorators.action(detail=False, methods=["get"], url_path="unread-count")
+    @decorators.action(
+        detail=False,
+        methods=["get"],
+        url_path="unread-count",
+        authentication_classes=[JWTStatelessUserAuthentication],
+    )
     def unread_count(self, request):
-        """Get count of unread notifications"""
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({"unread_count": count})
+        """
+        Get count of unread notifications. Polled by the notification bell, so
+        the user comes from the token claims and the count from the cache.
+        """
+        return Response({"unread_count": course_notification_counter.get(request.user.id)})
 
     @decorators.action(detail=False, methods=["post"], url_path="delete-all")
     def delete_all(self, request):
         """Delete all notifications for current user"""
         count = Notification.objects.filter(user=request.user).count()
         Notification.objects.filter(user=request.user).delete()
+        course_notification_counter.invalidate([request.user.id])
         return Response(
             {"message": f"{count} notificaciones eliminadas", "deleted": count}
         )
@@ -824,15 +903,27 @@ class StudentDashboardView(views.APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Obtener todas las inscripciones del estudiante
-        enrollments = Enrollment.objects.filter(student=user).select_related("subject")
+        # Inscripciones con el total de ejercicios y los conteos por estado
+        # de cada materia en una sola consulta agrupada
+        exercise_count = (
+            Exercise.objects.filter(subject=OuterRef("subject"))
+            .order_by()
+            .values("subject")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        enrollments = list(
+            with_result_counts(Enrollment.objects.filter(student=user))
+            .annotate(n_exercises=Coalesce(Subquery(exercise_count), 0))
+            .select_related("subject")
+            .order_by("id")
+        )
 
         # Resumen general
-        all_results = StudentExerciseResult.objects.filter(enrollment__student=user)
-        total_results = all_results.count()
-        green_count = all_results.filter(status="GREEN").count()
-        yellow_count = all_results.filter(status="YELLOW").count()
-        red_count = all_results.filter(status="RED").count()
+        total_results = sum(e.n_total for e in enrollments)
+        green_count = sum(e.n_green for e in enrollments)
+        yellow_count = sum(e.n_yellow for e in enrollments)
+        red_count = sum(e.n_red for e in enrollments)
 
         # Calcular porcentaje de éxito
         success_rate = (
@@ -843,19 +934,10 @@ class StudentDashboardView(views.APIView):
         subjects_progress = []
         for enrollment in enrollments:
             subject = enrollment.subject
-
-            # Obtener todos los ejercicios de la materia
-            all_exercises = Exercise.objects.filter(subject=subject)
-            total_exercises = all_exercises.count()
-
-            # Obtener resultados del estudiante en esta materia
-            results = StudentExerciseResult.objects.filter(enrollment=enrollment)
-            completed_exercises = results.count()
-
-            # Contar por estado
-            green = results.filter(status="GREEN").count()
-            yellow = results.filter(status="YELLOW").count()
-            red = results.filter(status="RED").count()
+            total_exercises = enrollment.n_exercises
+            # Hay un resultado por ejercicio como máximo
+            completed_exercises = enrollment.n_total
+            green = enrollment.n_green
 
             # Calcular porcentaje de completado
             completion_rate = (
@@ -864,10 +946,6 @@ class StudentDashboardView(views.APIView):
                 else 0
             )
 
-            # Ejercicios pendientes de esta materia
-            completed_exercise_ids = results.values_list("exercise_id", flat=True)
-            pending_exercises = all_exercises.exclude(id__in=completed_exercise_ids)
-
             subjects_progress.append(
                 {
                     "subject_id": subject.id,
@@ -875,26 +953,30 @@ class StudentDashboardView(views.APIView):
                     "subject_code": subject.code,
                     "total_exercises": total_exercises,
                     "completed_exercises": completed_exercises,
-                    "pending_exercises": pending_exercises.count(),
+                    "pending_exercises": max(total_exercises - completed_exercises, 0),
                     "completion_rate": completion_rate,
                     "green_count": green,
-                    "yellow_count": yellow,
-                    "red_count": red,
+                    "yellow_count": enrollment.n_yellow,
+                    "red_count": enrollment.n_red,
                     "success_rate": round((green / completed_exercises * 100), 1)
                     if completed_exercises > 0
                     else 0,
                 }
             )
 
-        # Ejercicios pendientes (todos)
-        all_enrolled_subjects = enrollments.values_list("subject_id", flat=True)
-        all_subject_exercises = Exercise.objects.filter(
-            subject_id__in=all_enrolled_subjects
-        ).select_related("subject")
-        completed_exercise_ids = all_results.values_list("exercise_id", flat=True)
-        pending_exercises_queryset = all_subject_exercises.exclude(
-            id__in=completed_exercise_ids
-        ).order_by("-id")[:10]
+        # Ejercicios pendientes (todos): ejercicios sin resultado del estudiante (anti-join)
+        pending_exercises_queryset = (
+            Exercise.objects.filter(subject_id__in=[e.subject_id for e in enrollments])
+            .exclude(
+                Exists(
+                    StudentExerciseResult.objects.filter(
+                        exercise=OuterRef("pk"), enrollment__student=user
+                    )
+                )
+            )
+            .select_related("subject")
+            .order_by("-id")[:10]
+        )
 
         pending_exercises = []
         for exercise in pending_exercises_queryset:
@@ -911,9 +993,10 @@ class StudentDashboardView(views.APIView):
                 }
             )
 
+        all_results = StudentExerciseResult.objects.filter(enrollment__student=user)
         # Últimos resultados
         recent_results = all_results.select_related(
-            "exercise__subject", "enrollment"
+            "exercise", "enrollment__subject"
         ).order_by("-created_at")[:5]
         recent_results_data = []
         for result in recent_results:
@@ -937,8 +1020,9 @@ class StudentDashboardView(views.APIView):
                     "yellow_count": yellow_count,
                     "red_count": red_count,
                     "success_rate": success_rate,
-                    "total_subjects": enrollments.count(),
-                    "total_pending": pending_exercises_queryset.count(),
+                    "total_subjects": len(enrollments),
+                    # Every pending exercise; only the pending_exercises list is capped at 10
+                    "total_pending": sum(p["pending_exercises"] for p in subjects_progress),
                 },
                 "subjects_progress": subjects_progress,
                 "pending_exercises": pending_exercises,
@@ -950,6 +1034,7 @@ class StudentDashboardView(views.APIView):
 class CalendarViewSet(viewsets.ModelViewSet):
     serializer_class = CalendarEventSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ScheduleKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -19,7 +19,12 @@ backlog = 2048
 # Número de workers: limitado para entornos de producción con recursos compartidos
 # Railway/Heroku recomiendan 2-4 workers para planes básicos
 workers = int(os.getenv("WEB_CONCURRENCY", "4"))  # Default: 4 workers
-worker_class = "sync"
+# "sync" sirve config.wsgi: ahí el stream SSE (/api/v1/notifs/stream/) no se
+# ofrece, porque ocuparía un worker por pestaña, y el frontend sigue con
+# polling (y no se guardan eventos para él). Para activarlo, servir
+# config.asgi con GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+# (requiere uvicorn), o STREAM_ENABLED=True con otro servidor ASGI
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
 worker_connections = 1000
 max_requests = 1000  # Reiniciar workers después de N requests (previene memory leaks)
 max_requests_jitter = 50  # Añade aleatoriedad para evitar reinicios simultáneos
@@ -72,6 +77,20 @@ def when_ready(server):
     print(f"📊 Workers: {workers}")
     print(f"🔗 Bind: {bind}")
 
+def post_worker_init(worker):
+    """Called just after a worker has loaded the application."""
+    # Start the document parsing processes before the first upload arrives
+    from courses import extraction_pool
+    try:
+        extraction_pool.warm_up()
+    except Exception as e:
+        worker.log.warning("No se pudo iniciar el pool de extracción: %s", e)
+
+def worker_exit(server, worker):
+    """Called just after a worker has been exited."""
+    from courses import extraction_pool
+    extraction_pool.shutdown()
+
 def on_exit(server):
     """Called just before exiting Gunicorn."""
     print("👋 Gunicorn se está deteniendo...")
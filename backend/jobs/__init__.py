@@ -0,0 +1 @@
+# background jobs app package
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "progress", "attempts", "created_by", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    search_fields = ("kind", "created_by__email", "error")
+    readonly_fields = ("created_at", "updated_at", "finished_at", "locked_by", "locked_at")
@@ -0,0 +1,131 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.services import default_worker_name, work
+
+
+def _warm_up_extraction():
+    # Document parsing for AI grading runs in a per-process pool; start it now
+    from courses import extraction_pool
+    extraction_pool.warm_up()
+
+
+def _process_worker(name, stop_event, burst, poll_interval, kinds):
+    django.setup()
+    # Never reuse a connection inherited from the parent process
+    connections.close_all()
+    # Ctrl+C goes to the whole process group and SIGTERM may too (e.g. a
+    # platform restart): stop claiming jobs, but finish the current one
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    _warm_up_extraction()
+    try:
+        work(name, stop_event, burst=burst, poll_interval=poll_interval, manage_connections=True, kinds=kinds)
+    finally:
+        connections.close_all()
+
+
+def _thread_worker(name, stop_event, burst, poll_interval, kinds):
+    try:
+        work(name, stop_event, burst=burst, poll_interval=poll_interval, manage_connections=True, kinds=kinds)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (CSV imports, AI grading, emails...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.JOBS_WORKERS,
+            help=f"Number of concurrent workers (default: {settings.JOBS_WORKERS})",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=["threads", "processes"],
+            default="threads",
+            help="Run workers as threads (I/O-bound jobs) or processes (CPU-bound jobs)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--kinds",
+            nargs="+",
+            help="Only run these job kinds (e.g. a dedicated courses.grade_submission pool)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no runnable job is left instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        mode = options["mode"]
+        burst = options["burst"]
+        poll_interval = options["poll_interval"]
+        kinds = options["kinds"]
+        if workers < 1:
+            raise CommandError("--workers debe ser mayor que 0")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(f"Iniciando {workers} worker(s) en modo {mode}")
+        )
+        if kinds:
+            self.stdout.write(f"Tipos de tarea: {', '.join(kinds)}")
+
+        if mode == "processes":
+            stop_event = multiprocessing.Event()
+            # Forked workers must not share the parent's DB connections
+            connections.close_all()
+            runners = [
+                multiprocessing.Process(
+                    target=_process_worker,
+                    args=(f"{default_worker_name()}-p{i}", stop_event, burst, poll_interval, kinds),
+                    name=f"job-worker-{i}",
+                )
+                for i in range(workers)
+            ]
+        else:
+            stop_event = threading.Event()
+            _warm_up_extraction()
+            runners = [
+                threading.Thread(
+                    target=_thread_worker,
+                    args=(f"{default_worker_name()}-t{i}", stop_event, burst, poll_interval, kinds),
+                    name=f"job-worker-{i}",
+                    daemon=True,
+                )
+                for i in range(workers)
+            ]
+
+        def stop(signum, frame):
+            # Running jobs are finished; their locks are refreshed until then
+            if not stop_event.is_set():
+                self.stdout.write("Deteniendo workers (terminando las tareas en curso)...")
+                stop_event.set()
+
+        previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for runner in runners:
+                runner.start()
+            for runner in runners:
+                while runner.is_alive():
+                    runner.join(timeout=1.0)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+        self.stdout.write(self.style.SUCCESS("Workers detenidos"))
@@ -0,0 +1,54 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class Job(models.Model):
+    """
+    A unit of background work (CSV import, AI grading, email...).
+    Views enqueue jobs and `run_workers` claims and executes them.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendiente'
+        RUNNING = 'RUNNING', 'En ejecución'
+        SUCCEEDED = 'SUCCEEDED', 'Completado'
+        FAILED = 'FAILED', 'Fallido'
+
+    kind = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    payload = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Porcentaje completado (0-100)")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job {self.id} {self.kind} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    def set_progress(self, progress: int, result=None):
+        """Persist progress (and optionally a partial result) without touching the rest of the row"""
+        self.progress = max(0, min(100, int(progress)))
+        fields = {"progress": self.progress, "updated_at": timezone.now()}
+        if result is not None:
+            self.result = fields["result"] = result
+        Job.objects.filter(pk=self.pk).update(**fields)
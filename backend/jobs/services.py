@@ -0,0 +1,230 @@
+from __future__ import annotations
+import logging
+import socket
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers: Dict[str, Callable[[Job], Any]] = {}
+# kind -> maximum number of jobs of that kind RUNNING at once across all workers
+_concurrency: Dict[str, int] = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (e.g. invalid input)."""
+
+
+def register(kind: str, max_concurrency: int | None = None):
+    """
+    Decorator registering `func(job) -> result` as the handler for `kind`.
+    `max_concurrency` caps how many jobs of this kind run at once, so slow
+    external calls cannot occupy every worker.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        if max_concurrency:
+            _concurrency[kind] = max_concurrency
+        else:
+            _concurrency.pop(kind, None)
+        return func
+    return decorator
+
+
+def get_handler(kind: str):
+    return _handlers.get(kind)
+
+
+def enqueue(kind: str, payload: dict | None = None, user=None, max_attempts: int | None = None) -> Job:
+    """Create a pending job. Handlers must be registered before enqueueing."""
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if getattr(user, "pk", None) else None,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def _saturated_kinds(stale) -> list:
+    """Kinds that already have `max_concurrency` live RUNNING jobs"""
+    if not _concurrency:
+        return []
+    running = (
+        Job.objects.filter(status=Job.Status.RUNNING, kind__in=_concurrency, locked_at__gte=stale)
+        .values("kind")
+        .annotate(n=Count("id"))
+    )
+    return [row["kind"] for row in running if row["n"] >= _concurrency[row["kind"]]]
+
+
+def claim_next_job(worker_name: str, kinds=None) -> Job | None:
+    """
+    Lock and mark as RUNNING the oldest runnable job, optionally restricted
+    to `kinds`. Jobs left RUNNING by a crashed worker become claimable again
+    after JOBS_LOCK_TIMEOUT seconds. Kinds at their concurrency cap are
+    skipped (the cap is checked before claiming, so it is a soft limit).
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    runnable = Q(status=Job.Status.PENDING, run_after__lte=now) | Q(
+        status=Job.Status.RUNNING, locked_at__lt=stale
+    )
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        candidates = Job.objects.select_for_update(skip_locked=skip_locked).filter(runnable)
+        if kinds:
+            candidates = candidates.filter(kind__in=kinds)
+        saturated = _saturated_kinds(stale)
+        if saturated:
+            candidates = candidates.exclude(kind__in=saturated)
+        job = candidates.order_by("run_after", "id").first()
+        if job is None:
+            return None
+        # Conditional update so backends without row locks (SQLite) cannot double-claim
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, locked_at=job.locked_at
+        ).update(
+            status=Job.Status.RUNNING,
+            locked_by=worker_name[:100],
+            locked_at=now,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def _refresh_lock(job: Job) -> bool:
+    """Push back the stale deadline of a job this worker still holds"""
+    return bool(
+        Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by)
+        .update(locked_at=timezone.now())
+    )
+
+
+@contextmanager
+def _heartbeat(job: Job):
+    """
+    Refresh the job's lock every JOBS_HEARTBEAT_INTERVAL seconds while it
+    runs, so a job outliving JOBS_LOCK_TIMEOUT is not claimed again by
+    another worker; only the lock of a dead worker goes stale.
+    """
+    interval = settings.JOBS_HEARTBEAT_INTERVAL
+    if interval <= 0:
+        yield
+        return
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                _refresh_lock(job)
+        except Exception as e:
+            logger.warning("Could not refresh the lock of job %s: %s", job.pk, e)
+        finally:
+            connection.close()  # the thread's own connection
+
+    thread = threading.Thread(target=beat, name=f"job-{job.pk}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _finish(job: Job, **fields):
+    fields.setdefault("updated_at", timezone.now())
+    Job.objects.filter(pk=job.pk).update(locked_by="", locked_at=None, **fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run_job(job: Job) -> Job:
+    """Execute a claimed job and record success, retry with backoff, or failure."""
+    handler = get_handler(job.kind)
+    now = timezone.now()
+    if handler is None:
+        _finish(job, status=Job.Status.FAILED, error=f"Tipo de tarea desconocido: {job.kind}", finished_at=now)
+        return job
+
+    try:
+        with _heartbeat(job):
+            result = handler(job)
+    except PermanentJobError as e:
+        _finish(job, status=Job.Status.FAILED, error=str(e), finished_at=timezone.now())
+    except Exception as e:
+        logger.warning("Job %s (%s) failed on attempt %s: %s", job.pk, job.kind, job.attempts, e)
+        if job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+            _finish(
+                job,
+                status=Job.Status.PENDING,
+                error=traceback.format_exc(limit=5),
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        else:
+            _finish(job, status=Job.Status.FAILED, error=traceback.format_exc(limit=5), finished_at=timezone.now())
+    else:
+        _finish(
+            job,
+            status=Job.Status.SUCCEEDED,
+            result=result,
+            error="",
+            progress=100,
+            finished_at=timezone.now(),
+        )
+    return job
+
+
+def work(worker_name: str | None = None, stop_event: threading.Event | None = None,
+         burst: bool = False, poll_interval: float | None = None,
+         manage_connections: bool = False, kinds=None) -> int:
+    """
+    Claim and run jobs (of `kinds` only, if given) until `stop_event` is set,
+    or until the queue has no runnable job when `burst` is True. A job that
+    is running when `stop_event` is set is finished first. Returns the
+    number of jobs executed.
+    Long-running workers pass `manage_connections` to recycle stale DB
+    connections between jobs, as Django does between requests.
+    """
+    worker_name = worker_name or default_worker_name()
+    stop_event = stop_event or threading.Event()
+    poll_interval = settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+    executed = 0
+    while not stop_event.is_set():
+        if manage_connections:
+            close_old_connections()
+        job = claim_next_job(worker_name, kinds)
+        if job is None:
+            if burst:
+                break
+            stop_event.wait(poll_interval)
+            continue
+        run_job(job)
+        executed += 1
+    return executed
+
+
+def run_pending_jobs(kinds=None) -> int:
+    """Run every currently runnable job in the calling thread."""
+    return work(burst=True, kinds=kinds)
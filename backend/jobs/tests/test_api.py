@@ -0,0 +1,236 @@
+import io
+import os
+import signal
+import time
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.services import PermanentJobError, claim_next_job, enqueue, register, run_job, run_pending_jobs
+
+
+@register('tests.echo')
+def echo(job):
+    if job.payload.get('fail') == 'permanent':
+        raise PermanentJobError('Datos inválidos')
+    if job.payload.get('fail') == 'transient' and job.attempts < 2:
+        raise RuntimeError('Servicio no disponible')
+    return {'echo': job.payload.get('value')}
+
+
+@register('tests.slow')
+def slow(job):
+    time.sleep(job.payload.get('seconds', 0))
+    if job.payload.get('sigterm'):
+        os.kill(os.getpid(), signal.SIGTERM)
+    return {'locked_at': Job.objects.get(pk=job.pk).locked_at.isoformat()}
+
+
+@pytest.mark.django_db
+class TestJobWorker:
+    """Tests for claiming and running background jobs"""
+
+    def test_enqueue_unknown_kind(self):
+        """Test that enqueueing a kind without handler is rejected"""
+        with pytest.raises(ValueError):
+            enqueue('tests.unknown')
+
+    def test_run_job_success(self, teacher_user):
+        """Test that a claimed job stores its result"""
+        job = enqueue('tests.echo', {'value': 42}, user=teacher_user)
+
+        assert run_pending_jobs() == 1
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.result == {'echo': 42}
+        assert job.progress == 100
+        assert job.attempts == 1
+        assert job.finished_at is not None
+        assert job.locked_by == ''
+
+    def test_claim_skips_running_and_delayed_jobs(self):
+        """Test that a job cannot be claimed twice or before run_after"""
+        job = enqueue('tests.echo')
+        delayed = enqueue('tests.echo')
+        Job.objects.filter(pk=delayed.pk).update(run_after=timezone.now() + timedelta(minutes=5))
+
+        assert claim_next_job('w1').pk == job.pk
+        assert claim_next_job('w2') is None
+
+    def test_stale_running_job_is_reclaimed(self, settings):
+        """Test that a job abandoned by a crashed worker is claimed again"""
+        settings.JOBS_LOCK_TIMEOUT = 60
+        job = enqueue('tests.echo')
+        claim_next_job('w1')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        reclaimed = claim_next_job('w2')
+
+        assert reclaimed.pk == job.pk
+        assert reclaimed.locked_by == 'w2'
+        assert reclaimed.attempts == 2
+
+    def test_transient_error_retries_with_backoff(self, settings):
+        """Test that a failing job is rescheduled with exponential backoff"""
+        settings.JOBS_RETRY_BACKOFF = 10
+        job = enqueue('tests.echo', {'fail': 'transient'})
+
+        run_job(claim_next_job('w1'))
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.PENDING
+        assert 'Servicio no disponible' in job.error
+        assert job.run_after > timezone.now() + timedelta(seconds=5)
+        assert claim_next_job('w1') is None
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.attempts == 2
+
+    def test_job_fails_after_max_attempts(self, settings):
+        """Test that a job is marked failed once attempts are exhausted"""
+        settings.JOBS_RETRY_BACKOFF = 0
+        job = enqueue('tests.echo', {'fail': 'transient'}, max_attempts=1)
+
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.finished_at is not None
+
+    def test_permanent_error_is_not_retried(self):
+        """Test that PermanentJobError fails the job immediately"""
+        job = enqueue('tests.echo', {'fail': 'permanent'})
+
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.error == 'Datos inválidos'
+        assert job.attempts == 1
+
+
+@pytest.mark.django_db
+class TestJobViewSet:
+    """Tests for the job status endpoint"""
+
+    def test_owner_can_poll_job(self, teacher_client, teacher_user):
+        """Test that the creator sees status and result but not the payload"""
+        job = enqueue('tests.echo', {'value': 'ok'}, user=teacher_user)
+        run_pending_jobs()
+
+        response = teacher_client.get(reverse('job-detail', kwargs={'pk': job.pk}))
+
+        assert response.status_code == 200
+        assert response.data['status'] == Job.Status.SUCCEEDED
+        assert response.data['result'] == {'echo': 'ok'}
+        assert 'payload' not in response.data
+
+    def test_other_users_cannot_see_job(self, authenticated_client, teacher_user):
+        """Test that jobs are private to their creator"""
+        job = enqueue('tests.echo', user=teacher_user)
+
+        response = authenticated_client.get(reverse('job-detail', kwargs={'pk': job.pk}))
+
+        assert response.status_code == 404
+
+    def test_admin_sees_all_jobs(self, admin_client, teacher_user):
+        """Test that admins can list every job"""
+        enqueue('tests.echo', user=teacher_user)
+
+        response = admin_client.get(reverse('job-list'))
+
+        assert response.status_code == 200
+        assert len(response.data) == 1
+
+    def test_csv_upload_returns_job(self, teacher_client, teacher_user, run_jobs):
+        """Test that a CSV upload is accepted as a job and its report is served by the status endpoint"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from courses.models import Subject
+
+        subject = Subject.objects.create(name='Math', code='MATH101', teacher=teacher_user)
+        csv_file = SimpleUploadedFile('enrollments.csv', b'email\nnew@test.com', content_type='text/csv')
+
+        response = teacher_client.post(
+            reverse('subject-upload-enrollments-csv', kwargs={'pk': subject.pk}),
+            {'file': csv_file},
+            format='multipart',
+        )
+
+        assert response.status_code == 202
+        assert response.data['status'] == Job.Status.PENDING
+        status_url = response.data['status_url']
+        assert teacher_client.get(status_url).data['status'] == Job.Status.PENDING
+
+        run_jobs()
+
+        data = teacher_client.get(status_url).data
+        assert data['status'] == Job.Status.SUCCEEDED
+        assert data['result']['created'] == 1
+
+
+@register('tests.limited', max_concurrency=1)
+def limited(job):
+    return None
+
+
+@pytest.mark.django_db
+class TestJobConcurrency:
+    """Tests for per-kind concurrency caps and kind filters"""
+
+    def test_kind_at_capacity_is_skipped(self):
+        """Test that a capped kind is not claimed while its limit is reached"""
+        first = enqueue('tests.limited')
+        second = enqueue('tests.limited')
+        other = enqueue('tests.echo')
+
+        assert claim_next_job('w1').pk == first.pk
+        assert claim_next_job('w2').pk == other.pk
+        assert claim_next_job('w3') is None
+
+        run_job(Job.objects.get(pk=first.pk))
+        assert claim_next_job('w3').pk == second.pk
+
+    def test_worker_restricted_to_kinds(self):
+        """Test that a worker only claims the kinds it was started for"""
+        enqueue('tests.echo')
+        limited_job = enqueue('tests.limited')
+
+        assert claim_next_job('w1', kinds=['tests.limited']).pk == limited_job.pk
+        assert claim_next_job('w1', kinds=['tests.limited']) is None
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWorkerLifecycle:
+    """Tests for lock heartbeats and graceful shutdown (real threads and commits)"""
+
+    def test_running_job_lock_is_refreshed(self, settings):
+        """Test that a long job keeps its lock fresh instead of going stale"""
+        settings.JOBS_HEARTBEAT_INTERVAL = 0.05
+        job = enqueue('tests.slow', {'seconds': 0.5})
+        claimed = claim_next_job('w1')
+
+        run_job(claimed)
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.result['locked_at'] > claimed.locked_at.isoformat()
+
+    def test_sigterm_finishes_current_job_and_stops(self):
+        """Test that a restart lets the running job finish and claims nothing else"""
+        first = enqueue('tests.slow', {'seconds': 0.2, 'sigterm': True})
+        second = enqueue('tests.echo')
+        out = io.StringIO()
+
+        call_command('run_workers', '--workers', '1', '--poll-interval', '0.1', stdout=out)
+
+        assert Job.objects.get(pk=first.pk).status == Job.Status.SUCCEEDED
+        assert Job.objects.get(pk=second.pk).status == Job.Status.PENDING
+        assert 'Workers detenidos' in out.getvalue()
@@ -0,0 +1,16 @@
+from rest_framework import viewsets, permissions
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status, progress and result of the current user's background jobs"""
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        if getattr(user, "role", None) == "ADMIN":
+            return Job.objects.all()
+        return Job.objects.filter(created_by=user)
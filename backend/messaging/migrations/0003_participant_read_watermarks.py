@@ -0,0 +1,77 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def watermarks_from_read_flags(apps, schema_editor):
+    """
+    Set each participant's watermark just below the first message from the
+    others they had not read, or to the newest message if they had read all.
+    """
+    ConversationParticipant = apps.get_model('messaging', 'ConversationParticipant')
+    Message = apps.get_model('messaging', 'Message')
+    for participant in ConversationParticipant.objects.iterator():
+        messages = Message.objects.filter(conversation_id=participant.conversation_id)
+        first_unread = (
+            messages.filter(is_read=False).exclude(sender_id=participant.user_id)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+        if first_unread is not None:
+            messages = messages.filter(id__lt=first_unread)
+        last_read = messages.order_by('-id').values_list('id', flat=True).first()
+        if last_read:
+            ConversationParticipant.objects.filter(pk=participant.pk).update(last_read_message_id=last_read)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_message_messaging_m_convers_1f1ac3_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The auto-created participants table becomes an explicit through model
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ConversationParticipant',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='messaging.conversation')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'messaging_conversation_participants',
+                        'unique_together': {('conversation', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='conversation',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='conversations', through='messaging.ConversationParticipant', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='last_read_message_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(watermarks_from_read_flags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'id'], name='messaging_m_convers_f5b548_idx'),
+        ),
+    ]
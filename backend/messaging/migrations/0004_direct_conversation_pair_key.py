@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_pair_keys(apps, schema_editor):
+    """
+    Key existing two-person conversations. When a pair already has several,
+    the most recently active one (the one `start` used to return) gets the
+    key and the others are kept unkeyed.
+    """
+    Conversation = apps.get_model('messaging', 'Conversation')
+    ConversationParticipant = apps.get_model('messaging', 'ConversationParticipant')
+    members = {}
+    for conversation_id, user_id in ConversationParticipant.objects.values_list('conversation_id', 'user_id'):
+        members.setdefault(conversation_id, []).append(user_id)
+    keyed = set()
+    for conversation in Conversation.objects.order_by('-updated_at', '-id').only('id'):
+        users = members.get(conversation.id, [])
+        if len(users) != 2:
+            continue
+        pair = tuple(sorted(users))
+        if pair in keyed:
+            continue
+        keyed.add(pair)
+        Conversation.objects.filter(pk=conversation.pk).update(min_user_id=pair[0], max_user_id=pair[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_participant_read_watermarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='max_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='min_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_pair_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('max_user__isnull', False), ('min_user__isnull', False)), fields=('min_user', 'max_user'), name='unique_direct_conversation'),
+        ),
+    ]
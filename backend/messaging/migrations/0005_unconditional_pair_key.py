@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_direct_conversation_pair_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='conversation',
+            name='unique_direct_conversation',
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('min_user', 'max_user'), name='unique_direct_conversation'),
+        ),
+    ]
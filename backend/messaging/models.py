@@ -1,28 +1,131 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+class ConversationQuerySet(models.QuerySet):
+    def with_summaries(self, user):
+        """
+        Annotate `unread_count` (messages from the other participants that
+        `user` has not read) and prefetch the participants and
+        `latest_messages` (a list with the newest message, if any), so a list
+        of conversations is serialized in a constant number of queries.
+        """
+        last_read = ConversationParticipant.objects.filter(
+            conversation=OuterRef('pk'), user=user
+        ).values('last_read_message_id')[:1]
+        # Range count on the (conversation, id) index past the watermark
+        unread = (
+            Message.objects.filter(conversation=OuterRef('pk'), id__gt=OuterRef('last_read_message_id'))
+            .exclude(sender=user)
+            .order_by()
+            .values('conversation')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        latest = Message.objects.select_related('sender').order_by('-created_at', '-id')[:1]
+        return self.annotate(
+            last_read_message_id=Coalesce(Subquery(last_read), 0),
+        ).annotate(
+            unread_count=Coalesce(Subquery(unread), 0),
+        ).prefetch_related(
+            'participants',
+            Prefetch('messages', queryset=latest, to_attr='latest_messages'),
+        )
+
+    def get_or_create_direct(self, user, other):
+        """
+        The 1:1 conversation between two users, created if needed. The lookup
+        is a single get on the unique (min_user, max_user) pair key, and a
+        concurrent request creating the same conversation loses on that
+        constraint and returns the winner's. Returns (conversation, created).
+        """
+        low, high = sorted((user.pk, other.pk))
+        try:
+            return self.get(min_user_id=low, max_user_id=high), False
+        except self.model.DoesNotExist:
+            pass
+        try:
+            with transaction.atomic():
+                conversation = self.create(min_user_id=low, max_user_id=high)
+                conversation.participants.add(low, high)
+            return conversation, True
+        except IntegrityError:
+            return self.get(min_user_id=low, max_user_id=high), False
+
+
 class Conversation(models.Model):
-    participants = models.ManyToManyField(User, related_name='conversations')
+    participants = models.ManyToManyField(User, through='ConversationParticipant', related_name='conversations')
+    # Canonical pair key of a direct (1:1) conversation, lowest user id first;
+    # empty for other conversations
+    min_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    max_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ConversationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-updated_at']
+        constraints = [
+            # Unconditional, so MySQL enforces it too; the NULL keys of
+            # other conversations never collide in a unique index
+            models.UniqueConstraint(fields=['min_user', 'max_user'], name='unique_direct_conversation'),
+        ]
 
     def __str__(self):
         return f"Conversation {self.id}"
 
+    def mark_read(self, user) -> bool:
+        """
+        Move `user`'s read watermark to the newest message: one indexed
+        lookup and a single-row update, however long the conversation is.
+        Returns whether the watermark moved.
+        """
+        last_id = self.messages.order_by('-id').values_list('id', flat=True).first()
+        if last_id is None:
+            return False
+        return bool(
+            ConversationParticipant.objects.filter(
+                conversation=self, user=user, last_read_message_id__lt=last_id
+            ).update(last_read_message_id=last_id, last_read_at=timezone.now())
+        )
+
+
+class ConversationParticipant(models.Model):
+    """
+    Membership of a user in a conversation, with their read watermark:
+    messages with an id above `last_read_message_id` are unread for them.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    last_read_message_id = models.BigIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'messaging_conversation_participants'
+        unique_together = [('conversation', 'user')]
+
+    def __str__(self):
+        return f"{self.user} in conversation {self.conversation_id}"
+
+
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id']),
+            models.Index(fields=['conversation', 'id']),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender} at {self.created_at}"
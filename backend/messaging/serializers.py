@@ -14,8 +14,8 @@ class MessageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Message
-        fields = ['id', 'conversation', 'sender', 'content', 'is_read', 'created_at']
-        read_only_fields = ['conversation', 'sender', 'is_read', 'created_at']
+        fields = ['id', 'conversation', 'sender', 'content', 'created_at']
+        read_only_fields = ['conversation', 'sender', 'created_at']
 
 class ConversationSerializer(serializers.ModelSerializer):
     participants = UserSimpleSerializer(many=True, read_only=True)
@@ -26,15 +26,26 @@ class ConversationSerializer(serializers.ModelSerializer):
         model = Conversation
         fields = ['id', 'participants', 'last_message', 'unread_count', 'updated_at']
 
+    # Lists use Conversation.objects.with_summaries(); a bare instance (e.g.
+    # a new conversation) falls back to one query per field
+
     def get_last_message(self, obj):
-        last_msg = obj.messages.last()
+        if hasattr(obj, 'latest_messages'):
+            last_msg = obj.latest_messages[0] if obj.latest_messages else None
+        else:
+            last_msg = obj.messages.select_related('sender').order_by('created_at', 'id').last()
         if last_msg:
             return MessageSerializer(last_msg).data
         return None
 
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
         user = self.context['request'].user
-        return obj.messages.exclude(sender=user).filter(is_read=False).count()
+        last_read = (
+            obj.memberships.filter(user=user).values_list('last_read_message_id', flat=True).first() or 0
+        )
+        return obj.messages.exclude(sender=user).filter(id__gt=last_read).count()
 
 class CreateMessageSerializer(serializers.ModelSerializer):
     class Meta:
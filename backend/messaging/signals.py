@@ -1,21 +1,77 @@
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Message
+from django.utils import timezone
+from .models import Conversation, ConversationParticipant, Message
+from .serializers import MessageSerializer
+from notifications import outbox, stream
 from notifications.models import Notification
+from notifications.unread import notification_counter
+
+
+@outbox.expander('message.created')
+def expand_message_created(payload) -> list:
+    """
+    Notify the other participants, coalescing a burst of messages: a
+    recipient who still has an unread NEW_MESSAGE notification for the
+    conversation gets it updated in place (count, latest excerpt) instead of
+    a new row.
+
+    The notifications are written here rather than returned, so the next
+    message of the same outbox batch already sees them.
+    """
+    message = Message.objects.select_related('sender').filter(pk=payload['message_id']).first()
+    if message is None:
+        return []
+    sender = message.sender
+    name = sender.first_name or sender.email
+    excerpt = message.content[:50] + "..." if len(message.content) > 50 else message.content
+    link_url = f"/messages/{message.conversation_id}"
+    recipients = set(
+        ConversationParticipant.objects.filter(conversation_id=message.conversation_id)
+        .exclude(user_id=sender.pk)
+        .values_list('user_id', flat=True)
+    )
+
+    # Lock them, so they cannot be marked read between the lookup and the update
+    pending = dict(
+        Notification.objects.select_for_update()
+        .filter(recipient_id__in=recipients, type=Notification.Type.NEW_MESSAGE, is_read=False, link_url=link_url)
+        .values_list('pk', 'recipient_id')
+    )
+    updated = []
+    if pending:
+        Notification.objects.filter(pk__in=pending).update(
+            count=F('count') + 1,
+            title=f"Nuevos mensajes de {name}",
+            message=excerpt,
+            updated_at=timezone.now(),
+        )
+        updated = list(Notification.objects.filter(pk__in=pending))
+
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            recipient_id=recipient_id,
+            type=Notification.Type.NEW_MESSAGE,
+            title=f"Nuevo mensaje de {name}",
+            message=excerpt,
+            link_url=link_url,
+        )
+        for recipient_id in recipients - set(pending.values())
+    ])
+    notification_counter.added(notifications)
+
+    data = MessageSerializer(message).data
+    stream.publish_many(
+        [(recipient_id, 'message', data) for recipient_id in recipients]
+        + [(n.recipient_id, 'notification', stream.notification_data(n)) for n in notifications + updated]
+    )
+    return []
+
 
 @receiver(post_save, sender=Message)
 def notify_new_message(sender, instance, created, **kwargs):
     if created:
-        # Update conversation timestamp
-        instance.conversation.save()
-        
-        # Notify all participants except the sender
-        for participant in instance.conversation.participants.all():
-            if participant != instance.sender:
-                Notification.objects.create(
-                    recipient=participant,
-                    type=Notification.Type.NEW_MESSAGE,
-                    title=f"Nuevo mensaje de {instance.sender.first_name or instance.sender.email}",
-                    message=instance.content[:50] + "..." if len(instance.content) > 50 else instance.content,
-                    link_url=f"/messages/{instance.conversation.id}"
-                )
+        # Touch the conversation timestamp without rewriting the row
+        Conversation.objects.filter(pk=instance.conversation_id).update(updated_at=timezone.now())
+        outbox.record('message.created', message_id=instance.id)
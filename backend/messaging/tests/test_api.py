@@ -1,5 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from messaging.models import Conversation, Message
@@ -33,6 +35,30 @@ class TestConversationAPI:
         assert len(response.data) == 1
         assert response.data[0]['id'] == conversation.id
 
+    @pytest.mark.parametrize('n_conversations', [1, 10])
+    def test_list_conversations_constant_queries(self, api_client, student_user, create_user,
+                                                 n_conversations, django_assert_num_queries):
+        """Test that the conversation list does not run queries per conversation"""
+        for i in range(n_conversations):
+            other = create_user(email=f'teacher{i}@test.com', username=f'teacher{i}@test.com', role='TEACHER')
+            conversation = Conversation.objects.create()
+            conversation.participants.add(student_user, other)
+            Message.objects.create(conversation=conversation, sender=other, content=f"Adiós {i}")
+            conversation.mark_read(student_user)
+            Message.objects.create(conversation=conversation, sender=other, content=f"Hola {i}")
+            Message.objects.create(conversation=conversation, sender=student_user, content=f"Respuesta {i}")
+            Message.objects.create(conversation=conversation, sender=other, content=f"Último {i}")
+        api_client.force_authenticate(user=student_user)
+
+        with django_assert_num_queries(3):
+            response = api_client.get(reverse('conversation-list'))
+
+        assert len(response.data) == n_conversations
+        for item in response.data:
+            assert item['unread_count'] == 2
+            assert item['last_message']['content'].startswith('Último')
+            assert len(item['participants']) == 2
+
     def test_start_conversation_success(self, api_client, student_user, teacher_user):
         """Test starting a new conversation"""
         api_client.force_authenticate(user=student_user)
@@ -48,8 +74,7 @@ class TestConversationAPI:
 
     def test_start_conversation_existing(self, api_client, student_user, teacher_user):
         """Test starting a conversation that already exists returns the existing one"""
-        conversation = Conversation.objects.create()
-        conversation.participants.add(student_user, teacher_user)
+        conversation, _ = Conversation.objects.get_or_create_direct(teacher_user, student_user)
         
         api_client.force_authenticate(user=student_user)
         
@@ -63,6 +88,19 @@ class TestConversationAPI:
         # Should not create duplicate
         assert Conversation.objects.count() == 1
 
+    def test_start_conversation_is_a_single_lookup(self, api_client, student_user, teacher_user):
+        """Test that finding an existing direct conversation does not scan memberships"""
+        Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        api_client.force_authenticate(user=student_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(reverse('conversation-start'), {'recipient_id': teacher_user.id}, format='json')
+
+        assert response.status_code == 200
+        lookups = [q['sql'] for q in queries if 'FROM "messaging_conversation"' in q['sql']]
+        assert len(lookups) == 1
+        assert 'messaging_conversation_participants' not in lookups[0]
+
     def test_start_conversation_self_error(self, api_client, student_user):
         """Test cannot start conversation with self"""
         api_client.force_authenticate(user=student_user)
@@ -88,7 +126,30 @@ class TestConversationAPI:
         response = api_client.post(url)
         
         assert response.status_code == 200
-        assert Message.objects.filter(is_read=True).count() == 2
+        summary = api_client.get(reverse('conversation-list')).data[0]
+        assert summary['unread_count'] == 0
+        api_client.force_authenticate(user=teacher_user)
+        summary = api_client.get(reverse('conversation-list')).data[0]
+        assert summary['unread_count'] == 0  # own messages never count
+
+    def test_read_all_is_a_single_row_update(self, api_client, student_user, teacher_user, django_assert_num_queries):
+        """Test that marking read does not rewrite the conversation's messages"""
+        conversation = Conversation.objects.create()
+        conversation.participants.add(student_user, teacher_user)
+        Message.objects.bulk_create(
+            Message(conversation=conversation, sender=teacher_user, content=f"Msg {i}") for i in range(50)
+        )
+        api_client.force_authenticate(user=student_user)
+        url = reverse('conversation-read-all', args=[conversation.id])
+
+        # get_object, newest message id, watermark update
+        with django_assert_num_queries(3):
+            api_client.post(url)
+
+        new = Message.objects.create(conversation=conversation, sender=teacher_user, content="Nuevo")
+        summary = api_client.get(reverse('conversation-list')).data[0]
+        assert summary['unread_count'] == 1
+        assert summary['last_message']['id'] == new.id
 
 
 @pytest.mark.django_db
@@ -152,4 +213,108 @@ class TestMessageAPI:
         # Our implementation creates queryset then filters. 
         # queryset = Message.objects.filter(conversation__participants=self.request.user)
         # So it should be empty
-        assert len(response.data) == 0
+        assert len(response.data['results']) == 0
+
+    def test_list_messages_paginated_oldest_first(self, api_client, student_user, teacher_user):
+        """Test that messages are paginated in chronological order"""
+        conversation = Conversation.objects.create()
+        conversation.participants.add(student_user, teacher_user)
+        for i in range(5):
+            Message.objects.create(conversation=conversation, sender=teacher_user, content=f"Mensaje {i}")
+        api_client.force_authenticate(user=student_user)
+        url = reverse('message-list')
+
+        first = api_client.get(f"{url}?conversation={conversation.id}&page_size=3")
+        second = api_client.get(first.data['next'])
+        newest = api_client.get(f"{url}?conversation={conversation.id}&ordering=-created_at,-id&page_size=2")
+
+        assert [m['content'] for m in first.data['results']] == ['Mensaje 0', 'Mensaje 1', 'Mensaje 2']
+        assert [m['content'] for m in second.data['results']] == ['Mensaje 3', 'Mensaje 4']
+        assert second.data['next'] is None
+        assert [m['content'] for m in newest.data['results']] == ['Mensaje 4', 'Mensaje 3']
+
+    def test_list_messages_after_id_and_since(self, api_client, student_user, teacher_user):
+        """Test that an open chat can fetch only the messages it has not seen"""
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        seen = Message.objects.create(conversation=conversation, sender=teacher_user, content="Visto")
+        new = Message.objects.create(conversation=conversation, sender=teacher_user, content="Nuevo")
+        api_client.force_authenticate(user=student_user)
+        url = reverse('message-list')
+
+        after = api_client.get(url, {'conversation': conversation.id, 'after_id': seen.id})
+        since = api_client.get(url, {'conversation': conversation.id, 'since': seen.created_at.isoformat()})
+        invalid = api_client.get(url, {'conversation': conversation.id, 'after_id': 'x'})
+
+        assert [m['id'] for m in after.data['results']] == [new.id]
+        assert [m['id'] for m in since.data['results']] == [new.id]
+        assert invalid.status_code == 400
+
+    def test_long_poll_returns_when_a_message_arrives(self, api_client, student_user, teacher_user, settings, monkeypatch):
+        """Test that wait mode holds the request until a new message exists"""
+        from messaging import views
+        settings.MESSAGES_LONG_POLL_WSGI_ENABLED = True
+        settings.MESSAGES_LONG_POLL_INTERVAL = 0.01
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        seen = Message.objects.create(conversation=conversation, sender=teacher_user, content="Visto")
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                Message.objects.create(conversation=conversation, sender=teacher_user, content="Llegó")
+
+        monkeypatch.setattr(views.time, 'sleep', sleep)
+        api_client.force_authenticate(user=student_user)
+
+        response = api_client.get(
+            reverse('message-list'), {'conversation': conversation.id, 'after_id': seen.id, 'wait': 5}
+        )
+
+        assert len(sleeps) == 3
+        assert [m['content'] for m in response.data['results']] == ["Llegó"]
+
+    def test_long_poll_times_out_empty(self, api_client, student_user, teacher_user, settings):
+        """Test that wait mode answers with no messages once the wait is over"""
+        settings.MESSAGES_LONG_POLL_WSGI_ENABLED = True
+        settings.MESSAGES_LONG_POLL_INTERVAL = 0.01
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        seen = Message.objects.create(conversation=conversation, sender=teacher_user, content="Visto")
+        api_client.force_authenticate(user=student_user)
+
+        response = api_client.get(
+            reverse('message-list'), {'conversation': conversation.id, 'after_id': seen.id, 'wait': 0.05}
+        )
+
+        assert response.status_code == 200
+        assert response.data['results'] == []
+
+    def test_long_poll_is_ignored_under_sync_workers(self, api_client, student_user, teacher_user, settings, monkeypatch):
+        """Test that without the setting a WSGI worker answers right away instead of waiting"""
+        from messaging import views
+        settings.MESSAGES_LONG_POLL_WSGI_ENABLED = False
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        seen = Message.objects.create(conversation=conversation, sender=teacher_user, content="Visto")
+        sleeps = []
+        monkeypatch.setattr(views.time, 'sleep', sleeps.append)
+        api_client.force_authenticate(user=student_user)
+
+        response = api_client.get(
+            reverse('message-list'), {'conversation': conversation.id, 'after_id': seen.id, 'wait': 20}
+        )
+
+        assert response.status_code == 200
+        assert response.data['results'] == []
+        assert sleeps == []
+
+    @pytest.mark.parametrize('wait', ['nan', 'inf', '-inf', 'abc'])
+    def test_long_poll_rejects_invalid_wait(self, api_client, student_user, teacher_user, wait):
+        """Test that a wait that could never expire is refused"""
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        api_client.force_authenticate(user=student_user)
+
+        response = api_client.get(
+            reverse('message-list'), {'conversation': conversation.id, 'after_id': 0, 'wait': wait}
+        )
+
+        assert response.status_code == 400
+        assert 'wait' in response.data
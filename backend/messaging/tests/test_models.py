@@ -1,6 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
-from messaging.models import Conversation, Message
+from django.db import IntegrityError, transaction
+from messaging.models import Conversation, ConversationQuerySet, Message
 
 User = get_user_model()
 
@@ -15,6 +16,53 @@ class TestConversationModel:
         assert student_user in conversation.participants.all()
         assert teacher_user in conversation.participants.all()
         
+    def test_get_or_create_direct_is_symmetric(self, student_user, teacher_user):
+        """Test that both users get the same direct conversation"""
+        conversation, created = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+        again, created_again = Conversation.objects.get_or_create_direct(teacher_user, student_user)
+
+        assert created is True
+        assert created_again is False
+        assert again == conversation
+        assert conversation.min_user_id == min(student_user.id, teacher_user.id)
+        assert set(conversation.participants.all()) == {student_user, teacher_user}
+
+    def test_direct_pair_key_is_unique(self, student_user, teacher_user):
+        """Test that the database rejects a second conversation for the same pair"""
+        low, high = sorted((student_user.id, teacher_user.id))
+        Conversation.objects.create(min_user_id=low, max_user_id=high)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Conversation.objects.create(min_user_id=low, max_user_id=high)
+
+    def test_conversations_without_pair_key_do_not_collide(self, student_user):
+        """Test that the NULL keys of other conversations pass the unique constraint"""
+        Conversation.objects.create()
+        Conversation.objects.create()
+        Conversation.objects.create(min_user=student_user)
+        Conversation.objects.create(min_user=student_user)
+
+        assert Conversation.objects.count() == 4
+
+    def test_get_or_create_direct_losing_race_returns_winner(self, student_user, teacher_user, monkeypatch):
+        """Test that a request losing the creation race returns the other request's conversation"""
+        low, high = sorted((student_user.id, teacher_user.id))
+        winner = Conversation.objects.create(min_user_id=low, max_user_id=high)
+        real_get = ConversationQuerySet.get
+        calls = []
+
+        def get_after_race(self, *args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:  # the other request had not committed yet
+                raise Conversation.DoesNotExist
+            return real_get(self, *args, **kwargs)
+
+        monkeypatch.setattr(ConversationQuerySet, 'get', get_after_race)
+        conversation, created = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+
+        assert created is False
+        assert conversation == winner
+        assert Conversation.objects.count() == 1
+
     def test_conversation_str(self):
         """Test string representation of conversation"""
         conversation = Conversation.objects.create()
@@ -36,7 +84,6 @@ class TestMessageModel:
         assert message.conversation == conversation
         assert message.sender == student_user
         assert message.content == "Hello teacher"
-        assert message.is_read is False
         
     def test_message_str(self, student_user, teacher_user):
         """Test string representation of message"""
@@ -51,3 +98,19 @@ class TestMessageModel:
         
         assert str(student_user) in str(message)
         assert str(message.created_at) in str(message)
+
+    def test_mark_read_moves_only_the_readers_watermark(self, student_user, teacher_user, create_user):
+        """Test that read state is tracked per participant"""
+        other = create_user(email='other@test.com', username='other@test.com', role='STUDENT')
+        conversation = Conversation.objects.create()
+        conversation.participants.add(student_user, teacher_user, other)
+        Message.objects.create(conversation=conversation, sender=teacher_user, content="Uno")
+        last = Message.objects.create(conversation=conversation, sender=teacher_user, content="Dos")
+
+        assert conversation.mark_read(student_user) is True
+        assert conversation.mark_read(student_user) is False
+
+        memberships = {m.user_id: m for m in conversation.memberships.all()}
+        assert memberships[student_user.id].last_read_message_id == last.id
+        assert memberships[student_user.id].last_read_at is not None
+        assert memberships[other.id].last_read_message_id == 0
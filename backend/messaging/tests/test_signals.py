@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from messaging.models import Conversation, Message
+from notifications import outbox
+from notifications.models import Notification
+
+
+@pytest.fixture
+def conversation(student_user, teacher_user):
+    conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+    return conversation
+
+
+@pytest.mark.django_db
+class TestNewMessageNotifications:
+    """Tests for the coalesced new-message notifications"""
+
+    def test_burst_is_coalesced_per_recipient(self, conversation, student_user, teacher_user):
+        """Test that a burst of messages updates one notification in place"""
+        for i in range(20):
+            Message.objects.create(conversation=conversation, sender=teacher_user, content=f"Mensaje {i}")
+        outbox.process_outbox()
+
+        notification = Notification.objects.get()
+        assert notification.recipient == student_user
+        assert notification.count == 20
+        assert notification.message == "Mensaje 19"
+        assert notification.link_url == f"/messages/{conversation.id}"
+
+    def test_coalescing_keeps_first_time_and_bumps_activity(self, conversation, student_user, teacher_user):
+        """Test that created_at stays at the first message and updated_at follows the latest"""
+        Message.objects.create(conversation=conversation, sender=teacher_user, content="Hola")
+        outbox.process_outbox()
+        first = Notification.objects.get()
+        older = Notification.objects.create(recipient=student_user, title="Otra")
+
+        Message.objects.create(conversation=conversation, sender=teacher_user, content="¿Sigues ahí?")
+        outbox.process_outbox()
+
+        notification = Notification.objects.get(pk=first.pk)
+        assert notification.created_at == first.created_at
+        assert notification.updated_at > first.updated_at
+        # Listed by last activity
+        assert list(Notification.objects.filter(recipient=student_user)) == [notification, older]
+
+    def test_read_notification_is_not_reused(self, conversation, student_user, teacher_user):
+        """Test that a message after the notification was read starts a new one"""
+        Message.objects.create(conversation=conversation, sender=teacher_user, content="Hola")
+        outbox.process_outbox()
+        Notification.objects.update(is_read=True)
+
+        Message.objects.create(conversation=conversation, sender=teacher_user, content="¿Sigues ahí?")
+        outbox.process_outbox()
+
+        unread = Notification.objects.get(is_read=False)
+        assert unread.count == 1
+        assert unread.message == "¿Sigues ahí?"
+        assert Notification.objects.count() == 2
+
+    def test_conversation_timestamp_is_touched_with_one_update(self, conversation, teacher_user):
+        """Test that a new message only updates the conversation's updated_at"""
+        before = conversation.updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            Message.objects.create(conversation=conversation, sender=teacher_user, content="Hola")
+
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "messaging_conversation"')]
+        assert len(updates) == 1
+        assert 'SET "updated_at"' in updates[0]
+        assert 'min_user' not in updates[0]
+        conversation.refresh_from_db()
+        assert conversation.updated_at > before
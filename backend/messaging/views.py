@@ -1,9 +1,16 @@
+import math
+import time
+
 from rest_framework import viewsets, permissions, status, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth import get_user_model
-from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiTypes
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter, OpenApiTypes
+from config.pagination import ChronologicalKeysetPagination
 from .models import Conversation, Message
 from .serializers import ConversationSerializer, MessageSerializer, CreateMessageSerializer, UserSimpleSerializer
 
@@ -14,7 +21,10 @@ class ConversationViewSet(viewsets.ModelViewSet):
     serializer_class = ConversationSerializer
 
     def get_queryset(self):
-        return Conversation.objects.filter(participants=self.request.user)
+        queryset = Conversation.objects.filter(participants=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_summaries(self.request.user)
+        return queryset
 
     @extend_schema(
         summary="Mark conversation as read",
@@ -24,7 +34,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def read_all(self, request, pk=None):
         conversation = self.get_object()
-        conversation.messages.exclude(sender=request.user).update(is_read=True)
+        conversation.mark_read(request.user)
         return Response({'status': 'marked as read'})
 
     @extend_schema(
@@ -49,29 +59,90 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if recipient == request.user:
             return Response({'error': 'Cannot message yourself'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if conversation already exists
-        conversations = Conversation.objects.filter(participants=request.user).filter(participants=recipient)
-        if conversations.exists():
-            return Response(ConversationSerializer(conversations.first(), context={'request': request}).data)
-
-        # Create new conversation
-        conversation = Conversation.objects.create()
-        conversation.participants.add(request.user, recipient)
-        return Response(ConversationSerializer(conversation, context={'request': request}).data, status=status.HTTP_201_CREATED)
+        conversation, created = Conversation.objects.get_or_create_direct(request.user, recipient)
+        return Response(
+            ConversationSerializer(conversation, context={'request': request}).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
 class MessageViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = MessageSerializer
+    pagination_class = ChronologicalKeysetPagination
     filter_backends = [filters.OrderingFilter]
-    ordering_fields = ['created_at']
+    ordering_fields = ['created_at', 'id']
+    ordering = ['created_at', 'id']
 
     def get_queryset(self):
         queryset = Message.objects.filter(conversation__participants=self.request.user)
         conversation_id = self.request.query_params.get('conversation')
         if conversation_id:
             queryset = queryset.filter(conversation_id=conversation_id)
+        if self.action == 'list':
+            queryset = self._filter_new(queryset)
+        return queryset
+
+    def _filter_new(self, queryset):
+        """Incremental fetch: only messages after `?after_id=` and/or `?since=`"""
+        params = self.request.query_params
+        if params.get('after_id'):
+            try:
+                queryset = queryset.filter(id__gt=int(params['after_id']))
+            except ValueError:
+                raise serializers.ValidationError({'after_id': 'Must be an integer'})
+        if params.get('since'):
+            since = parse_datetime(params['since'])
+            if since is None:
+                raise serializers.ValidationError({'since': 'Must be an ISO 8601 datetime'})
+            queryset = queryset.filter(created_at__gt=since)
         return queryset
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('conversation', int, description='Only messages of this conversation'),
+            OpenApiParameter('after_id', int, description='Only messages with a greater id'),
+            OpenApiParameter('since', OpenApiTypes.DATETIME, description='Only messages created after this time'),
+            OpenApiParameter(
+                'wait', int,
+                description=(
+                    'With after_id or since: wait up to this many seconds for a new message. '
+                    'Ignored (answers right away) on servers with sync workers'
+                ),
+            ),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        if params.get('wait') and (params.get('after_id') or params.get('since')):
+            self._wait_for_messages(params['wait'])
+        return super().list(request, *args, **kwargs)
+
+    def _wait_for_messages(self, wait):
+        """
+        Long-poll: return once a matching message exists or `wait` seconds
+        (at most MESSAGES_LONG_POLL_MAX_WAIT) have passed. Each check is an
+        indexed EXISTS, so the cost per poll does not grow with the history.
+        A sync WSGI worker would be held for the whole wait, so there `wait`
+        is ignored unless MESSAGES_LONG_POLL_WSGI_ENABLED is set.
+        """
+        try:
+            wait = float(wait)
+        except ValueError:
+            wait = math.nan
+        # nan and inf would never reach the deadline
+        if not math.isfinite(wait):
+            raise serializers.ValidationError({'wait': 'Must be a number of seconds'})
+        if not (isinstance(self.request._request, ASGIRequest) or settings.MESSAGES_LONG_POLL_WSGI_ENABLED):
+            return
+        wait = min(max(wait, 0), settings.MESSAGES_LONG_POLL_MAX_WAIT)
+        deadline = time.monotonic() + wait
+        queryset = self.get_queryset()
+        while not queryset.exists():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(settings.MESSAGES_LONG_POLL_INTERVAL, remaining))
+
     def create(self, request, *args, **kwargs):
         conversation_id = request.data.get('conversation_id')
         content = request.data.get('content')
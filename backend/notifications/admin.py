@@ -1,9 +1,23 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationEvent, StreamEvent
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ("id", "recipient", "type", "title", "is_read", "created_at")
+    list_display = ("id", "recipient", "type", "title", "count", "is_read", "created_at", "updated_at")
     list_filter = ("type", "is_read")
     search_fields = ("recipient__email", "title", "message")
+
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "attempts", "created_at")
+    list_filter = ("kind",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(StreamEvent)
+class StreamEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "created_at")
+    list_filter = ("kind",)
+    readonly_fields = ("created_at",)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notifications'
+
+    def ready(self):
+        # Register the outbox background job handler
+        from . import tasks  # noqa: F401
+        # Keep the cached unread counters in step with new and edited notifications
+        from .unread import counters
+        for counter in counters:
+            counter.connect()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from notifications.unread import counters
+
+
+class Command(BaseCommand):
+    help = "Recount the cached unread notification counters from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Only reconcile this user id (repeatable)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users per cache round trip (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING("CONCILIACIÓN DE CONTADORES DE NO LEÍDAS")
+        )
+        for counter in counters:
+            refreshed = counter.reconcile(options["users"], batch_size=options["batch_size"])
+            self.stdout.write(f"{counter.model_label}: {refreshed} contadores recalculados")
+        self.stdout.write(self.style.SUCCESS("Contadores conciliados"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_notificatio_recipie_e86c4c_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1, help_text='Eventos agrupados en esta notificación'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False), ('type', 'NEW_MESSAGE')), fields=['recipient', 'link_url'], name='notification_unread_msg_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -18,10 +20,82 @@ class Notification(models.Model):
     message = models.TextField(blank=True)
     link_url = models.CharField(max_length=500, blank=True)
     is_read = models.BooleanField(default=False)
+    count = models.PositiveIntegerField(default=1, help_text="Eventos agrupados en esta notificación")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last activity: moves when further events are coalesced into it, while
+    # created_at keeps the time of the first one
+    updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-updated_at', '-id']
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at', '-id'], name='notification_activity_idx'),
+            # Unread new-message notifications that further messages are coalesced into
+            models.Index(
+                fields=['recipient', 'link_url'],
+                condition=models.Q(type='NEW_MESSAGE', is_read=False),
+                name='notification_unread_msg_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.recipient.email} - {self.title}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Outbox row for a domain event (new enrollment, new message...). It is
+    written in the same transaction as the change that caused it and
+    expanded into `Notification` rows after commit, see `notifications.outbox`.
+    """
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['attempts', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id}"
+
+
+class StreamEvent(models.Model):
+    """
+    A real-time event for one user (new notification, message, grading
+    result), read by the server-sent events stream. The id is the SSE event
+    id, so a reconnecting client resumes after its `Last-Event-ID`.
+    See `notifications.stream`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stream_events')
+    kind = models.CharField(max_length=30)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id}"
+
+
+class StreamTicket(models.Model):
+    """
+    A short-lived, single-use credential to open the event stream.
+    EventSource cannot send an Authorization header, and the JWT access
+    token must not end up in a URL (access logs, proxies).
+    """
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stream_tickets')
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"ticket of {self.user_id}"
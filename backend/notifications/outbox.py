@@ -0,0 +1,183 @@
+"""
+Transactional outbox for notifications.
+
+Signal receivers call `record(kind, **payload)`, which only inserts one
+`NotificationEvent` row in the writer's transaction. Once that transaction
+commits, the events are expanded into `Notification` rows in batches, either
+right away in the same process (NOTIFICATIONS_OUTBOX_DELIVERY='on_commit';
+only that transaction's events, any backlog is handed to the worker) or by a
+background job ('worker'). The writer pays for one INSERT no matter
+how many recipients the event has, and a rolled back change leaves no
+notification behind.
+
+Apps register an expander per event kind with `@expander(kind)`; it receives
+the payload and returns unsaved `Notification` instances (an expander that
+updates existing notifications in place may write them itself, inside the
+batch transaction, and return nothing). Bulk operations
+wrap their writes in `batch()` so all their events of a kind are stored as
+one event, which a `@summarizer(kind)` turns into one coalesced set of
+notifications per recipient ("12 resultados actualizados en CS-101").
+"""
+from __future__ import annotations
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterable, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import stream
+from .models import Notification, NotificationEvent
+from .unread import notification_counter
+
+logger = logging.getLogger(__name__)
+
+_expanders: Dict[str, Callable[[dict], Iterable[Notification]]] = {}
+_summarizers: Dict[str, Callable[[List[dict]], Iterable[Notification]]] = {}
+_local = threading.local()
+
+
+def expander(kind: str):
+    """Decorator registering `func(payload) -> notifications` for `kind`"""
+    def decorator(func):
+        _expanders[kind] = func
+        return func
+    return decorator
+
+
+def summarizer(kind: str):
+    """
+    Decorator registering `func(payloads) -> notifications`, which expands a
+    batch of `kind` events into coalesced notifications. Without one, batched
+    events are expanded one by one.
+    """
+    def decorator(func):
+        _summarizers[kind] = func
+        return func
+    return decorator
+
+
+def _store(kind: str, payload: dict) -> NotificationEvent:
+    event = NotificationEvent.objects.create(kind=kind, payload=payload)
+    transaction.on_commit(partial(deliver, [event.id]), robust=True)
+    return event
+
+
+def record(kind: str, **payload) -> NotificationEvent | None:
+    """
+    Store an event in the current transaction and deliver it after commit.
+    Inside `batch()` the event is buffered instead and None is returned.
+    """
+    if kind not in _expanders:
+        raise ValueError(f"No expander registered for notification event '{kind}'")
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        buffer[kind].append(payload)
+        return None
+    return _store(kind, payload)
+
+
+@contextmanager
+def batch():
+    """
+    Buffer the events recorded in the block and store them as one event per
+    kind on exit. Use it inside the bulk operation's transaction; nested
+    blocks join the outermost one, and nothing is stored if the block raises.
+    """
+    if getattr(_local, 'buffer', None) is not None:
+        yield
+        return
+    _local.buffer = defaultdict(list)
+    try:
+        yield
+        buffered = _local.buffer
+    finally:
+        _local.buffer = None
+    for kind, payloads in buffered.items():
+        _store(kind, payloads[0] if len(payloads) == 1 else {'batch': payloads})
+
+
+def deliver(event_ids: List[int]):
+    """
+    Process the just committed `event_ids` now or hand the outbox to a
+    worker, per NOTIFICATIONS_OUTBOX_DELIVERY. A request never drains
+    other transactions' events: those left pending (a backlog, retries)
+    are handed to the worker too.
+    """
+    from .tasks import enqueue_outbox_processing
+    if settings.NOTIFICATIONS_OUTBOX_DELIVERY == 'worker':
+        enqueue_outbox_processing()
+        return
+    process_batch(event_ids=event_ids)
+    if NotificationEvent.objects.filter(attempts__lt=settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS).exists():
+        enqueue_outbox_processing()
+    stream.prune_if_due()
+
+
+def _expand(event: NotificationEvent) -> list:
+    func = _expanders.get(event.kind)
+    if func is None:
+        raise LookupError(f"No expander registered for notification event '{event.kind}'")
+    payloads = event.payload.get('batch') or [event.payload]
+    # Savepoint, so a failing expander does not break the batch transaction
+    with transaction.atomic():
+        if len(payloads) > 1 and event.kind in _summarizers:
+            return list(_summarizers[event.kind](payloads))
+        notifications = []
+        for payload in payloads:
+            notifications.extend(func(payload))
+        return notifications
+
+
+def process_batch(batch_size: int | None = None, event_ids: Iterable[int] | None = None) -> int:
+    """
+    Expand up to `batch_size` pending events (of `event_ids` only, if given)
+    in one transaction and delete them. Events whose expander fails are kept
+    for a retry until NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS. Returns the number
+    of events taken.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_OUTBOX_BATCH_SIZE
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    pending = NotificationEvent.objects.filter(attempts__lt=settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS)
+    if event_ids is not None:
+        pending = pending.filter(id__in=list(event_ids))
+    with transaction.atomic():
+        events = list(pending.select_for_update(skip_locked=skip_locked).order_by('id')[:batch_size])
+        if not events:
+            return 0
+
+        notifications, done = [], []
+        for event in events:
+            try:
+                notifications.extend(_expand(event))
+            except Exception as e:
+                logger.exception("Could not expand notification event %s (%s)", event.id, event.kind)
+                NotificationEvent.objects.filter(pk=event.pk).update(
+                    attempts=F('attempts') + 1, last_error=str(e)[:1000]
+                )
+            else:
+                done.append(event.id)
+
+        Notification.objects.bulk_create(notifications, batch_size=settings.NOTIFICATIONS_OUTBOX_BATCH_SIZE)
+        notification_counter.added(notifications)
+        stream.publish_many(
+            (n.recipient_id, 'notification', stream.notification_data(n)) for n in notifications
+        )
+        NotificationEvent.objects.filter(id__in=done).delete()
+    return len(events)
+
+
+def process_outbox(batch_size: int | None = None) -> int:
+    """Process pending events until the outbox is empty; returns how many were taken"""
+    batch_size = batch_size or settings.NOTIFICATIONS_OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        taken = process_batch(batch_size)
+        total += taken
+        if taken < batch_size:
+            stream.prune_if_due()
+            return total
@@ -10,5 +10,5 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'recipient_email', 'type', 'title', 'message', 'link_url', 'is_read', 'created_at']
-        read_only_fields = ['recipient', 'recipient_email', 'created_at']
+        fields = ['id', 'recipient', 'recipient_email', 'type', 'title', 'message', 'link_url', 'is_read', 'count', 'created_at', 'updated_at']
+        read_only_fields = ['recipient', 'recipient_email', 'count', 'created_at', 'updated_at']
@@ -0,0 +1,185 @@
+"""
+Server-sent events: new notifications, messages and grading results pushed
+to the browser instead of polled.
+
+Producers call `publish(user_ids, kind, data)`, which inserts one
+`StreamEvent` per user in the caller's transaction: the event shows up when
+the change commits, whichever process wrote it (a request or a `run_workers`
+job). The database is the event bus. Each open stream polls it every
+STREAM_POLL_INTERVAL seconds with an indexed `user_id = ? AND id > ?` query,
+which is also what replays the events a reconnecting client missed after
+its `Last-Event-ID`. Events are kept for STREAM_RETENTION seconds.
+
+Served by the ASGI application (config.asgi), a stream stays open for
+STREAM_MAX_DURATION seconds without holding a thread or a database
+connection between polls. A sync WSGI worker would be held for the whole
+stream, so there the stream is only offered with STREAM_WSGI_ENABLED (and
+closes after STREAM_WSGI_MAX_DURATION seconds); otherwise clients keep
+polling. Deployments that offer no stream (STREAM_ENABLED off) store no
+events either.
+
+Old events and expired tickets are deleted by `prune_if_due`, which the
+outbox calls after delivering notifications.
+
+Browsers open the stream with a ticket from `issue_ticket`: valid for
+STREAM_TICKET_TTL seconds and redeemable once, so the access token never
+travels in the URL.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import secrets
+import time
+from datetime import timedelta
+from typing import Iterable, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.utils import timezone
+
+from .models import StreamEvent, StreamTicket
+
+BATCH_SIZE = 100  # events sent per poll
+PRUNE_INTERVAL = 3600  # seconds between deletions of expired events
+
+
+def publish_many(events: Iterable[Tuple[int, str, dict]]):
+    """Store (user_id, kind, data) events in the current transaction"""
+    if not settings.STREAM_ENABLED:
+        return
+    rows = [StreamEvent(user_id=user_id, kind=kind, data=data) for user_id, kind, data in events]
+    if rows:
+        StreamEvent.objects.bulk_create(rows, batch_size=500)
+
+
+def publish(user_ids: Iterable[int], kind: str, data: dict):
+    """Store the same event for each of `user_ids`"""
+    publish_many((user_id, kind, data) for user_id in user_ids)
+
+
+def notification_data(notification) -> dict:
+    """Event data of a `notifications.Notification`"""
+    return {
+        'id': notification.id,
+        'type': notification.type,
+        'title': notification.title,
+        'message': notification.message,
+        'link_url': notification.link_url,
+        'count': notification.count,
+        'created_at': notification.created_at,
+        'updated_at': notification.updated_at,
+    }
+
+
+def is_available(request) -> bool:
+    """Whether this server can hold streams open (see the module docstring)"""
+    return settings.STREAM_ENABLED and (isinstance(request, ASGIRequest) or settings.STREAM_WSGI_ENABLED)
+
+
+def issue_ticket(user) -> str:
+    key = secrets.token_urlsafe(32)
+    StreamTicket.objects.create(
+        key=key, user=user, expires_at=timezone.now() + timedelta(seconds=settings.STREAM_TICKET_TTL)
+    )
+    return key
+
+
+def redeem_ticket(key: str) -> int | None:
+    """The user id of a valid ticket, which is used up; None otherwise"""
+    ticket = StreamTicket.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+    if ticket is None:
+        return None
+    # Of two concurrent redemptions only the one that deletes the row wins
+    deleted, _ = StreamTicket.objects.filter(pk=ticket.pk).delete()
+    return ticket.user_id if deleted else None
+
+
+def prune() -> int:
+    """Delete the events older than STREAM_RETENTION and expired tickets; returns how many events"""
+    StreamTicket.objects.filter(expires_at__lte=timezone.now()).delete()
+    cutoff = timezone.now() - timedelta(seconds=settings.STREAM_RETENTION)
+    deleted, _ = StreamEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def prune_if_due():
+    """`prune()` at most once per PRUNE_INTERVAL across processes"""
+    if cache.add('stream:pruned', True, PRUNE_INTERVAL):
+        prune()
+
+
+def format_event(event: StreamEvent) -> str:
+    data = json.dumps(event.data, cls=DjangoJSONEncoder)
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n"
+
+
+class EventStream:
+    """
+    The events of one user after `last_event_id`. Without one (a fresh
+    connection) only events published from now on are sent.
+    """
+
+    def __init__(self, user_id: int, last_event_id: int | None, duration: float):
+        self.user_id = user_id
+        self.last_id = last_event_id
+        self.deadline = time.monotonic() + duration
+        self.last_sent = time.monotonic()
+
+    def opening(self) -> str:
+        return f"retry: {settings.STREAM_RETRY_MS}\n\n"
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def step(self) -> Tuple[List[str], bool]:
+        """Poll once; returns the chunks to send and whether more events are waiting"""
+        events = StreamEvent.objects.filter(user_id=self.user_id)
+        if self.last_id is None:
+            self.last_id = events.order_by('-id').values_list('id', flat=True).first() or 0
+            return [], False
+        batch = list(events.filter(id__gt=self.last_id).order_by('id')[:BATCH_SIZE])
+        chunks = [format_event(event) for event in batch]
+        now = time.monotonic()
+        if batch:
+            self.last_id = batch[-1].id
+            self.last_sent = now
+        elif now - self.last_sent >= settings.STREAM_HEARTBEAT:
+            # Comment line: keeps proxies from closing an idle connection
+            chunks.append(": keep-alive\n\n")
+            self.last_sent = now
+        return chunks, len(batch) == BATCH_SIZE
+
+    def _step_and_release(self):
+        try:
+            return self.step()
+        finally:
+            # Do not hold a connection per open stream between polls
+            if not connection.in_atomic_block:
+                connection.close()
+
+    def iter_sync(self):
+        yield self.opening()
+        while True:
+            chunks, more = self.step()
+            yield from chunks
+            if self.expired:
+                return
+            if not more:
+                time.sleep(settings.STREAM_POLL_INTERVAL)
+
+    async def iter_async(self):
+        yield self.opening()
+        step = sync_to_async(self._step_and_release)
+        while True:
+            chunks, more = await step()
+            for chunk in chunks:
+                yield chunk
+            if self.expired:
+                return
+            if not more:
+                await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
@@ -0,0 +1,20 @@
+"""
+Background job handlers for the notifications app (see `jobs.services`).
+"""
+from jobs.models import Job
+from jobs.services import enqueue, register
+
+from .outbox import process_outbox
+
+PROCESS_OUTBOX = 'notifications.process_outbox'
+
+
+def enqueue_outbox_processing():
+    """Queue an outbox run unless one is already waiting (it will see the new events)"""
+    if not Job.objects.filter(kind=PROCESS_OUTBOX, status=Job.Status.PENDING).exists():
+        enqueue(PROCESS_OUTBOX)
+
+
+@register(PROCESS_OUTBOX, max_concurrency=1)
+def process_outbox_job(job):
+    return {"events": process_outbox()}
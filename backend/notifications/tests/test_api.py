@@ -26,7 +26,7 @@ class TestNotificationAPI:
         response = authenticated_client.get(url)
         
         assert response.status_code == 200
-        assert len(response.data) == 2
+        assert len(response.data['results']) == 2
     
     def test_unread_count(self, authenticated_client, student_user):
         """Test getting unread notifications count"""
@@ -105,4 +105,50 @@ class TestNotificationAPI:
         response = authenticated_client.get(url)
         
         assert response.status_code == 200
-        assert len(response.data) == 0
+        assert len(response.data['results']) == 0
+
+
+@pytest.mark.django_db
+class TestNotificationPagination:
+    """Tests for keyset pagination of the notification list"""
+
+    def _create(self, user, n):
+        Notification.objects.bulk_create([
+            Notification(recipient=user, title=f'Notification {i}') for i in range(n)
+        ])
+        # Identical timestamps: the id tiebreaker must keep pages stable
+        Notification.objects.update(updated_at=Notification.objects.first().updated_at)
+
+    def test_walks_all_pages_without_duplicates(self, authenticated_client, student_user):
+        """Test that following `next` returns every notification exactly once, newest first"""
+        self._create(student_user, 7)
+
+        url, seen = f"{reverse('notification-list')}?page_size=3", []
+        while url:
+            response = authenticated_client.get(url)
+            assert response.status_code == 200
+            assert len(response.data['results']) <= 3
+            seen.extend(n['id'] for n in response.data['results'])
+            url = response.data['next']
+
+        assert seen == sorted(Notification.objects.values_list('id', flat=True), reverse=True)
+
+    def test_page_size_setting_and_cap(self, authenticated_client, student_user, settings):
+        """Test that API_PAGE_SIZE is the default and API_MAX_PAGE_SIZE caps ?page_size"""
+        settings.API_PAGE_SIZE = 2
+        settings.API_MAX_PAGE_SIZE = 4
+        self._create(student_user, 6)
+        url = reverse('notification-list')
+
+        assert len(authenticated_client.get(url).data['results']) == 2
+        assert len(authenticated_client.get(f'{url}?page_size=100').data['results']) == 4
+
+    def test_opt_out_returns_plain_list(self, authenticated_client, student_user, settings):
+        """Test that ?paginate=false keeps the previous response format"""
+        settings.API_PAGE_SIZE = 2
+        self._create(student_user, 5)
+
+        response = authenticated_client.get(f"{reverse('notification-list')}?paginate=false")
+
+        assert isinstance(response.data, list)
+        assert len(response.data) == 5
@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Enrollment, Exercise, Subject
+from notifications import outbox
+from notifications.models import Notification, NotificationEvent
+from notifications.tasks import PROCESS_OUTBOX
+
+
+@pytest.fixture
+def subject_with_students(teacher_user, create_user):
+    subject = Subject.objects.create(name='Math', code='MATH101', teacher=teacher_user)
+    students = [
+        create_user(email=f's{i}@example.com', username=f's{i}@example.com', role='STUDENT')
+        for i in range(20)
+    ]
+    Enrollment.objects.bulk_create([Enrollment(subject=subject, student=s) for s in students])
+    NotificationEvent.objects.all().delete()
+    Notification.objects.all().delete()
+    return subject, students
+
+
+@pytest.mark.django_db
+class TestNotificationOutbox:
+    """Tests for the transactional notification outbox"""
+
+    def test_event_is_recorded_not_expanded_in_transaction(self, subject_with_students, django_capture_on_commit_callbacks):
+        """Test that the writer only inserts one event, whatever the recipient count"""
+        subject, students = subject_with_students
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                Exercise.objects.create(subject=subject, name='Ejercicio 1', order=1)
+
+        inserts = [q['sql'] for q in queries if 'INSERT INTO "notifications_' in q['sql']]
+        assert len(inserts) == 1
+        assert NotificationEvent.objects.filter(kind='exercise.created').count() == 1
+        assert not Notification.objects.exists()
+
+        for callback in callbacks:
+            callback()
+        assert Notification.objects.count() == len(students)
+        assert not NotificationEvent.objects.exists()
+
+    def test_rolled_back_changes_leave_no_event(self, subject_with_students, django_capture_on_commit_callbacks):
+        """Test that events are discarded together with the change that caused them"""
+        subject, _ = subject_with_students
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    Exercise.objects.create(subject=subject, name='Ejercicio 1', order=1)
+                    raise RuntimeError
+
+        assert not NotificationEvent.objects.exists()
+        assert not Notification.objects.exists()
+
+    def test_events_are_expanded_in_batches(self, subject_with_students, django_capture_on_commit_callbacks):
+        """Test that many events are delivered with a constant number of inserts"""
+        subject, students = subject_with_students
+        with django_capture_on_commit_callbacks(execute=False):
+            for i in range(5):
+                Exercise.objects.create(subject=subject, name=f'Ejercicio {i}', order=i)
+
+        with CaptureQueriesContext(connection) as queries:
+            assert outbox.process_outbox() == 5
+
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "notifications_notification"')]
+        assert len(inserts) == 1
+        assert Notification.objects.count() == 5 * len(students)
+
+    def test_failing_expander_is_retried(self, student_user, settings, monkeypatch):
+        """Test that a failing event is kept with its error until the attempt limit"""
+        settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = 2
+        monkeypatch.setitem(outbox._expanders, 'test.broken', lambda payload: 1 / 0)
+        NotificationEvent.objects.create(kind='test.broken')
+        NotificationEvent.objects.create(kind='exercise.created', payload={'exercise_id': 0})
+
+        assert outbox.process_outbox() == 2
+        assert outbox.process_outbox() == 1
+        assert outbox.process_outbox() == 0  # given up after two attempts
+
+        event = NotificationEvent.objects.get()
+        assert event.kind == 'test.broken'
+        assert event.attempts == 2
+        assert 'division by zero' in event.last_error
+
+    def test_worker_delivery(self, subject_with_students, settings, run_jobs, django_capture_on_commit_callbacks):
+        """Test that worker delivery queues a single outbox job"""
+        from jobs.models import Job
+        settings.NOTIFICATIONS_OUTBOX_DELIVERY = 'worker'
+        subject, students = subject_with_students
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Exercise.objects.create(subject=subject, name='Ejercicio 1', order=1)
+        with django_capture_on_commit_callbacks(execute=True):
+            Exercise.objects.create(subject=subject, name='Ejercicio 2', order=2)
+
+        assert not Notification.objects.exists()
+        assert Job.objects.filter(kind=PROCESS_OUTBOX).count() == 1
+        run_jobs()
+        assert Notification.objects.count() == 2 * len(students)
+
+    def test_commit_delivers_only_its_own_events(self, subject_with_students, django_capture_on_commit_callbacks):
+        """Test that a request does not drain the backlog, which goes to the worker"""
+        from jobs.models import Job
+        subject, students = subject_with_students
+        backlog = NotificationEvent.objects.create(kind='exercise.created', payload={'exercise_id': 0})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Exercise.objects.create(subject=subject, name='Ejercicio 1', order=1)
+
+        assert Notification.objects.count() == len(students)
+        assert list(NotificationEvent.objects.all()) == [backlog]
+        assert Job.objects.filter(kind=PROCESS_OUTBOX).count() == 1
@@ -0,0 +1,202 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.models import Enrollment, Exercise, Notification as CourseNotification, StudentExerciseResult, Subject
+from messaging.models import Conversation, Message
+from notifications import outbox, stream
+from notifications.models import StreamEvent, StreamTicket
+
+
+@pytest.fixture(autouse=True)
+def stream_enabled(settings):
+    """A deployment that offers the stream"""
+    settings.STREAM_ENABLED = True
+
+
+@pytest.fixture
+def stream_settings(settings):
+    """Streams that poll once and close, so tests can read the whole body"""
+    settings.STREAM_WSGI_MAX_DURATION = 0
+    settings.STREAM_MAX_DURATION = 0
+    settings.STREAM_POLL_INTERVAL = 0
+    settings.STREAM_WSGI_ENABLED = True
+    return settings
+
+
+def read_stream(client, user, **extra):
+    response = client.get(reverse('notification-stream'), HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}', **extra)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/event-stream'
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestEventStream:
+    """Tests for the server-sent events stream"""
+
+    def test_replays_events_after_last_event_id(self, client, student_user, stream_settings):
+        """Test that a reconnecting client gets exactly the events it missed"""
+        stream.publish([student_user.id], 'notification', {'title': 'Uno'})
+        first = StreamEvent.objects.get()
+        stream.publish([student_user.id], 'notification', {'title': 'Dos'})
+        stream.publish([student_user.id], 'message', {'content': 'Hola'})
+
+        body = read_stream(client, student_user, HTTP_LAST_EVENT_ID=str(first.id))
+
+        assert body.startswith('retry: ')
+        assert 'Uno' not in body
+        assert f'id: {first.id + 1}\nevent: notification\ndata: {{"title": "Dos"}}\n\n' in body
+        assert 'event: message' in body
+
+    def test_new_connection_only_gets_new_events(self, client, student_user, stream_settings):
+        """Test that a fresh connection does not replay the history"""
+        stream.publish([student_user.id], 'notification', {'title': 'Antigua'})
+
+        assert 'Antigua' not in read_stream(client, student_user)
+
+    def test_only_own_events(self, client, student_user, teacher_user, stream_settings):
+        """Test that users never receive each other's events"""
+        stream.publish([teacher_user.id], 'notification', {'title': 'Privada'})
+
+        assert 'Privada' not in read_stream(client, student_user, HTTP_LAST_EVENT_ID='0')
+
+    def test_single_use_ticket_and_auth_required(self, client, authenticated_client, student_user, stream_settings):
+        """Test EventSource-style authentication with a ticket, which works once"""
+        url = reverse('notification-stream')
+        ticket = authenticated_client.post(reverse('notification-stream-ticket')).data['ticket']
+
+        assert client.get(url).status_code == 401
+        assert client.get(url, {'token': str(AccessToken.for_user(student_user))}).status_code == 401
+        assert client.get(url, {'ticket': ticket, 'last_event_id': '0'}).status_code == 200
+        assert client.get(url, {'ticket': ticket}).status_code == 401
+
+    def test_expired_ticket_is_rejected(self, client, student_user, stream_settings):
+        """Test that tickets are short-lived"""
+        ticket = stream.issue_ticket(student_user)
+        StreamTicket.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        assert client.get(reverse('notification-stream'), {'ticket': ticket}).status_code == 401
+
+    def test_not_offered_under_sync_workers(self, client, authenticated_client, student_user, settings):
+        """Test that WSGI workers are not held by streams unless enabled"""
+        settings.STREAM_WSGI_ENABLED = False
+
+        assert authenticated_client.post(reverse('notification-stream-ticket')).data == {'ticket': None}
+        response = client.get(
+            reverse('notification-stream'), HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(student_user)}'
+        )
+        assert response.status_code == 204
+        assert not StreamTicket.objects.exists()
+
+    def test_nothing_stored_without_stream(self, client, authenticated_client, student_user, settings):
+        """Test that deployments offering no stream neither store events nor hand out tickets"""
+        settings.STREAM_ENABLED = False
+        settings.STREAM_WSGI_ENABLED = True
+
+        stream.publish([student_user.id], 'notification', {'title': 'Uno'})
+
+        assert not StreamEvent.objects.exists()
+        assert authenticated_client.post(reverse('notification-stream-ticket')).data == {'ticket': None}
+
+    def test_async_stream(self, student_user, stream_settings):
+        """Test the iterator used under ASGI"""
+        stream.publish([student_user.id], 'result', {'status': 'GREEN'})
+
+        async def consume():
+            return [chunk async for chunk in stream.EventStream(student_user.id, 0, 0).iter_async()]
+
+        chunks = async_to_sync(consume)()
+        assert 'event: result' in chunks[1]
+
+    def test_prune_keeps_recent_events(self, student_user, settings):
+        """Test that events past STREAM_RETENTION and expired tickets are deleted"""
+        settings.STREAM_RETENTION = 3600
+        stream.publish([student_user.id], 'notification', {'title': 'Vieja'})
+        StreamEvent.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        stream.publish([student_user.id], 'notification', {'title': 'Nueva'})
+
+        stream.issue_ticket(student_user)
+        StreamTicket.objects.update(expires_at=timezone.now())
+
+        assert stream.prune() == 1
+        assert StreamEvent.objects.get().data == {'title': 'Nueva'}
+        assert not StreamTicket.objects.exists()
+
+    def test_delivery_prunes_when_due(self, student_user, teacher_user, settings, django_capture_on_commit_callbacks):
+        """Test that on_commit delivery, not only the outbox worker, deletes old events"""
+        from django.core.cache import cache
+        settings.NOTIFICATIONS_OUTBOX_DELIVERY = 'on_commit'
+        settings.STREAM_RETENTION = 3600
+        stream.publish([student_user.id], 'notification', {'title': 'Vieja'})
+        StreamEvent.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        cache.delete('stream:pruned')
+
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Message.objects.create(conversation=conversation, sender=teacher_user, content='Hola')
+
+        assert not StreamEvent.objects.filter(data={'title': 'Vieja'}).exists()
+        assert StreamEvent.objects.filter(kind='message').exists()
+
+
+@pytest.mark.django_db
+class TestStreamPublishers:
+    """Tests for the events pushed by notifications, messages and results"""
+
+    def test_outbox_notifications_are_published(self, student_user, teacher_user):
+        """Test that notifications delivered by the outbox are pushed"""
+        subject = Subject.objects.create(name='Math', code='MATH101', teacher=teacher_user)
+        Enrollment.objects.create(subject=subject, student=student_user)
+        outbox.process_outbox()
+        StreamEvent.objects.all().delete()
+
+        Exercise.objects.create(subject=subject, name='Ejercicio 1', order=1)
+        outbox.process_outbox()
+
+        event = StreamEvent.objects.get(kind='notification')
+        assert event.user == student_user
+        assert event.data['id'] == student_user.notifications.latest('id').id
+
+    def test_saved_result_is_published_to_student(self, student_user, teacher_user):
+        """Test that grading results reach the student's stream"""
+        subject = Subject.objects.create(name='Math', code='MATH101', teacher=teacher_user)
+        enrollment = Enrollment.objects.create(subject=subject, student=student_user)
+        exercise = Exercise.objects.create(subject=subject, name='Ejercicio 1', order=1)
+
+        StudentExerciseResult.objects.create(enrollment=enrollment, exercise=exercise, status='GREEN')
+        outbox.process_outbox()
+
+        event = StreamEvent.objects.get(kind='result')
+        assert event.user == student_user
+        assert event.data['exercise_id'] == exercise.id
+        assert event.data['status'] == 'GREEN'
+
+    def test_message_is_published_to_other_participants(self, student_user, teacher_user):
+        """Test that new messages reach the other participants only"""
+        conversation, _ = Conversation.objects.get_or_create_direct(student_user, teacher_user)
+
+        Message.objects.create(conversation=conversation, sender=teacher_user, content='Hola')
+        outbox.process_outbox()
+
+        event = StreamEvent.objects.get(kind='message')
+        assert event.user == student_user
+        assert event.data['content'] == 'Hola'
+        assert StreamEvent.objects.filter(kind='notification', user=student_user).exists()
+        assert not StreamEvent.objects.filter(user=teacher_user).exists()
+
+    def test_course_notification_is_published_once(self, student_user):
+        """Test that each notification bell notification is pushed exactly once"""
+        StreamEvent.objects.all().delete()
+        CourseNotification.objects.create(
+            user=student_user, notification_type='GENERAL', title='Calificado', message='Listo'
+        )
+
+        event = StreamEvent.objects.get(kind='course_notification')
+        assert event.user == student_user
+        assert event.data['title'] == 'Calificado'
@@ -0,0 +1,135 @@
+import io
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.models import Notification as CourseNotification
+from notifications import outbox
+from notifications.models import Notification, NotificationEvent
+from notifications.unread import course_notification_counter, notification_counter
+
+COURSES_UNREAD_URL = '/api/v1/courses/notifications/unread-count/'
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    """The counters are only used with a cache shared by every process"""
+    settings.NOTIFICATIONS_UNREAD_CACHE = True
+
+
+@pytest.fixture
+def token_client(api_client, student_user):
+    """Client authenticated with a real JWT, as the frontend is"""
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(student_user)}')
+    return api_client
+
+
+def notify(user, n=1, **kwargs):
+    for i in range(n):
+        Notification.objects.create(recipient=user, title=f'N{i}', **kwargs)
+
+
+@pytest.mark.django_db
+class TestUnreadCounter:
+    """Tests for the cached unread notification counters"""
+
+    def test_polling_runs_no_query(self, token_client, student_user, django_assert_num_queries):
+        """Test that only the first poll counts from the database"""
+        notify(student_user, 3)
+        notify(student_user, 2, is_read=True)
+        url = reverse('notification-unread-count')
+
+        with django_assert_num_queries(1):
+            assert token_client.get(url).data == {'unread': 3}
+        with django_assert_num_queries(0):
+            assert token_client.get(url).data == {'unread': 3}
+
+    def test_course_notifications_polling_runs_no_query(self, token_client, student_user, django_assert_num_queries):
+        """Test the courses unread-count used by the notification bell"""
+        for i in range(4):
+            CourseNotification.objects.create(
+                user=student_user, notification_type='GENERAL', title=f'N{i}', message='m'
+            )
+
+        assert token_client.get(COURSES_UNREAD_URL).data == {'unread_count': 4}
+        with django_assert_num_queries(0):
+            assert token_client.get(COURSES_UNREAD_URL).data == {'unread_count': 4}
+
+    def test_writes_adjust_cached_counter(self, authenticated_client, student_user, django_capture_on_commit_callbacks):
+        """Test that create, mark-read, mark-all-read and delete keep the cache exact"""
+        with django_capture_on_commit_callbacks(execute=True):
+            notify(student_user, 3)
+        assert notification_counter.get(student_user.id) == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            notify(student_user, 2)
+        assert cache.get(notification_counter.key(student_user.id)) == 5
+
+        first, second = Notification.objects.filter(recipient=student_user)[:2]
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(reverse('notification-mark-read', args=[first.pk]))
+            authenticated_client.post(reverse('notification-mark-read', args=[first.pk]))
+        assert cache.get(notification_counter.key(student_user.id)) == 4
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.delete(reverse('notification-detail', args=[second.pk]))
+        assert cache.get(notification_counter.key(student_user.id)) == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(reverse('notification-mark-all-read'))
+        assert cache.get(notification_counter.key(student_user.id)) == 0
+        assert notification_counter.count(student_user.id) == 0
+
+    def test_rolled_back_notification_does_not_count(self, student_user, django_capture_on_commit_callbacks):
+        """Test that adjustments wait for the transaction to commit"""
+        assert notification_counter.get(student_user.id) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    notify(student_user)
+                    raise RuntimeError
+
+        assert cache.get(notification_counter.key(student_user.id)) == 0
+
+    def test_outbox_delivery_counts_recipients(self, student_user, django_capture_on_commit_callbacks, monkeypatch):
+        """Test that bulk-created notifications are added to the counter"""
+        monkeypatch.setitem(
+            outbox._expanders, 'test.ping',
+            lambda payload: [Notification(recipient_id=payload['user'], title='Ping') for _ in range(2)],
+        )
+        assert notification_counter.get(student_user.id) == 0
+        NotificationEvent.objects.create(kind='test.ping', payload={'user': student_user.id})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            outbox.process_outbox()
+
+        assert cache.get(notification_counter.key(student_user.id)) == 2
+
+    def test_reconcile_fixes_drift(self, student_user, teacher_user):
+        """Test that reconciliation recounts cached counters only"""
+        notify(student_user, 2)
+        notification_counter.get(student_user.id)
+        Notification.objects.filter(recipient=student_user).update(is_read=True)  # bypasses the counter
+        assert notification_counter.get(student_user.id) == 2
+
+        call_command('reconcile_unread_counts', stdout=io.StringIO())
+
+        assert notification_counter.get(student_user.id) == 0
+        assert cache.get(notification_counter.key(teacher_user.id)) is None
+        assert cache.get(course_notification_counter.key(student_user.id)) is None
+
+    def test_counts_from_database_without_shared_cache(self, token_client, student_user, settings):
+        """Test that a per-process cache is not used for the counters"""
+        settings.NOTIFICATIONS_UNREAD_CACHE = False
+        notify(student_user, 2)
+        url = reverse('notification-unread-count')
+
+        assert token_client.get(url).data == {'unread': 2}
+        Notification.objects.filter(recipient=student_user).update(is_read=True)
+        assert token_client.get(url).data == {'unread': 0}
+        assert cache.get(notification_counter.key(student_user.id)) is None
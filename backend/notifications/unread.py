@@ -0,0 +1,149 @@
+"""
+Cached per-user unread notification counters.
+
+The notification bell polls `unread-count` every 30 seconds from every open
+tab, so the count is kept in the cache and adjusted when notifications are
+created, marked read or deleted instead of being recounted on every poll. A
+missing entry is counted from the database once and cached.
+
+Adjustments are applied after the writer's transaction commits, so a rolled
+back change never moves a counter. Entries expire after
+NOTIFICATIONS_UNREAD_CACHE_TTL seconds and are recounted, which bounds any
+drift (rows changed from the admin or the shell, a lost race between a
+recount and a new notification); `manage.py reconcile_unread_counts`
+recounts the cached entries on demand.
+
+The counters are only used with NOTIFICATIONS_UNREAD_CACHE, i.e. when the
+cache is shared by every process (Redis): with a per-process cache each
+worker would adjust its own copy. Without it `get` counts from the database.
+"""
+from __future__ import annotations
+from collections import Counter
+from typing import Dict, Iterable
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_save
+
+
+class UnreadCounter:
+    """Unread counter of the notifications model `model_label`, per `user_field`"""
+
+    def __init__(self, model_label: str, user_field: str):
+        self.model_label = model_label
+        self.user_field = user_field
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def key(self, user_id) -> str:
+        return f"unread:{self.model_label.lower()}:{user_id}"
+
+    def count(self, user_id) -> int:
+        """Count from the database, bypassing the cache"""
+        return self.model.objects.filter(**{f"{self.user_field}_id": user_id, "is_read": False}).count()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.NOTIFICATIONS_UNREAD_CACHE
+
+    def get(self, user_id) -> int:
+        """Cached count, counted from the database when missing"""
+        if not self.enabled:
+            return self.count(user_id)
+        key = self.key(user_id)
+        value = cache.get(key)
+        if value is None:
+            value = self.count(user_id)
+            # add(): keep a value another request cached in the meantime
+            cache.add(key, value, settings.NOTIFICATIONS_UNREAD_CACHE_TTL)
+        return value
+
+    def adjust(self, deltas: Dict[int, int]):
+        """Add `deltas` ({user_id: n}) to the cached counters once the transaction commits"""
+        deltas = {user_id: n for user_id, n in deltas.items() if n}
+        if deltas and self.enabled:
+            transaction.on_commit(lambda: self._apply(deltas), robust=True)
+
+    def _apply(self, deltas: Dict[int, int]):
+        for user_id, delta in deltas.items():
+            key = self.key(user_id)
+            try:
+                value = cache.incr(key, delta)
+            except ValueError:
+                continue  # not cached: the next read counts it
+            if value < 0:
+                cache.delete(key)
+
+    def added(self, notifications: Iterable):
+        """Count new notifications (e.g. after a bulk_create)"""
+        self.adjust(Counter(
+            getattr(n, f"{self.user_field}_id") for n in notifications if not n.is_read
+        ))
+
+    def invalidate(self, user_ids: Iterable[int]):
+        """Drop the cached counters once the transaction commits"""
+        keys = [self.key(user_id) for user_id in set(user_ids)]
+        if keys and self.enabled:
+            transaction.on_commit(lambda: cache.delete_many(keys), robust=True)
+
+    def reconcile(self, user_ids: Iterable[int] | None = None, batch_size: int = 1000) -> int:
+        """
+        Recount the cached counters of `user_ids` (default: every user) from
+        the database. Returns how many cached counters were refreshed.
+        """
+        if not self.enabled:
+            return 0
+        if user_ids is None:
+            user_ids = get_user_model().objects.order_by("pk").values_list("pk", flat=True).iterator()
+        refreshed = 0
+        chunk = []
+        for user_id in user_ids:
+            chunk.append(user_id)
+            if len(chunk) >= batch_size:
+                refreshed += self._reconcile_chunk(chunk)
+                chunk = []
+        if chunk:
+            refreshed += self._reconcile_chunk(chunk)
+        return refreshed
+
+    def _reconcile_chunk(self, user_ids) -> int:
+        keys = {self.key(user_id): user_id for user_id in user_ids}
+        cached = [keys[key] for key in cache.get_many(list(keys))]
+        if not cached:
+            return 0
+        user_column = f"{self.user_field}_id"
+        counts = dict(
+            self.model.objects.filter(**{f"{user_column}__in": cached, "is_read": False})
+            .order_by()
+            .values(user_column)
+            .annotate(n=Count("id"))
+            .values_list(user_column, "n")
+        )
+        cache.set_many(
+            {self.key(user_id): counts.get(user_id, 0) for user_id in cached},
+            settings.NOTIFICATIONS_UNREAD_CACHE_TTL,
+        )
+        return len(cached)
+
+    def _saved(self, sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        if created:
+            self.added([instance])
+        else:
+            # A generic edit (admin, PATCH) may or may not have changed is_read
+            self.invalidate([getattr(instance, f"{self.user_field}_id")])
+
+    def connect(self):
+        post_save.connect(self._saved, sender=self.model_label, dispatch_uid=f"unread-{self.model_label}")
+
+
+notification_counter = UnreadCounter("notifications.Notification", "recipient")
+course_notification_counter = UnreadCounter("courses.Notification", "user")
+counters = (notification_counter, course_notification_counter)
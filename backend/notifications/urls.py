@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import NotificationViewSet
+from .views import NotificationViewSet, StreamTicketView, event_stream
 
 router = DefaultRouter()
 router.register(r'items', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    path('stream/', event_stream, name='notification-stream'),
+    path('stream/ticket/', StreamTicketView.as_view(), name='notification-stream-ticket'),
     path('', include(router.urls)),
 ]
@@ -1,15 +1,26 @@
-from rest_framework import viewsets, permissions, decorators, status
+from rest_framework import viewsets, permissions, decorators, status, views
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
 from drf_spectacular.utils import extend_schema, OpenApiTypes
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 
+from config.pagination import ActivityKeysetPagination
 from .models import Notification
 from .serializers import NotificationSerializer
+from .stream import EventStream, is_available as stream_available, issue_ticket, redeem_ticket
+from .unread import notification_counter
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityKeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user)
@@ -18,6 +29,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
         # Not exposed publicly; reserved for system events (signals)
         serializer.save(recipient=self.request.user)
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.is_read:
+            notification_counter.adjust({instance.recipient_id: -1})
+
     def update(self, request, *args, **kwargs):
         # Limit updates to 'is_read'
         partial = kwargs.pop('partial', False)
@@ -32,10 +48,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
         summary="Get unread count",
         responses={200: OpenApiTypes.OBJECT},
     )
-    @decorators.action(detail=False, methods=['get'], url_path='unread-count')
+    # Polled constantly: the user comes from the token claims and the count
+    # from the cache, so the common case runs no query at all
+    @decorators.action(detail=False, methods=['get'], url_path='unread-count',
+                       authentication_classes=[JWTStatelessUserAuthentication])
     def unread_count(self, request):
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'unread': count})
+        return Response({'unread': notification_counter.get(request.user.id)})
 
     @extend_schema(
         summary="Mark as read",
@@ -45,8 +63,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=True, methods=['post'], url_path='mark-read')
     def mark_read(self, request, pk=None):
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+        notification_counter.adjust({request.user.id: -updated})
         return Response({'status': 'marked as read'})
 
     @extend_schema(
@@ -58,6 +76,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_all_read(self, request):
         qs = self.get_queryset().filter(is_read=False)
         updated = qs.update(is_read=True)
+        notification_counter.adjust({request.user.id: -updated})
         return Response({'updated': updated})
     
     @extend_schema(
@@ -69,4 +88,74 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def delete_all(self, request):
         count = self.get_queryset().count()
         self.get_queryset().delete()
+        notification_counter.invalidate([request.user.id])
         return Response({'deleted': count})
+
+
+class StreamTicketView(views.APIView):
+    """Ticket to open the event stream, which EventSource cannot authenticate with headers"""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Get an event stream ticket",
+        request=None,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def post(self, request):
+        # Without a server that can hold streams open the client keeps polling
+        if not stream_available(request._request):
+            return Response({'ticket': None})
+        return Response({
+            'ticket': issue_ticket(request.user),
+            'expires_in': settings.STREAM_TICKET_TTL,
+        })
+
+
+def _stream_user_id(request):
+    """The user of the Bearer token, or of a single-use `?ticket=`"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        ticket = request.GET.get('ticket')
+        return redeem_ticket(ticket) if ticket else None
+    raw_token = authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token)).id
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+@require_GET
+def event_stream(request):
+    """
+    Server-sent events for the current user: `notification`,
+    `course_notification`, `message` and `result`. Reconnecting clients send
+    `Last-Event-ID` (or `?last_event_id=`) and get the events they missed.
+    """
+    if not stream_available(request):
+        # 204 tells EventSource not to reconnect
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    user_id = _stream_user_id(request)
+    if user_id is None:
+        return JsonResponse({'detail': 'Credenciales no válidas'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    if isinstance(request, ASGIRequest):
+        stream = EventStream(user_id, last_event_id, settings.STREAM_MAX_DURATION)
+        content = stream.iter_async()
+    else:
+        duration = min(settings.STREAM_MAX_DURATION, settings.STREAM_WSGI_MAX_DURATION)
+        stream = EventStream(user_id, last_event_id, duration)
+        content = stream.iter_sync()
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+    return response
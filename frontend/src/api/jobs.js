@@ -0,0 +1,29 @@
+import { api } from './axios'
+
+const JOB_POLL_INTERVAL_MS = 1000
+const JOB_MAX_WAIT_MS = 5 * 60 * 1000
+
+// Thrown when a job is still queued or running after the maximum wait, e.g.
+// because no worker is processing the queue
+export class JobTimeoutError extends Error {
+  constructor(job) {
+    super('El trabajo sigue en proceso. Revisa el resultado más tarde.')
+    this.name = 'JobTimeoutError'
+    this.job = job
+  }
+}
+
+// Background jobs (CSV imports, AI grading): poll the job until it finishes.
+// onProgress(job) is called on every poll with the partial result. Gives up
+// with a JobTimeoutError after maxWaitMs.
+export async function waitForJob(statusUrl, onProgress, maxWaitMs = JOB_MAX_WAIT_MS) {
+  const deadline = Date.now() + maxWaitMs
+  for (;;) {
+    const { data: job } = await api.get(statusUrl)
+    onProgress && onProgress(job)
+    if (job.status === 'SUCCEEDED') return job.result
+    if (job.status === 'FAILED') throw new Error(job.error)
+    if (Date.now() >= deadline) throw new JobTimeoutError(job)
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+  }
+}
@@ -1,5 +1,7 @@
 import { api } from './axios';
 
+const MESSAGES_PAGE_SIZE = 100;
+
 export const getConversations = async () => {
     const { data } = await api.get('/api/v1/messaging/conversations/');
     return data;
@@ -34,8 +36,20 @@ export const getMessages = async (conversationId) => {
     // But for the chat window, we need ALL messages.
     // Let's assume we can filter by conversation in the MessageViewSet.
     // I'll update the backend view to support filtering.
-    const { data } = await api.get(`/api/v1/messaging/messages/?conversation=${conversationId}`);
-    return data;
+    // Latest page of the conversation, shown oldest first
+    const { data } = await api.get('/api/v1/messaging/messages/', {
+        params: { conversation: conversationId, ordering: '-created_at,-id', page_size: MESSAGES_PAGE_SIZE },
+    });
+    return data.results.reverse();
+};
+
+// Messages after `afterId` only, oldest first. With `wait` (seconds) the server
+// holds the request until one arrives or the wait is over.
+export const getNewMessages = async (conversationId, afterId, wait) => {
+    const { data } = await api.get('/api/v1/messaging/messages/', {
+        params: { conversation: conversationId, after_id: afterId, page_size: MESSAGES_PAGE_SIZE, ...(wait ? { wait } : {}) },
+    });
+    return data.results;
 };
 
 export const sendMessage = async (conversationId, content) => {
@@ -0,0 +1,21 @@
+import { api } from './axios'
+
+// List endpoints use keyset pagination and answer { next, previous, results }.
+// `next` is a full URL that already carries the cursor and the other params.
+
+export async function fetchPage(url, params) {
+  const { data } = await api.get(url, { params })
+  return data
+}
+
+// Follow `next` until the last page (for views that need the whole list)
+export async function fetchAllPages(url, params) {
+  const items = []
+  let page = await fetchPage(url, { page_size: 500, ...params })
+  items.push(...page.results)
+  while (page.next) {
+    page = await fetchPage(page.next)
+    items.push(...page.results)
+  }
+  return items
+}
@@ -0,0 +1,93 @@
+import { api, API_BASE } from './axios'
+
+// Server-sent events (/api/v1/notifs/stream/): one EventSource per tab, shared
+// by every subscriber. Each connection is opened with a single-use ticket, so
+// the access token never goes in the URL; when the connection ends (the server
+// closes streams periodically) we open a new one with a fresh ticket and the
+// last event seen, so nothing is missed. Servers that cannot hold streams open
+// hand out no ticket, and the pages keep polling.
+
+const KINDS = ['notification', 'course_notification', 'message', 'result']
+const REOPEN_DELAY = 3000
+
+const listeners = new Set()
+let source = null
+let opening = false
+let unavailable = false
+let lastEventId = null
+let reopenTimer = null
+
+async function open() {
+  if (opening || source || unavailable || !isStreamSupported()) return
+  opening = true
+  let ticket = null
+  try {
+    const { data } = await api.post('/api/v1/notifs/stream/ticket/')
+    ticket = data.ticket
+    unavailable = !ticket
+  } catch (e) {
+    scheduleReopen()
+  } finally {
+    opening = false
+  }
+  if (!ticket || !listeners.size) return
+
+  const params = new URLSearchParams({ ticket })
+  if (lastEventId) params.set('last_event_id', lastEventId)
+  const es = new EventSource(`${API_BASE}/api/v1/notifs/stream/?${params}`)
+  KINDS.forEach((kind) => {
+    es.addEventListener(kind, (event) => {
+      lastEventId = event.lastEventId || lastEventId
+      const data = JSON.parse(event.data)
+      listeners.forEach((listener) => listener(kind, data))
+    })
+  })
+  // The ticket is used up: instead of letting the browser retry with it,
+  // reopen with a new one
+  es.onerror = () => {
+    es.close()
+    if (source === es) {
+      source = null
+      scheduleReopen()
+    }
+  }
+  source = es
+}
+
+function scheduleReopen() {
+  clearTimeout(reopenTimer)
+  reopenTimer = setTimeout(() => listeners.size && open(), REOPEN_DELAY)
+}
+
+export function isStreamSupported() {
+  return typeof EventSource !== 'undefined'
+}
+
+export function isStreamOpen() {
+  return source?.readyState === EventSource.OPEN
+}
+
+// Call `fn` every `ms`, but only every `ms * factor` while the stream is open;
+// returns the function that stops it
+export function pollUnlessStreaming(fn, ms, factor) {
+  let ticks = 0
+  const interval = setInterval(() => {
+    ticks += 1
+    if (!isStreamOpen() || ticks % factor === 0) fn()
+  }, ms)
+  return () => clearInterval(interval)
+}
+
+// Call `listener(kind, data)` for every event; returns the unsubscribe function
+export function subscribe(listener) {
+  listeners.add(listener)
+  open()
+  return () => {
+    listeners.delete(listener)
+    if (!listeners.size) {
+      clearTimeout(reopenTimer)
+      source?.close()
+      source = null
+    }
+  }
+}
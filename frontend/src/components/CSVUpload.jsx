@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import { api } from '../api/axios'
+import { JobTimeoutError, waitForJob } from '../api/jobs'
 
 export default function CSVUpload({ label, uploadUrl, onComplete }) {
   const [file, setFile] = useState(null)
@@ -14,13 +15,18 @@ export default function CSVUpload({ label, uploadUrl, onComplete }) {
     try {
       const form = new FormData()
       form.append('file', file)
-      const { data } = await api.post(uploadUrl, form, {
+      const response = await api.post(uploadUrl, form, {
         headers: { 'Content-Type': 'multipart/form-data' },
       })
+      let data = response.data
+      if (data?.job_id) {
+        setMessage('Procesando archivo...')
+        data = await waitForJob(data.status_url || `/api/v1/jobs/${data.job_id}/`)
+      }
       setMessage('Carga realizada con éxito')
       onComplete && onComplete(data)
     } catch (err) {
-      setMessage('Error al cargar CSV')
+      setMessage(err instanceof JobTimeoutError ? err.message : 'Error al cargar CSV')
     } finally {
       setLoading(false)
     }
@@ -1,6 +1,7 @@
 ﻿import { useState, useEffect, useRef } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { api } from '../api/axios'
+import { pollUnlessStreaming, subscribe } from '../api/stream'
 
 export default function NotificationBell() {
   const [notifications, setNotifications] = useState([])
@@ -24,8 +25,8 @@ export default function NotificationBell() {
   async function loadNotifications() {
     setLoading(true)
     try {
-      const response = await api.get('/api/v1/courses/notifications/')
-      setNotifications(response.data.slice(0, 10)) // Only show last 10
+      const response = await api.get('/api/v1/courses/notifications/', { params: { page_size: 10 } })
+      setNotifications(response.data.results) // Only show last 10
     } catch (err) {
       console.error('Error loading notifications:', err)
     } finally {
@@ -86,11 +87,18 @@ export default function NotificationBell() {
     }
   }, [showDropdown])
 
-  // Load unread count on mount and poll every 30 seconds
+  // Load unread count on mount, refresh it when the server pushes a new
+  // notification, and poll as a fallback (every 30s without the stream)
   useEffect(() => {
     loadUnreadCount()
-    const interval = setInterval(loadUnreadCount, 30000) // Poll every 30s
-    return () => clearInterval(interval)
+    const unsubscribe = subscribe((kind) => {
+      if (kind === 'course_notification') loadUnreadCount()
+    })
+    const stopPolling = pollUnlessStreaming(loadUnreadCount, 30000, 4)
+    return () => {
+      unsubscribe()
+      stopPolling()
+    }
   }, [])
 
   return (
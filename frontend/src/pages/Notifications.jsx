@@ -1,21 +1,25 @@
 ﻿import { useEffect, useState } from 'react'
 import { api } from '../api/axios'
+import { fetchPage } from '../api/pagination'
 
 export default function NotificationsPage() {
   const [items, setItems] = useState([])
   const [unread, setUnread] = useState(0)
   const [loading, setLoading] = useState(true)
+  const [nextPage, setNextPage] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   async function load() {
     setLoading(true)
     try {
       // Usar la misma API que NotificationBell
-      const response = await api.get('/api/v1/courses/notifications/')
-      setItems(response.data)
-      
-      // Contar las no leídas
-      const unreadCount = response.data.filter(n => !n.is_read).length
-      setUnread(unreadCount)
+      const [page, count] = await Promise.all([
+        fetchPage('/api/v1/courses/notifications/'),
+        api.get('/api/v1/courses/notifications/unread-count/'),
+      ])
+      setItems(page.results)
+      setNextPage(page.next)
+      setUnread(count.data.unread_count)
     } catch (err) {
       console.error('Error loading notifications:', err)
     } finally {
@@ -23,6 +27,19 @@ export default function NotificationsPage() {
     }
   }
 
+  async function loadMore() {
+    setLoadingMore(true)
+    try {
+      const page = await fetchPage(nextPage)
+      setItems((prev) => [...prev, ...page.results])
+      setNextPage(page.next)
+    } catch (err) {
+      console.error('Error loading notifications:', err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   useEffect(() => {
     load()
   }, [])
@@ -225,6 +242,13 @@ export default function NotificationsPage() {
               ))}
             </tbody>
           </table>
+          {nextPage && (
+            <div style={{ textAlign: 'center', marginTop: '1rem' }}>
+              <button className="btn secondary" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Cargando...' : 'Cargar más'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
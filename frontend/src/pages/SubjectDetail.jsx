@@ -1,6 +1,8 @@
 ﻿import { useEffect, useState, useMemo } from 'react'
 import { useParams } from 'react-router-dom'
 import { api } from '../api/axios'
+import { JobTimeoutError, waitForJob } from '../api/jobs'
+import { fetchAllPages } from '../api/pagination'
 import { useAuth } from '../state/AuthContext'
 import CSVUpload from '../components/CSVUpload'
 import StatusBadge from '../components/StatusBadge'
@@ -55,6 +57,7 @@ export default function SubjectDetail() {
 
   // Estado para subida de archivos
   const [uploadingExercise, setUploadingExercise] = useState(null)
+  const [gradingProgress, setGradingProgress] = useState(null) // {exerciseId, done, total}
   const [submissionFile, setSubmissionFile] = useState(null)
   const [submissionText, setSubmissionText] = useState('')
   
@@ -142,16 +145,16 @@ export default function SubjectDetail() {
     try {
       const [s, e, d, ex, results] = await Promise.all([
         api.get(`/api/v1/courses/subjects/${id}/`),
-        api.get(`/api/v1/courses/subjects/${id}/enrollments/`),
+        fetchAllPages(`/api/v1/courses/subjects/${id}/enrollments/`),
         api.get(`/api/v1/courses/subjects/${id}/dashboard/`),
         api.get(`/api/v1/courses/exercises/?subject=${id}`),
-        api.get(`/api/v1/courses/results/?subject=${id}`),
+        fetchAllPages('/api/v1/courses/results/', { subject: id }),
       ])
       setSubject(s.data)
-      setEnrollments(e.data)
+      setEnrollments(e)
       setDash(d.data)
       setExercises(ex.data)
-      setDetailedResults(results.data)
+      setDetailedResults(results)
     } catch (err) {
       setError('No se pudo cargar la información de la materia.')
     } finally {
@@ -338,6 +341,37 @@ export default function SubjectDetail() {
     }
   }
 
+  async function gradeAllSubmissions(exercise) {
+    if (!confirm(`¿Calificar con IA todas las entregas pendientes de "${exercise.name}"?`)) {
+      return
+    }
+    try {
+      const { data } = await api.post(`/api/v1/courses/exercises/${exercise.id}/grade-submissions/`)
+      if (!data.job_id) {
+        setSuccess(data.detail)
+        setTimeout(() => setSuccess(''), 3000)
+        return
+      }
+      setGradingProgress({ exerciseId: exercise.id, done: 0, total: data.total })
+      const report = await waitForJob(data.status_url, (job) => {
+        if (job.result?.total) {
+          setGradingProgress({ exerciseId: exercise.id, done: job.result.done, total: job.result.total })
+        }
+      })
+      setSuccess(`IA calificó ${report.graded} de ${report.total} entregas de "${exercise.name}"`)
+      loadAll()
+      setTimeout(() => setSuccess(''), 5000)
+    } catch (err) {
+      setError(
+        err instanceof JobTimeoutError
+          ? err.message
+          : err.response?.data?.detail || 'No se pudieron calificar las entregas.'
+      )
+    } finally {
+      setGradingProgress(null)
+    }
+  }
+
   async function deleteExercise(exerciseId, exerciseName) {
     if (!confirm(`¿Estás seguro de eliminar el ejercicio "${exerciseName}"? Esto eliminará todos los resultados asociados.`)) {
       return
@@ -529,15 +563,19 @@ export default function SubjectDetail() {
     if (submissionText) formData.append('submission_text', submissionText)
     
     try {
-        await api.post(`/api/v1/courses/exercises/${uploadingExercise.id}/submit/`, formData, {
+        const { data } = await api.post(`/api/v1/courses/exercises/${uploadingExercise.id}/submit/`, formData, {
             headers: { 'Content-Type': 'multipart/form-data' }
         })
-        setSuccess('Solución subida correctamente')
+        setSuccess('Solución subida correctamente. La IA la está calificando...')
         setUploadingExercise(null)
         setSubmissionFile(null)
         setSubmissionText('')
         loadAll()
         setTimeout(() => setSuccess(''), 3000)
+        if (data?.status_url) {
+            // Refresh once the background grader has stored the grade
+            waitForJob(data.status_url).then(loadAll).catch(() => {})
+        }
     } catch (err) {
         console.error(err)
         setError(err.response?.data?.detail || 'Error al subir la solución')
@@ -1103,6 +1141,16 @@ export default function SubjectDetail() {
                               >
                                 Editar
                               </button>
+                              <button 
+                                className="btn secondary"
+                                style={{ padding: '0.4rem 0.8rem', fontSize: '0.875rem', flex: 1 }}
+                                disabled={!!gradingProgress}
+                                onClick={() => gradeAllSubmissions(ex)}
+                              >
+                                {gradingProgress?.exerciseId === ex.id
+                                  ? `🤖 ${gradingProgress.done}/${gradingProgress.total}`
+                                  : '🤖 Calificar entregas'}
+                              </button>
                               <button 
                                 className="btn danger"
                                 style={{ padding: '0.4rem 0.8rem', fontSize: '0.875rem', flex: 1 }}
@@ -71,10 +71,10 @@ describe('SubjectDetail Component', () => {
     
     // Mock API responses
     api.get.mockImplementation((url) => {
-      if (url.includes('/enrollments/')) return Promise.resolve({ data: mockEnrollments })
+      if (url.includes('/enrollments/')) return Promise.resolve({ data: { next: null, previous: null, results: mockEnrollments } })
       if (url.includes('/dashboard/')) return Promise.resolve({ data: mockDashboard })
       if (url.includes('/exercises/')) return Promise.resolve({ data: mockExercises })
-      if (url.includes('/results/')) return Promise.resolve({ data: mockResults })
+      if (url.includes('/results/')) return Promise.resolve({ data: { next: null, previous: null, results: mockResults } })
       if (url.includes('/subjects/1')) return Promise.resolve({ data: mockSubject })
       return Promise.reject(new Error('Not found'))
     })
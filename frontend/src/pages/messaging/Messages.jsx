@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../../state/AuthContext';
-import { getConversations, getMessages, sendMessage, startConversation, searchUsers, markAsRead } from '../../api/messaging';
+import { getConversations, getMessages, getNewMessages, sendMessage, startConversation, searchUsers, markAsRead } from '../../api/messaging';
+import { pollUnlessStreaming, subscribe } from '../../api/stream';
 import './Messages.css';
 
 const Messages = () => {
@@ -13,20 +14,39 @@ const Messages = () => {
     const [searchResults, setSearchResults] = useState([]);
     const [showNewChatModal, setShowNewChatModal] = useState(false);
     const messagesEndRef = useRef(null);
+    const lastMessageIdRef = useRef(null);
+
+    // New messages are pushed by the event stream; polling is only a fallback
+    const POLL_FACTOR = 6;
 
     // Poll for conversations
     useEffect(() => {
         fetchConversations();
-        const interval = setInterval(fetchConversations, 10000);
-        return () => clearInterval(interval);
+        const unsubscribe = subscribe((kind) => {
+            if (kind === 'message') fetchConversations();
+        });
+        const stopPolling = pollUnlessStreaming(fetchConversations, 10000, POLL_FACTOR);
+        return () => {
+            unsubscribe();
+            stopPolling();
+        };
     }, []);
 
     // Poll for messages when a conversation is selected
     useEffect(() => {
         if (selectedConversation) {
+            lastMessageIdRef.current = null;
             fetchMessages(selectedConversation.id);
-            const interval = setInterval(() => fetchMessages(selectedConversation.id), 5000); // Poll faster for active chat
-            return () => clearInterval(interval);
+            const unsubscribe = subscribe((kind, data) => {
+                if (kind === 'message' && data.conversation === selectedConversation.id) {
+                    fetchNewMessages(selectedConversation.id);
+                }
+            });
+            const stopPolling = pollUnlessStreaming(() => fetchNewMessages(selectedConversation.id), 5000, POLL_FACTOR); // Poll faster for active chat
+            return () => {
+                unsubscribe();
+                stopPolling();
+            };
         }
     }, [selectedConversation]);
 
@@ -47,6 +67,7 @@ const Messages = () => {
     const fetchMessages = async (conversationId) => {
         try {
             const data = await getMessages(conversationId);
+            lastMessageIdRef.current = data.length ? data[data.length - 1].id : 0;
             setMessages(data);
             // Mark as read if we have unread messages
             // This is a simple implementation; ideally we check if window is focused
@@ -56,6 +77,20 @@ const Messages = () => {
         }
     };
 
+    // Only the messages after the last one shown
+    const fetchNewMessages = async (conversationId) => {
+        if (lastMessageIdRef.current === null) return fetchMessages(conversationId);
+        try {
+            const data = await getNewMessages(conversationId, lastMessageIdRef.current);
+            if (!data.length) return;
+            lastMessageIdRef.current = data[data.length - 1].id;
+            setMessages((current) => [...current, ...data.filter((m) => !current.some((c) => c.id === m.id))]);
+            await markAsRead(conversationId);
+        } catch (error) {
+            console.error("Error fetching messages:", error);
+        }
+    };
+
     const handleSendMessage = async (e) => {
         e.preventDefault();
         if (!newMessage.trim() || !selectedConversation) return;
@@ -63,7 +98,7 @@ const Messages = () => {
         try {
             await sendMessage(selectedConversation.id, newMessage);
             setNewMessage('');
-            fetchMessages(selectedConversation.id);
+            fetchNewMessages(selectedConversation.id);
             fetchConversations(); // Update last message in list
         } catch (error) {
             console.error("Error sending message:", error);